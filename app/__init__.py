@@ -35,6 +35,48 @@ def create_app(config_class=Config):
     login_manager.login_message_category = 'info'
     socketio.init_app(app)
     
+    from app.utils.cache import response_cache
+    response_cache.init_app(app)
+    
+    from app.utils.semantic_cache import semantic_cache
+    semantic_cache.init_app(app)
+    
+    from app.utils.rate_limit import llm_limiter
+    llm_limiter.init_app(app)
+    
+    from app.utils.circuit_breaker import llm_breaker
+    llm_breaker.init_app(app)
+    
+    from app.utils.singleflight import ai_singleflight
+    ai_singleflight.init_app(app)
+    
+    from app.utils.conversations import conversation_sessions
+    conversation_sessions.init_app(app)
+    
+    from app.utils.write_behind import telemetry_buffer
+    telemetry_buffer.init_app(app)
+    
+    from app.utils.ai_jobs import ai_job_queue
+    ai_job_queue.init_app(app)
+    
+    from app.utils.insight_refresher import insight_refresher
+    insight_refresher.init_app(app)
+    
+    from app.utils.event_cache import event_cache
+    event_cache.init_app(app)
+    
+    from app.utils.company_index import company_index
+    company_index.init_app(app)
+    
+    from app.utils.xp_ledger import xp_compactor
+    xp_compactor.init_app(app)
+    
+    from app.utils.leaderboard import leaderboard
+    leaderboard.init_app(app)
+    
+    from app.utils.achievements import achievement_sweeper
+    achievement_sweeper.init_app(app)
+    
     # Ensure instance folder exists
     try:
         os.makedirs(app.instance_path)
@@ -54,6 +96,9 @@ def create_app(config_class=Config):
     from app.routes.chat import chat
     app.register_blueprint(chat)
     
+    from app.commands import register_commands
+    register_commands(app)
+    
     @login_manager.user_loader
     def load_user(id):
         from app.models.models import User
@@ -0,0 +1,435 @@
+import click
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import select, update
+from app.utils.metrics import LatencyRecorder
+
+
+@click.command('llm-bench')
+@click.option('--requests', 'total', default=200, show_default=True, help='Number of generations to run.')
+@click.option('--concurrency', default=16, show_default=True, help='Concurrent callers.')
+@click.option('--stream/--no-stream', default=False, help='Use streamed generation and report time to first chunk.')
+@with_appcontext
+def llm_bench(total, concurrency, stream):
+    """Measure throughput and tail latency of AI generation.
+
+    Calls go through the same limiter and provider as live traffic. Run it
+    with LLM_PROVIDER=fake to measure our own stack without the vendor.
+    """
+    from app.utils.ai_chat import CareerAI, get_provider
+    from app.utils.rate_limit import llm_limiter
+
+    provider = get_provider()
+    latencies = LatencyRecorder(window=total)
+    first_chunks = LatencyRecorder(window=total)
+    errors = []
+
+    def one(index):
+        prompt = f"Benchmark prompt {index}\n\nUser: how do I get started in data science?"
+        started = time.perf_counter()
+        try:
+            with llm_limiter.slot():
+                if stream:
+                    for position, _ in enumerate(provider.stream(prompt, CareerAI.GENERATION_CONFIG)):
+                        if position == 0:
+                            first_chunks.record(time.perf_counter() - started)
+                else:
+                    provider.generate(prompt, CareerAI.GENERATION_CONFIG)
+            latencies.record(time.perf_counter() - started)
+        except Exception as e:
+            errors.append(type(e).__name__)
+
+    click.echo(f"Provider: {provider.name}, {total} requests, concurrency {concurrency}")
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, range(total)))
+    elapsed = time.perf_counter() - started
+
+    stats = latencies.stats()
+    click.echo(f"Throughput: {total / elapsed:.1f} req/s over {elapsed:.2f}s")
+    click.echo(f"Latency ms: p50={stats['p50_ms']} p95={stats['p95_ms']} "
+               f"p99={stats['p99_ms']} max={stats['max_ms']}")
+    if stream:
+        ttft = first_chunks.stats()
+        click.echo(f"Time to first chunk ms: p50={ttft['p50_ms']} p95={ttft['p95_ms']} p99={ttft['p99_ms']}")
+    click.echo(f"Errors: {len(errors)} ({len(errors) / total:.1%})")
+    click.echo(f"Limiter: {llm_limiter.stats()['rejected_capacity']} rejected for capacity")
+
+
+def _rescore_chunk(rows):
+    """Rescore (id, message, response) rows; runs in a worker process"""
+    from app.utils.text_matcher import chat_scorer
+
+    scores = chat_scorer.rescore_many((message, response) for _, message, response in rows)
+    return [
+        {
+            'id': row[0],
+            'sentiment_score': sentiment,
+            'engagement_score': engagement,
+            'topics': topics
+        }
+        for row, (sentiment, engagement, topics) in zip(rows, scores)
+    ]
+
+
+def _read_checkpoint(path):
+    if not os.path.exists(path):
+        return 0, 0
+    with open(path) as f:
+        state = json.load(f)
+    return state['last_id'], state['rows']
+
+
+def _write_checkpoint(path, last_id, rows):
+    # Write then rename so an interrupted run never leaves a torn file
+    with open(path + '.tmp', 'w') as f:
+        json.dump({'last_id': last_id, 'rows': rows}, f)
+    os.replace(path + '.tmp', path)
+
+
+@click.command('rescore-chats')
+@click.option('--chunk-size', default=1000, show_default=True, help='Rows read and written per chunk.')
+@click.option('--workers', default=os.cpu_count() or 1, show_default=True,
+              help='Scoring processes; 1 scores in this process.')
+@click.option('--max-rate', default=0, show_default=True, help='Rows per second ceiling (0 for no limit).')
+@click.option('--pause', default=0.0, show_default=True, help='Seconds to sleep after each write.')
+@click.option('--restart', is_flag=True, help='Ignore the checkpoint and start from the first row.')
+@with_appcontext
+def rescore_chats(chunk_size, workers, max_rate, pause, restart):
+    """Recompute sentiment, engagement and topics for stored AI chats.
+
+    Rows are read in id order in keyset-paginated chunks, scored across a
+    process pool and written back with one bulk UPDATE per chunk, along
+    with their chat_topic links; per-user topic counts are rebuilt at the
+    end. The last written id is checkpointed in the instance folder, so an
+    interrupted run resumes where it stopped. --max-rate and --pause keep the job from
+    holding the database against live traffic.
+    """
+    from app.models.models import ChatHistory
+    from app.utils.topic_index import TopicIndex
+    from app import db
+
+    checkpoint = os.path.join(current_app.instance_path, 'rescore_chats.checkpoint')
+    last_id, done = (0, 0) if restart else _read_checkpoint(checkpoint)
+    if last_id:
+        click.echo(f"Resuming after id {last_id} ({done} rows already rescored)")
+
+    def read_chunk(after_id):
+        return [
+            tuple(row) for row in db.session.execute(
+                select(ChatHistory.id, ChatHistory.message, ChatHistory.response)
+                .where(ChatHistory.id > after_id)
+                .order_by(ChatHistory.id)
+                .limit(chunk_size)
+            )
+        ]
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    started = time.perf_counter()
+    rescored = 0
+    try:
+        while True:
+            # Read one chunk per worker, then score them side by side
+            chunks = []
+            after_id = last_id
+            for _ in range(max(1, workers)):
+                chunk = read_chunk(after_id)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                after_id = chunk[-1][0]
+            db.session.rollback()  # release the read snapshot between rounds
+            if not chunks:
+                break
+
+            results = pool.map(_rescore_chunk, chunks) if pool else map(_rescore_chunk, chunks)
+            for chunk, updates in zip(chunks, results):
+                db.session.execute(update(ChatHistory), updates)
+                TopicIndex.replace((row['id'], row['topics']) for row in updates)
+                db.session.commit()
+                last_id = chunk[-1][0]
+                rescored += len(updates)
+                _write_checkpoint(checkpoint, last_id, done + rescored)
+
+                elapsed = time.perf_counter() - started
+                if max_rate and rescored / max_rate > elapsed:
+                    time.sleep(rescored / max_rate - elapsed)
+                if pause:
+                    time.sleep(pause)
+
+            elapsed = time.perf_counter() - started
+            click.echo(f"{done + rescored} rows rescored (through id {last_id}), "
+                       f"{rescored / elapsed:,.0f} rows/s")
+    finally:
+        if pool:
+            pool.shutdown()
+
+    # Topic links were replaced chunk by chunk; recount once at the end
+    TopicIndex.rebuild_counts()
+    db.session.commit()
+
+    elapsed = time.perf_counter() - started
+    if os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    click.echo(f"Done: {rescored} rows in {elapsed:.2f}s "
+               f"({rescored / elapsed if elapsed else 0:,.0f} rows/s)")
+
+
+@click.command('semantic-cache-replay')
+@click.option('--limit', default=0, show_default=True, help='Replay at most this many chats (0 for all).')
+@click.option('--threshold', type=float, default=None, help='Similarity threshold (default AI_SEMANTIC_CACHE_THRESHOLD).')
+@click.option('--max-entries', type=int, default=None, help='Cache size (default AI_SEMANTIC_CACHE_MAX_ENTRIES).')
+@click.option('--samples', default=5, show_default=True, help='Near-duplicate hits to print for review.')
+@with_appcontext
+def semantic_cache_replay(limit, threshold, max_entries, samples):
+    """Replay stored chats through a fresh semantic cache and report its hit ratio.
+
+    Messages are fed in id order: each is looked up first and added on a
+    miss, as live traffic would. The exact-match hit ratio over the same
+    log is printed alongside for comparison. As in
+    CareerAI.depends_on_context, follow-ups too short to stand alone from
+    users who have chatted before bypass both caches and count as misses.
+    """
+    from app.models.models import ChatHistory, User
+    from app.utils.cache import ResponseCache
+    from app.utils.semantic_cache import SemanticCache
+    from app import db
+
+    config = current_app.config
+    cache = SemanticCache(
+        max_entries=max_entries or config.get('AI_SEMANTIC_CACHE_MAX_ENTRIES', 5000),
+        threshold=threshold if threshold is not None else config.get('AI_SEMANTIC_CACHE_THRESHOLD', 0.85),
+        dim=config.get('AI_SEMANTIC_CACHE_DIM', 1024),
+        ttl=None,
+        min_tokens=config.get('AI_SEMANTIC_CACHE_MIN_TOKENS', 2)
+    )
+    exact_keys = set()
+    users_with_context = set()
+    bypassed = 0
+    exact_hits = 0
+    combined_hits = 0
+    replayed = 0
+    shown = 0
+    last_id = 0
+    started = time.perf_counter()
+
+    while not limit or replayed < limit:
+        rows = db.session.execute(
+            select(ChatHistory.id, ChatHistory.user_id, ChatHistory.message, ChatHistory.response,
+                   User.interests, User.level)
+            .join(User, User.id == ChatHistory.user_id)
+            .where(ChatHistory.id > last_id)
+            .order_by(ChatHistory.id)
+            .limit(min(1000, limit - replayed) if limit else 1000)
+        ).all()
+        if not rows:
+            break
+
+        for row in rows:
+            has_context = row.user_id in users_with_context
+            users_with_context.add(row.user_id)
+            if has_context and cache.needs_context(row.message):
+                bypassed += 1
+                continue
+
+            exact_key = (ResponseCache.profile_fingerprint(row), ResponseCache.normalize_prompt(row.message))
+            exact_hit = exact_key in exact_keys
+            exact_keys.add(exact_key)
+
+            found = cache.lookup(row.message, row)
+            exact_hits += exact_hit
+            combined_hits += exact_hit or found is not None
+            if found is None:
+                cache.add(row.message, row.response, row)
+            elif shown < samples and ResponseCache.normalize_prompt(found[2]) != exact_key[1]:
+                shown += 1
+                click.echo(f"  {found[1]:.2f}  {found[2]!r} ~ {row.message!r}")
+        replayed += len(rows)
+        last_id = rows[-1].id
+
+    elapsed = time.perf_counter() - started
+    stats = cache.stats()
+    click.echo(f"Replayed {replayed} chats in {elapsed:.2f}s ({replayed / elapsed if elapsed else 0:,.0f}/s)")
+    click.echo(f"Exact-match hit ratio: {exact_hits / replayed if replayed else 0:.2%}")
+    click.echo(f"Semantic hit ratio:    {stats['hits'] / replayed if replayed else 0:.2%} "
+               f"(threshold {cache.threshold}, {stats['skipped_short']} too short to cache, "
+               f"{stats['evictions']} evictions)")
+    click.echo(f"Exact then semantic:   {combined_hits / replayed if replayed else 0:.2%}")
+    click.echo(f"Follow-ups sent straight to the model: {bypassed} "
+               f"({bypassed / replayed if replayed else 0:.2%}, counted as misses)")
+
+
+@click.command('repair-streaks')
+@click.option('--batch-size', default=1000, show_default=True, help='Users repaired per transaction.')
+@with_appcontext
+def repair_streaks(batch_size):
+    """Rebuild every user's chat streak fields from ChatHistory.
+
+    Users are walked in id order in batches; each batch's distinct chat
+    days are read in one query, and the current streak, longest streak and
+    last chat date are written back with a bulk UPDATE.
+    """
+    from collections import defaultdict
+    from datetime import date
+    from sqlalchemy import func
+    from app.models.models import ChatHistory, User
+    from app.utils.progress_tracker import ProgressTracker
+    from app import db
+
+    started = time.perf_counter()
+    day = func.date(ChatHistory.timestamp)
+    repaired = 0
+    last_id = 0
+    while True:
+        user_ids = db.session.scalars(
+            select(User.id).where(User.id > last_id).order_by(User.id).limit(batch_size)
+        ).all()
+        if not user_ids:
+            break
+
+        chat_days = db.session.execute(
+            select(ChatHistory.user_id, day)
+            .where(ChatHistory.user_id.in_(user_ids), ChatHistory.timestamp.isnot(None))
+            .distinct()
+        )
+        dates = defaultdict(list)
+        for user_id, chat_day in chat_days:
+            # SQLite returns date() as text
+            dates[user_id].append(chat_day if isinstance(chat_day, date) else date.fromisoformat(chat_day))
+
+        updates = []
+        for user_id in user_ids:
+            current, longest, last = ProgressTracker.streaks_from_dates(dates[user_id])
+            updates.append({'id': user_id, 'current_streak': current,
+                            'longest_streak': longest, 'last_chat_date': last})
+        db.session.execute(update(User), updates)
+        db.session.commit()
+
+        repaired += len(user_ids)
+        last_id = user_ids[-1]
+
+    click.echo(f"Repaired streaks for {repaired} users in {time.perf_counter() - started:.2f}s")
+
+
+@click.command('check-progress')
+@click.option('--repair', is_flag=True, help='Recompute the rows that have drifted.')
+@click.option('--batch-size', default=1000, show_default=True, help='Users checked per query.')
+@click.option('--show', default=5, show_default=True, help='Drifted rows to print.')
+@with_appcontext
+def check_progress(repair, batch_size, show):
+    """Compare user_progress rows with their sources and optionally repair drift.
+
+    Users are walked in id order in batches; each stored row is compared
+    with one computed fresh by ProgressStore.expected(). Missing rows count
+    as drift.
+    """
+    from app.models.models import User, UserProgress
+    from app.utils.user_progress import ProgressStore
+    from app import db
+
+    fields = [c.name for c in UserProgress.__table__.columns if c.name not in ('user_id', 'updated_at')]
+    checked = 0
+    drifted = 0
+    field_drift = {}
+    last_id = 0
+    while True:
+        user_ids = db.session.scalars(
+            select(User.id).where(User.id > last_id).order_by(User.id).limit(batch_size)
+        ).all()
+        if not user_ids:
+            break
+
+        stored = {
+            row.user_id: row for row in db.session.execute(
+                select(UserProgress.__table__).where(UserProgress.user_id.in_(user_ids))
+            )
+        }
+        bad = []
+        for expected in db.session.execute(ProgressStore.expected(user_ids)):
+            row = stored.get(expected.user_id)
+            wrong = fields if row is None else [f for f in fields if getattr(row, f) != getattr(expected, f)]
+            if not wrong:
+                continue
+            bad.append(expected.user_id)
+            for field in wrong:
+                field_drift[field] = field_drift.get(field, 0) + 1
+            if drifted + len(bad) <= show:
+                detail = 'missing' if row is None else ', '.join(
+                    f"{f} {getattr(row, f)} != {getattr(expected, f)}" for f in wrong)
+                click.echo(f"  user {expected.user_id}: {detail}")
+
+        if repair and bad:
+            ProgressStore.refresh(bad)
+            db.session.commit()
+        drifted += len(bad)
+        checked += len(user_ids)
+        last_id = user_ids[-1]
+
+    click.echo(f"Checked {checked} users: {drifted} drifted"
+               + (f" ({', '.join(f'{k}: {v}' for k, v in sorted(field_drift.items()))})" if field_drift else ''))
+    if drifted:
+        click.echo('Repaired.' if repair else 'Run with --repair to fix them.')
+
+
+@click.command('sweep-achievements')
+@click.option('--all', 'all_users', is_flag=True, help='Consider every user, not just recently active ones.')
+@click.option('--since-hours', default=25, show_default=True, help='Only users whose progress changed this recently.')
+@click.option('--chunk-size', default=1000, show_default=True, help='Users awarded per transaction.')
+@with_appcontext
+def sweep_achievements(all_users, since_hours, chunk_size):
+    """Award achievements to every user who qualifies but does not hold them yet"""
+    from datetime import datetime, timedelta
+    from app.utils.achievements import achievement_engine
+
+    since = None if all_users else datetime.utcnow() - timedelta(hours=since_hours)
+    started = time.perf_counter()
+    try:
+        totals = achievement_engine.sweep(since, chunk_size)
+    except Exception as e:
+        raise click.ClickException(f"Sweep failed: {e}. Chunks written before the failure stay "
+                                   f"committed; rerun to finish.")
+    for name, count in totals.items():
+        click.echo(f"  {name}: {count}")
+    click.echo(f"Awarded {sum(totals.values())} badges in {time.perf_counter() - started:.2f}s")
+
+
+@click.command('compact-xp')
+@click.option('--batch-size', default=5000, show_default=True, help='Ledger entries folded per transaction.')
+@click.option('--min-age', default=5, show_default=True, help='Leave entries younger than this many seconds.')
+@with_appcontext
+def compact_xp(batch_size, min_age):
+    """Fold XP ledger entries into the stored user balances"""
+    from app.utils.xp_ledger import ExperienceLedger
+
+    started = time.perf_counter()
+    folded = ExperienceLedger.compact(batch_size, min_age)
+    click.echo(f"Folded {folded} ledger entries in {time.perf_counter() - started:.2f}s "
+               f"(watermark {ExperienceLedger.watermark()})")
+
+
+@click.command('rebuild-xp')
+@click.option('--batch-size', default=1000, show_default=True, help='Users rebuilt per transaction.')
+@with_appcontext
+def rebuild_xp(batch_size):
+    """Recompute every user's stored experience and level from the XP ledger"""
+    from app.utils.xp_ledger import ExperienceLedger
+
+    started = time.perf_counter()
+    changed = ExperienceLedger.rebuild(batch_size)
+    click.echo(f"Rebuilt balances: {changed} users changed in {time.perf_counter() - started:.2f}s")
+
+
+def register_commands(app):
+    """Register the application's CLI commands"""
+    app.cli.add_command(llm_bench)
+    app.cli.add_command(rescore_chats)
+    app.cli.add_command(semantic_cache_replay)
+    app.cli.add_command(repair_streaks)
+    app.cli.add_command(check_progress)
+    app.cli.add_command(sweep_achievements)
+    app.cli.add_command(compact_xp)
+    app.cli.add_command(rebuild_xp)
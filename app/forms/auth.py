@@ -75,7 +75,7 @@ class ProfileForm(FlaskForm):
     name = StringField('Full Name', validators=[DataRequired(), Length(min=2, max=100)])
     bio = TextAreaField('Bio', validators=[Optional(), Length(max=500)])
     linkedin_profile = StringField('LinkedIn Profile', validators=[Optional(), URL()])
-    interests = SelectMultipleField('Career Interests', choices=[
+    INTEREST_CHOICES = [
         ('technology', 'Technology'),
         ('healthcare', 'Healthcare'),
         ('finance', 'Finance'),
@@ -86,7 +86,9 @@ class ProfileForm(FlaskForm):
         ('business', 'Business'),
         ('science', 'Science'),
         ('arts', 'Arts')
-    ])
+    ]
+    
+    interests = SelectMultipleField('Career Interests', choices=INTEREST_CHOICES)
 
 class ForgotPasswordForm(FlaskForm):
     email = StringField('Email', validators=[DataRequired(), Email()])
@@ -6,13 +6,15 @@ import secrets
 
 # Association tables
 user_badges = db.Table('user_badges',
-    db.Column('user_id', db.Integer, db.ForeignKey('user.id')),
-    db.Column('badge_id', db.Integer, db.ForeignKey('badge.id'))
+    db.Column('user_id', db.Integer, db.ForeignKey('user.id'), index=True),
+    db.Column('badge_id', db.Integer, db.ForeignKey('badge.id')),
+    db.UniqueConstraint('user_id', 'badge_id', name='uq_user_badges_user_id_badge_id')
 )
 
 event_participants = db.Table('event_participants',
-    db.Column('user_id', db.Integer, db.ForeignKey('user.id')),
-    db.Column('event_id', db.Integer, db.ForeignKey('event.id'))
+    db.Column('user_id', db.Integer, db.ForeignKey('user.id'), index=True),
+    db.Column('event_id', db.Integer, db.ForeignKey('event.id')),
+    db.Index('ix_event_participants_event_id_user_id', 'event_id', 'user_id')
 )
 
 group_chat_members = db.Table('group_chat_members',
@@ -21,10 +23,15 @@ group_chat_members = db.Table('group_chat_members',
 )
 
 user_connections = db.Table('user_connections',
-    db.Column('user_id', db.Integer, db.ForeignKey('user.id')),
+    db.Column('user_id', db.Integer, db.ForeignKey('user.id'), index=True),
     db.Column('connected_user_id', db.Integer, db.ForeignKey('user.id'))
 )
 
+chat_topic = db.Table('chat_topic',
+    db.Column('chat_history_id', db.Integer, db.ForeignKey('chat_history.id'), primary_key=True),
+    db.Column('topic', db.String(50), primary_key=True, index=True)
+)
+
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -34,10 +41,17 @@ class User(UserMixin, db.Model):
     avatar_url = db.Column(db.String(255), nullable=True)
     linkedin_profile = db.Column(db.String(255), nullable=True)
     interests = db.Column(db.String(500), nullable=True)
+    interest_mask = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')  # see app.utils.interests
     level = db.Column(db.Integer, default=1)
     experience = db.Column(db.Integer, default=0)
+    chat_count = db.Column(db.Integer, default=0)
+    engagement_score = db.Column(db.Float, default=0.0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_seen = db.Column(db.DateTime, default=datetime.utcnow)
+    last_active = db.Column(db.DateTime, nullable=True)
+    current_streak = db.Column(db.Integer, default=0)
+    longest_streak = db.Column(db.Integer, default=0)
+    last_chat_date = db.Column(db.Date, nullable=True)
     is_company_admin = db.Column(db.Boolean, default=False)
     company_id = db.Column(db.Integer, db.ForeignKey('company.id'), nullable=True)
     reset_token = db.Column(db.String(100), unique=True, nullable=True)
@@ -81,11 +95,10 @@ class User(UserMixin, db.Model):
             return False
         return True
     
-    def add_experience(self, points):
-        """Add experience points and update level"""
-        self.experience += points
-        self.level = self.calculate_level()
-        return self.level
+    def add_experience(self, points, reason='event', source_id=None):
+        """Add experience points (as an xp_ledger entry) and update level"""
+        from app.utils.xp_ledger import ExperienceLedger
+        return ExperienceLedger.add(self, points, reason, source_id)
     
     def calculate_level(self):
         """Calculate user level based on experience points"""
@@ -126,6 +139,20 @@ class Company(db.Model):
     events = db.relationship('Event', backref='company', lazy=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+class CompanyInsight(db.Model):
+    __tablename__ = 'company_insight'
+    __table_args__ = (
+        db.UniqueConstraint('company_id', 'interest_bucket', 'level_band',
+                            name='uq_company_insight_key'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    company_id = db.Column(db.Integer, db.ForeignKey('company.id'), nullable=False)
+    interest_bucket = db.Column(db.String(50), nullable=False)
+    level_band = db.Column(db.String(20), nullable=False)  # 'beginner', 'intermediate', 'advanced'
+    content = db.Column(db.Text, nullable=False)
+    is_stale = db.Column(db.Boolean, default=False)
+    generated_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
 class Event(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -162,4 +189,60 @@ class ChatHistory(db.Model):
     sentiment_score = db.Column(db.Float)
     engagement_score = db.Column(db.Float)
     topics = db.Column(db.String(200))
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow) 
\ No newline at end of file
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow) 
+
+class UserProgress(db.Model):
+    __tablename__ = 'user_progress'
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    experience = db.Column(db.Integer, nullable=False, default=0)
+    level = db.Column(db.Integer, nullable=False, default=1)
+    chat_count = db.Column(db.Integer, nullable=False, default=0)
+    current_streak = db.Column(db.Integer, nullable=False, default=0)
+    badge_count = db.Column(db.Integer, nullable=False, default=0)
+    connection_count = db.Column(db.Integer, nullable=False, default=0)
+    company_visits = db.Column(db.Integer, nullable=False, default=0)
+    webinars_attended = db.Column(db.Integer, nullable=False, default=0)
+    engagement_score = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+class XpLedger(db.Model):
+    __tablename__ = 'xp_ledger'
+    __table_args__ = (
+        db.Index('ix_xp_ledger_user_id_id', 'user_id', 'id'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    delta = db.Column(db.Integer, nullable=False)
+    reason = db.Column(db.String(30), nullable=False)
+    source_id = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class XpCompaction(db.Model):
+    __tablename__ = 'xp_compaction'
+    id = db.Column(db.Integer, primary_key=True)
+    compacted_through = db.Column(db.Integer, nullable=False, default=0)
+    compacted_at = db.Column(db.DateTime, nullable=True)
+
+class UserTopicCount(db.Model):
+    __tablename__ = 'user_topic_count'
+    __table_args__ = (
+        db.Index('ix_user_topic_count_user_count', 'user_id', 'count'),
+    )
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    topic = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class ConversationSummary(db.Model):
+    __tablename__ = 'conversation_summary'
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    summary = db.Column(db.Text, nullable=False, default='')
+    summarized_through = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class AIResponseCache(db.Model):
+    __tablename__ = 'ai_response_cache'
+    key = db.Column(db.String(64), primary_key=True)
+    response = db.Column(db.Text, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
\ No newline at end of file
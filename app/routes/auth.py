@@ -4,6 +4,7 @@ from werkzeug.security import generate_password_hash, check_password_hash
 from app.models.models import User, db
 from app.forms.auth import LoginForm, RegistrationForm, ProfileForm, ForgotPasswordForm, ResetPasswordForm
 from app.utils.progress_tracker import ProgressTracker
+from app.utils.cache import response_cache
 from werkzeug.utils import secure_filename
 import os
 from datetime import datetime, timedelta
@@ -153,10 +154,16 @@ def profile():
     
     if form.validate_on_submit():
         try:
+            fingerprint = response_cache.profile_fingerprint(current_user)
             current_user.name = form.name.data
             current_user.bio = form.bio.data
             current_user.linkedin_profile = form.linkedin_profile.data
             current_user.interests = ','.join(form.interests.data) if form.interests.data else None
+            
+            # Cached AI answers were tailored to the old profile; any field
+            # the prompt reads changes the fingerprint
+            if response_cache.profile_fingerprint(current_user) != fingerprint:
+                response_cache.invalidate_user(current_user.id)
             db.session.commit()
             flash('Profile updated successfully!', 'success')
             return redirect(url_for('auth.profile'))
@@ -4,12 +4,27 @@ from flask_socketio import emit, join_room, leave_room
 from app.models.models import ChatMessage, GroupChat, User, Event
 from app.utils.ai_chat import CareerAI
 from app.utils.progress_tracker import ProgressTracker
+from app.utils.metrics import ai_stream_ttft, ai_stream_total
+from app.utils.ai_jobs import ai_job_queue, QueueFull
+from app.utils.rate_limit import llm_limiter, RateLimited
+from app.utils.topic_index import TopicIndex
 from app import db, socketio
 from datetime import datetime
+from functools import partial
 from sqlalchemy import func
+import time
+import uuid
 
 chat = Blueprint('chat', __name__)
 
+@chat.errorhandler(RateLimited)
+def rate_limited(error):
+    """Reject over-limit AI requests quickly with a 429"""
+    db.session.rollback()
+    response = jsonify({'error': str(error)})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 429
+
 @chat.route('/chat')
 @login_required
 def index():
@@ -38,6 +53,9 @@ def ai_chat():
         if not message:
             return jsonify({'error': 'Message cannot be empty'}), 400
         
+        # Charge the user's AI budget before doing any work
+        llm_limiter.check_user(current_user)
+        
         # Save user message
         user_msg = ChatMessage(
             content=message,
@@ -47,6 +65,58 @@ def ai_chat():
         )
         db.session.add(user_msg)
         
+        # Stream the reply to the user's private Socket.IO room from the
+        # AI job pool, so streams share its worker and queue limits
+        if request.form.get('stream') in ('1', 'true'):
+            db.session.commit()
+            stream_id = uuid.uuid4().hex
+            try:
+                job = ai_job_queue.submit(
+                    current_user.id,
+                    stream_ai_reply,
+                    current_user.id,
+                    message,
+                    stream_id,
+                    on_complete=partial(notify_stream_failed, stream_id)
+                )
+            except QueueFull:
+                response = jsonify({'error': 'The AI advisor is busy right now. Please try again shortly.'})
+                response.headers['Retry-After'] = '5'
+                return response, 503
+            return jsonify({
+                'stream_id': stream_id,
+                'job_id': job.id,
+                'user_message': {
+                    'content': user_msg.content,
+                    'timestamp': user_msg.timestamp.strftime('%Y-%m-%d %H:%M:%S')
+                }
+            }), 202
+        
+        # Hand generation to the AI job pool and return the job id at once
+        if request.form.get('async') in ('1', 'true'):
+            db.session.commit()
+            try:
+                job = ai_job_queue.submit(
+                    current_user.id,
+                    run_ai_chat_job,
+                    current_user.id,
+                    message,
+                    on_complete=notify_job_done
+                )
+            except QueueFull:
+                response = jsonify({'error': 'The AI advisor is busy right now. Please try again shortly.'})
+                response.headers['Retry-After'] = '5'
+                return response, 503
+            
+            return jsonify({
+                'job_id': job.id,
+                'status_url': url_for('chat.ai_job_status', job_id=job.id),
+                'user_message': {
+                    'content': user_msg.content,
+                    'timestamp': user_msg.timestamp.strftime('%Y-%m-%d %H:%M:%S')
+                }
+            }), 202
+        
         # Initialize AI and generate response
         career_ai = CareerAI(current_user)
         ai_response = career_ai.generate_response(message)
@@ -80,6 +150,85 @@ def ai_chat():
     
     return render_template('chat/ai_chat.html', messages=messages)
 
+def user_room(user_id):
+    """Name of the private Socket.IO room for a user"""
+    return f'user_{user_id}'
+
+def stream_ai_reply(user_id, message, stream_id):
+    """AI job body: stream a reply to the user's private room and persist it"""
+    user = db.session.get(User, user_id)
+    room = user_room(user_id)
+    
+    started = time.perf_counter()
+    first_chunk_at = None
+    parts = []
+    
+    socketio.emit('ai_stream_start', {'stream_id': stream_id}, to=room)
+    for chunk in CareerAI(user).stream_response(message):
+        if first_chunk_at is None:
+            first_chunk_at = time.perf_counter()
+            ai_stream_ttft.record(first_chunk_at - started)
+        parts.append(chunk)
+        socketio.emit('ai_stream_chunk', {'stream_id': stream_id, 'content': chunk}, to=room)
+    ai_stream_total.record(time.perf_counter() - started)
+    
+    # Persist the reply once the stream has finished
+    ai_msg = ChatMessage(
+        content=''.join(parts),
+        user_id=user_id,
+        is_ai_chat=True,
+        is_ai_message=True
+    )
+    db.session.add(ai_msg)
+    db.session.commit()
+    
+    socketio.emit('ai_stream_end', {
+        'stream_id': stream_id,
+        'content': ai_msg.content,
+        'timestamp': ai_msg.timestamp.strftime('%Y-%m-%d %H:%M:%S')
+    }, to=room)
+
+def run_ai_chat_job(user_id, message):
+    """AI job body: generate a reply and persist it as a ChatMessage"""
+    user = db.session.get(User, user_id)
+    ai_response = CareerAI(user).generate_response(message)
+    
+    ai_msg = ChatMessage(
+        content=ai_response,
+        user_id=user_id,
+        is_ai_chat=True,
+        is_ai_message=True
+    )
+    db.session.add(ai_msg)
+    db.session.commit()
+    
+    return {
+        'content': ai_msg.content,
+        'timestamp': ai_msg.timestamp.strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+def notify_stream_failed(stream_id, job):
+    """Tell the client a streamed reply failed so it stops waiting"""
+    if job.status == 'failed':
+        socketio.emit('ai_stream_error', {
+            'stream_id': stream_id,
+            'error': job.error
+        }, to=user_room(job.user_id))
+
+def notify_job_done(job):
+    """Push a finished AI job to its owner's private room"""
+    socketio.emit('ai_job_done', job.to_dict(), to=user_room(job.user_id))
+
+@chat.route('/chat/jobs/<job_id>')
+@login_required
+def ai_job_status(job_id):
+    """Poll the status of an AI job"""
+    job = ai_job_queue.get(job_id)
+    if job is None or job.user_id != current_user.id:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    return jsonify(job.to_dict())
+
 @chat.route('/chat/group/<int:chat_id>')
 @login_required
 def group_chat(chat_id):
@@ -99,6 +248,12 @@ def group_chat(chat_id):
                          chat=chat,
                          messages=messages)
 
+@socketio.on('connect')
+def on_connect():
+    """Put each authenticated socket in its user's private room"""
+    if current_user.is_authenticated:
+        join_room(user_room(current_user.id))
+
 @socketio.on('join')
 def on_join(data):
     """Socket.IO event handler for joining a chat room"""
@@ -172,16 +327,8 @@ def chat_history():
      .limit(30)\
      .all()
     
-    # Get most discussed topics
-    topics = db.session.query(
-        ChatMessage.topics,
-        func.count(ChatMessage.id).label('count')
-    ).filter_by(user_id=current_user.id, is_ai_chat=True)\
-     .filter(ChatMessage.topics != None)\
-     .group_by(ChatMessage.topics)\
-     .order_by(func.count(ChatMessage.id).desc())\
-     .limit(5)\
-     .all()
+    # Get most discussed topics from the per-user counters
+    topics = TopicIndex.top_topics(current_user.id, limit=5)
     
     return render_template(
         'chat/history.html',
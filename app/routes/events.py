@@ -3,7 +3,8 @@ from flask_login import login_required, current_user
 from app.models.models import Event, Company, GroupChat, ChatMessage, User
 from app.utils.event_manager import EventManager
 from app.utils.progress_tracker import ProgressTracker
-from app.utils.ai_chat import CareerAI
+from app.utils.achievements import EVENT_REGISTERED
+from app.utils.insight_refresher import insight_refresher
 from app import db, socketio
 from datetime import datetime, timedelta
 from sqlalchemy import func
@@ -75,7 +76,7 @@ def register_event(event_id):
     
     if success:
         # Check for new achievements after registration
-        new_badges = ProgressTracker.check_achievements(current_user)
+        new_badges = ProgressTracker.check_achievements(current_user, EVENT_REGISTERED)
         if new_badges:
             for badge in new_badges:
                 flash(f'🎉 New Achievement Unlocked: {badge.title}!')
@@ -154,12 +155,13 @@ def company_detail(company_id):
         .order_by(Event.date.asc())\
         .all()
     
-    # Get AI insights about the company
-    ai = CareerAI(current_user)
-    company_insights = ai.generate_response(
-        f"Tell me about {company.name} in the {company.industry} industry. "
-        f"What makes them interesting for someone with interests in {current_user.interests}?"
-    )
+    # Get pre-generated AI insights; missing rows are filled in the background
+    company_insights = insight_refresher.get_insight(company, current_user)
+    if company_insights is None:
+        company_insights = (
+            f"We're putting together insights about {company.name} for you. "
+            "Check back in a few minutes!"
+        )
     
     return render_template(
         'events/company_detail.html',
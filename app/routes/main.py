@@ -1,8 +1,23 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, abort
 from flask_login import login_required, current_user
 from app.models.models import User, Event, Company
 from app.utils.event_manager import EventManager
 from app.utils.progress_tracker import ProgressTracker
+from app.utils.achievements import CONNECTION_MADE, achievement_sweeper
+from app.utils.cache import response_cache
+from app.utils.metrics import ai_stream_ttft, ai_stream_total
+from app.utils.ai_jobs import ai_job_queue
+from app.utils.conversations import conversation_sessions
+from app.utils.singleflight import ai_singleflight
+from app.utils.rate_limit import llm_limiter
+from app.utils.write_behind import telemetry_buffer
+from app.utils.semantic_cache import semantic_cache
+from app.utils.circuit_breaker import llm_breaker
+from app.utils.leaderboard import leaderboard
+from app.utils.user_progress import ProgressStore
+from app.utils.xp_ledger import xp_compactor
+from app.utils.event_cache import event_cache
+from app.utils.company_index import company_index
 from app import db
 
 main = Blueprint('main', __name__)
@@ -138,6 +153,9 @@ def connect_with_user(user_id):
     current_user.connections.append(target_user)
     db.session.commit()
     
+    for badge in ProgressTracker.check_achievements(current_user, CONNECTION_MADE):
+        flash(f'🎉 New Achievement Unlocked: {badge.title}!')
+    
     flash(f'You are now connected with {target_user.name}!')
     return redirect(url_for('main.explore'))
 
@@ -163,4 +181,59 @@ def search():
     return render_template('main/search.html', 
                          query=query,
                          users=users,
-                         events=events) 
\ No newline at end of file
+                         events=events) 
+
+@main.route('/leaderboard')
+@login_required
+def leaderboard_page():
+    """One page of the global leaderboard, or of one interest's with ?interest="""
+    if not leaderboard.enabled:
+        abort(404)
+    return jsonify(leaderboard.top(
+        page=request.args.get('page', 1, type=int),
+        per_page=request.args.get('per_page', 25, type=int),
+        interest=request.args.get('interest') or None
+    ))
+
+@main.route('/leaderboard/rank')
+@main.route('/leaderboard/rank/<int:user_id>')
+@login_required
+def leaderboard_rank(user_id=None):
+    """A user's global rank and their rank for each of their interests"""
+    if not leaderboard.enabled:
+        abort(404)
+    user = current_user if user_id is None else User.query.get_or_404(user_id)
+    return jsonify({
+        'user_id': user.id,
+        'experience': ProgressStore.get(user).experience,
+        'rank': leaderboard.rank(user.id),
+        'total': leaderboard.stats()['users'],
+        'interests': {
+            interest: leaderboard.rank(user.id, interest)
+            for interest in leaderboard.split_interests(user.interests)
+        }
+    })
+
+@main.route('/metrics')
+@login_required
+def metrics():
+    """Runtime counters for the AI and caching layers"""
+    return jsonify({
+        'ai_response_cache': response_cache.stats(),
+        'ai_semantic_cache': semantic_cache.stats(),
+        'ai_conversation_sessions': conversation_sessions.stats(),
+        'ai_singleflight': ai_singleflight.stats(),
+        'ai_limiter': llm_limiter.stats(),
+        'ai_breaker': llm_breaker.stats(),
+        'ai_stream': {
+            'time_to_first_token': ai_stream_ttft.stats(),
+            'total': ai_stream_total.stats()
+        },
+        'ai_job_queue': ai_job_queue.stats(),
+        'telemetry_buffer': telemetry_buffer.stats(),
+        'leaderboard': leaderboard.stats(),
+        'achievement_sweeper': achievement_sweeper.stats(),
+        'xp_ledger': xp_compactor.stats(),
+        'event_cache': event_cache.stats(),
+        'company_index': company_index.stats()
+    })
\ No newline at end of file
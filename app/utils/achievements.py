@@ -0,0 +1,265 @@
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from apscheduler.schedulers.background import BackgroundScheduler
+from flask import current_app
+from sqlalchemy import exists, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models.models import Badge, UserProgress, user_badges
+from app.utils.progress_tracker import ProgressTracker
+from app.utils.user_progress import ProgressStore
+from app.utils.xp_ledger import ExperienceLedger, REASON_ACHIEVEMENT
+from app import db
+
+# Domain events that can newly satisfy an achievement
+CHAT_RECORDED = 'chat_recorded'
+EVENT_REGISTERED = 'event_registered'
+CONNECTION_MADE = 'connection_made'
+
+# Dialects whose INSERT can skip rows that hit the unique constraint and
+# return the ones it wrote
+_SKIP_CONFLICT_INSERTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+
+
+class AchievementEngine:
+    """Evaluates the rules declared in ProgressTracker.ACHIEVEMENTS.
+
+    Rules are indexed by the domain events that can trigger them, so an
+    event only runs the rules it can affect. Badge ids come from an
+    in-memory name -> id map, and each user's held badges are read once as
+    a set. Awards (user_badges rows, XP and the refreshed progress row) are
+    written in the caller's transaction; a badge that a concurrent request
+    awarded first is skipped along with its XP.
+    """
+
+    def __init__(self):
+        self._badge_ids = {}
+        self._rules_by_trigger = None
+        self._lock = threading.Lock()
+
+    def rules_for(self, trigger=None):
+        """Names of the achievements a trigger can satisfy (all for None)"""
+        if trigger is None:
+            return list(ProgressTracker.ACHIEVEMENTS)
+        if self._rules_by_trigger is None:
+            index = defaultdict(list)
+            for name, achievement in ProgressTracker.ACHIEVEMENTS.items():
+                for rule_trigger in achievement['triggers']:
+                    index[rule_trigger].append(name)
+            self._rules_by_trigger = dict(index)
+        return self._rules_by_trigger.get(trigger, [])
+
+    def badge_ids(self, names):
+        """Map achievement names to Badge ids, loading the table on a miss"""
+        if any(name not in self._badge_ids for name in names):
+            with self._lock:
+                self._badge_ids = dict(db.session.execute(select(Badge.name, Badge.id)).all())
+        return {name: self._badge_ids[name] for name in names if name in self._badge_ids}
+
+    def held_badges(self, user_ids):
+        """Return {user_id: set of badge ids} for the given users"""
+        held = defaultdict(set)
+        for user_id, badge_id in db.session.execute(
+                select(user_badges.c.user_id, user_badges.c.badge_id)
+                .where(user_badges.c.user_id.in_(user_ids))):
+            held[user_id].add(badge_id)
+        return held
+
+    def evaluate(self, user_ids, trigger=None):
+        """Award newly earned achievements and return {user_id: [badge ids]}"""
+        user_ids = list(user_ids)
+        badge_ids = self.badge_ids(self.rules_for(trigger))
+        if not user_ids or not badge_ids:
+            return {}
+
+        progress = {
+            row.user_id: row for row in db.session.execute(
+                select(UserProgress.__table__).where(UserProgress.user_id.in_(user_ids))
+            )
+        }
+        held = self.held_badges(user_ids)
+
+        awarded = defaultdict(list)
+        for user_id in user_ids:
+            row = progress.get(user_id)
+            if row is None:
+                continue
+            for name, badge_id in badge_ids.items():
+                field, minimum = ProgressTracker.ACHIEVEMENTS[name]['requires']
+                if badge_id not in held[user_id] and getattr(row, field) >= minimum:
+                    awarded[user_id].append(badge_id)
+
+        return self._award(awarded)
+
+    def _award(self, awarded):
+        """Write {user_id: [badge ids]} awards and their XP ledger entries.
+
+        Badges the user already holds are skipped by the unique constraint
+        on user_badges, so XP is only granted for rows actually inserted.
+        Returns the awards that were written, in the same shape.
+        """
+        if not awarded:
+            return {}
+        written = defaultdict(list)
+        for user_id, badge_id in self._insert_badges([
+            {'user_id': user_id, 'badge_id': badge_id}
+            for user_id, badges in awarded.items() for badge_id in badges
+        ]):
+            written[user_id].append(badge_id)
+        if not written:
+            return {}
+
+        points = {
+            self._badge_ids[name]: achievement['points']
+            for name, achievement in ProgressTracker.ACHIEVEMENTS.items() if name in self._badge_ids
+        }
+        ExperienceLedger.record((
+            {'user_id': user_id, 'delta': points[badge_id], 'reason': REASON_ACHIEVEMENT, 'source_id': badge_id}
+            for user_id, badges in written.items() for badge_id in badges
+        ), refresh_progress=False)
+        ProgressStore.refresh(written)
+        return dict(written)
+
+    def _insert_badges(self, rows):
+        """Insert user_badges rows the users don't hold yet; return the (user_id, badge_id) pairs written.
+
+        SQLite and PostgreSQL skip held badges with ON CONFLICT DO NOTHING.
+        Other databases filter against the held badges first, and the unique
+        constraint fails the transaction if a concurrent award got in between.
+        """
+        dialect = db.session.get_bind().dialect.name
+        if dialect in _SKIP_CONFLICT_INSERTS:
+            return db.session.execute(
+                _SKIP_CONFLICT_INSERTS[dialect](user_badges)
+                .on_conflict_do_nothing(index_elements=['user_id', 'badge_id'])
+                .returning(user_badges.c.user_id, user_badges.c.badge_id),
+                rows
+            ).all()
+
+        held = self.held_badges({row['user_id'] for row in rows})
+        rows = [row for row in rows if row['badge_id'] not in held[row['user_id']]]
+        if rows:
+            db.session.execute(insert(user_badges), rows)
+        return [(row['user_id'], row['badge_id']) for row in rows]
+
+    def sweep(self, since=None, chunk_size=1000):
+        """Award every rule to all users who qualify but lack the badge.
+
+        Each rule is one anti-join of user_progress against user_badges,
+        walked in user id order and committed chunk by chunk. With ``since``
+        only progress rows refreshed from then on are considered (the
+        updated_at index keeps that proportional to recent activity).
+        Returns {achievement name: users awarded}. A chunk that fails is
+        rolled back, logged and re-raised; earlier chunks stay committed,
+        and a rerun skips the badges they awarded.
+        """
+        totals = {}
+        for name, badge_id in self.badge_ids(self.rules_for()).items():
+            achievement = ProgressTracker.ACHIEVEMENTS[name]
+            field, minimum = achievement['requires']
+            query = select(UserProgress.user_id).where(
+                UserProgress.__table__.c[field] >= minimum,
+                ~exists().where(
+                    user_badges.c.user_id == UserProgress.user_id,
+                    user_badges.c.badge_id == badge_id
+                )
+            )
+            if since is not None:
+                query = query.where(UserProgress.updated_at >= since)
+
+            totals[name] = 0
+            last_id = 0
+            while True:
+                user_ids = db.session.scalars(
+                    query.where(UserProgress.user_id > last_id)
+                    .order_by(UserProgress.user_id)
+                    .limit(chunk_size)
+                ).all()
+                if not user_ids:
+                    break
+                try:
+                    written = self._award({user_id: [badge_id] for user_id in user_ids})
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    current_app.logger.exception(
+                        f"Error awarding {name} achievements after user {last_id} "
+                        f"({sum(totals.values())} awarded so far)"
+                    )
+                    raise
+                totals[name] += len(written)
+                last_id = user_ids[-1]
+        return totals
+
+
+achievement_engine = AchievementEngine()
+
+
+class AchievementSweeper:
+    """Nightly job that awards achievements to everyone who has earned them.
+
+    Per-event evaluation only reaches users who are active; the sweep runs
+    AchievementEngine.sweep() over progress rows changed since the previous
+    run (or the last ACHIEVEMENT_SWEEP_LOOKBACK hours after a restart).
+    A failed run is recorded in stats() and leaves the start time where it
+    was, so the next run covers the same users again.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.scheduler = None
+        self.last_started = None
+        self.last_result = None
+        self.last_error = None
+        self.runs = 0
+        self.failures = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['achievement_sweeper'] = self
+
+        if not app.config.get('ACHIEVEMENT_SWEEP_ENABLED', True) or app.config.get('TESTING'):
+            return
+
+        self.scheduler = BackgroundScheduler(daemon=True)
+        self.scheduler.add_job(
+            self.run,
+            'cron',
+            hour=app.config.get('ACHIEVEMENT_SWEEP_HOUR', 3),
+            id='sweep_achievements',
+            max_instances=1,
+            coalesce=True
+        )
+        self.scheduler.start()
+
+    def run(self):
+        started = datetime.utcnow()
+        since = self.last_started or \
+            started - timedelta(hours=self.app.config.get('ACHIEVEMENT_SWEEP_LOOKBACK', 25))
+        self.runs += 1
+        try:
+            with self.app.app_context():
+                self.last_result = achievement_engine.sweep(
+                    since, self.app.config.get('ACHIEVEMENT_SWEEP_CHUNK', 1000)
+                )
+        except Exception as e:
+            self.failures += 1
+            self.last_error = {'at': started.isoformat(timespec='seconds'), 'error': str(e)}
+            raise
+        self.last_started = started
+        self.last_error = None
+        print(f"Achievement sweep awarded {sum(self.last_result.values())} badges since {since:%Y-%m-%d %H:%M}")
+
+    def stats(self):
+        return {
+            'runs': self.runs,
+            'failures': self.failures,
+            'last_started': self.last_started.isoformat(timespec='seconds') if self.last_started else None,
+            'last_result': self.last_result,
+            'last_error': self.last_error
+        }
+
+
+achievement_sweeper = AchievementSweeper()
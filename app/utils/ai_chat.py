@@ -1,33 +1,100 @@
-import os
-import google.generativeai as genai
+import threading
+from contextlib import closing
+from flask import current_app
 from datetime import datetime
 import json
 import random
-from app.models.models import ChatHistory, User
+from app.models.models import ChatHistory, ConversationSummary, User
+from app.utils.cache import response_cache
+from app.utils.semantic_cache import semantic_cache
+from app.utils.context_builder import ContextBuilder
+from app.utils.conversations import conversation_sessions
+from app.utils.singleflight import ai_singleflight
+from app.utils.circuit_breaker import llm_breaker
+from app.utils.rate_limit import llm_limiter, RateLimited
+from app.utils.llm_providers import create_provider
+from app.utils.progress_tracker import ProgressTracker
+from app.utils.write_behind import telemetry_buffer
+from app.utils.text_matcher import chat_scorer
 from app import db
 
-# Configure Gemini API
-genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
+# Providers are stateless between calls, so a single instance (selected by
+# LLM_PROVIDER) is shared by the process
+_provider = None
+_provider_lock = threading.Lock()
+
+def get_provider():
+    """Return the process-wide LLM provider, creating it on first use"""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = create_provider(current_app.config)
+    return _provider
 
 class CareerAI:
+    FALLBACK_RESPONSE = "I apologize, but I'm having trouble processing that right now. Could you try rephrasing your message?"
+    
+    UNAVAILABLE_RESPONSE = "I'm having trouble reaching my career knowledge right now, so here's something to think about while I reconnect:"
+    
+    GENERATION_CONFIG = {
+        'temperature': 0.7,
+        'top_p': 0.9,
+        'top_k': 40,
+        'max_output_tokens': 1024,
+    }
+    
     def __init__(self, user):
         self.user = user
-        self.model = genai.GenerativeModel('gemini-pro')
-        self.chat_history = []
-        self.load_chat_history()
+        self.llm = get_provider()
+        self.context_builder = ContextBuilder.from_config(current_app.config)
+        self.fallback_similarity = current_app.config.get('AI_FALLBACK_SIMILARITY', 0.6)
+        
+        # Reuse the user's conversation session if this process has one
+        self.session = conversation_sessions.get(user.id)
+        if self.session is None:
+            self.session = conversation_sessions.create(user.id)
+            self.load_chat_history()
+            conversation_sessions.save(self.session)
+        self.chat_history = self.session.turns
     
     def load_chat_history(self):
-        """Load recent chat history for context"""
-        history = ChatHistory.query.filter_by(user_id=self.user.id)\
-            .order_by(ChatHistory.timestamp.desc())\
-            .limit(5)\
+        """Load the running summary and the recent turns not yet folded into it"""
+        summary = db.session.get(ConversationSummary, self.user.id)
+        query = ChatHistory.query.filter_by(user_id=self.user.id)
+        if summary is not None:
+            self.session.summary = summary.summary
+            self.session.summarized_through = summary.summarized_through
+            if summary.summarized_through:
+                query = query.filter(ChatHistory.timestamp > summary.summarized_through)
+        
+        history = query.order_by(ChatHistory.timestamp.desc())\
+            .limit(self.session.turns.maxlen // 2)\
             .all()
         
-        self.chat_history = [
-            {'role': 'user', 'content': h.message} if not h.is_ai else
-            {'role': 'assistant', 'content': h.response}
-            for h in reversed(history)
-        ]
+        for h in reversed(history):
+            self._add_turn('user', h.message, h.timestamp)
+            self._add_turn('assistant', h.response, h.timestamp)
+        self.session.message_count = len(history)
+    
+    def _add_turn(self, role, content, timestamp=None):
+        """Add a turn to the session, folding any turn it displaces into the summary"""
+        evicted = self.session.add_turn(role, content, timestamp)
+        if evicted is not None:
+            self.context_builder.fold(self.session, [evicted])
+    
+    def _save_summary(self):
+        """Persist the running summary if folding changed it"""
+        if not self.session.summary_dirty:
+            return
+        
+        summary = db.session.get(ConversationSummary, self.user.id)
+        if summary is None:
+            summary = ConversationSummary(user_id=self.user.id)
+            db.session.add(summary)
+        summary.summary = self.session.summary
+        summary.summarized_through = self.session.summarized_through
+        self.session.summary_dirty = False
     
     def get_system_prompt(self):
         """Generate dynamic system prompt based on user profile"""
@@ -51,65 +118,183 @@ class CareerAI:
         Remember previous interactions and build upon them.
         """
     
+    @staticmethod
+    def _call_model(provider, prompt):
+        """Run a single model call in a limiter slot under the circuit breaker.
+        
+        Only the vendor call is timed, so waiting for a slot never counts as
+        a slow call, and the slot is given back as soon as the deadline fires.
+        """
+        with llm_limiter.slot():
+            return llm_breaker.call(lambda: provider.generate(prompt, CareerAI.GENERATION_CONFIG))
+    
+    def _generate(self, prompt):
+        """Run a single model call under the circuit breaker and call deadline"""
+        return CareerAI._call_model(self.llm, prompt)
+    
+    def fallback_response(self, message):
+        """Reply used when the model fails, times out or the breaker is open.
+        
+        A loosely similar cached answer is preferred; otherwise the user gets
+        a bit of trivia and an activity suggestion.
+        """
+        near_duplicate = semantic_cache.lookup(message, self.user, threshold=self.fallback_similarity)
+        if near_duplicate is not None:
+            llm_breaker.record_fallback('cached')
+            return near_duplicate[0]
+        
+        llm_breaker.record_fallback('canned')
+        return f"{self.UNAVAILABLE_RESPONSE}\n\n{self.get_trivia()}\n\n{self.suggest_activity()}"
+    
+    @staticmethod
+    def generate_company_insight(company, interest_bucket, level_band):
+        """Generate insights about a company for an interest bucket and level band"""
+        interest = interest_bucket.replace('_', ' ') if interest_bucket != 'general' else 'a range of careers'
+        prompt = (
+            f"Tell me about {company.name} in the {company.industry} industry. "
+            f"What makes them interesting for a {level_band} career explorer "
+            f"with interests in {interest}?"
+        )
+        return CareerAI._call_model(get_provider(), prompt)
+    
+    def build_prompt(self, message):
+        """Build the prompt for a user message from the profile, summary and recent turns"""
+        return self.context_builder.build(self.get_system_prompt(), self.session, message)
+    
+    def has_context(self):
+        """Whether prompts carry the user's conversation (recent turns or a summary)"""
+        return bool(self.session.turns or self.session.summary)
+    
+    def depends_on_context(self, message):
+        """Whether the reply to a message only makes sense within the conversation.
+        
+        Short or anaphoric messages ("tell me more", "why?") are answered
+        from the recent turns, so their replies are never cached or shared.
+        Every other message is cached on itself and the profile fingerprint.
+        """
+        return self.has_context() and semantic_cache.needs_context(message)
+    
     def generate_response(self, message, include_activities=True):
         """Generate AI response with optional interactive elements"""
         try:
-            # Add user message to history
-            self.chat_history.append({'role': 'user', 'content': message})
-            
-            # Prepare the prompt
-            prompt = self.get_system_prompt() + "\n\nUser: " + message
-            
-            # Generate response
-            response = self.model.generate_content(
-                prompt,
-                generation_config={
-                    'temperature': 0.7,
-                    'top_p': 0.9,
-                    'top_k': 40,
-                    'max_output_tokens': 1024,
-                }
-            )
-            
-            ai_response = response.text.strip()
+            # Prepare the prompt, then add user message to history
+            prompt = self.build_prompt(message)
+            contextual = self.depends_on_context(message)
+            cache_key = response_cache.make_key(message, self.user)
+            self._add_turn('user', message)
+            self.session.message_count += 1
             
-            # Add interactive elements if needed
-            if include_activities and len(self.chat_history) % 5 == 0:
-                activity = self.suggest_activity()
-                ai_response += f"\n\n{activity}"
+            # Generate response, reusing a cached or near-duplicate answer
+            # and sharing a single model call between concurrent requests
+            # for the same key. Follow-ups go straight to the model
+            if contextual:
+                ai_response = self._generate(prompt)
+            else:
+                ai_response = response_cache.get_or_compute(
+                    cache_key,
+                    lambda: semantic_cache.get_or_compute(
+                        message, self.user,
+                        lambda: ai_singleflight.do(cache_key, lambda: self._generate(prompt))
+                    ),
+                    user=self.user
+                )
             
-            # Save to chat history
-            chat_entry = ChatHistory(
-                user_id=self.user.id,
-                message=message,
-                response=ai_response,
-                sentiment_score=0.0,  # TODO: Implement sentiment analysis
-                engagement_score=self.calculate_engagement_score(message, ai_response),
-                topics=self.extract_topics(message + " " + ai_response)
-            )
-            db.session.add(chat_entry)
+            return self.record_exchange(message, ai_response, include_activities)
             
-            # Update user engagement
-            self.user.chat_count += 1
-            self.user.last_active = datetime.utcnow()
-            self.user.engagement_score = (self.user.engagement_score * 0.8 + 
-                                        chat_entry.engagement_score * 0.2)
-            
-            # Add experience points
-            points_earned = int(chat_entry.engagement_score * 10)
-            leveled_up = self.user.add_experience(points_earned)
-            
-            db.session.commit()
+        except RateLimited:
+            raise
+        except Exception as e:
+            print(f"Error generating AI response: {str(e)}")
+            return self.fallback_response(message)
+    
+    def stream_response(self, message, include_activities=True):
+        """Yield the AI response in chunks as the model produces them.
+        
+        The exchange is recorded once the stream finishes, and anything
+        appended while recording it (activities, level-up messages) is
+        yielded as a final chunk.
+        """
+        prompt = self.build_prompt(message)
+        contextual = self.depends_on_context(message)
+        cache_key = response_cache.make_key(message, self.user)
+        self._add_turn('user', message)
+        self.session.message_count += 1
+        
+        parts = []
+        try:
+            cached = None if contextual else response_cache.get(cache_key, user=self.user)
+            if cached is None and not contextual:
+                near_duplicate = semantic_cache.lookup(message, self.user)
+                if near_duplicate is not None:
+                    cached = near_duplicate[0]
+                    response_cache.set(cache_key, cached, user=self.user)
+            if cached is not None:
+                parts.append(cached)
+                yield cached
+            else:
+                # First-chunk and overall deadlines come from the breaker
+                with llm_limiter.slot(), closing(llm_breaker.stream(
+                        lambda: self.llm.stream(prompt, self.GENERATION_CONFIG))) as chunks:
+                    for chunk in chunks:
+                        parts.append(chunk)
+                        yield chunk
             
-            # Add level up message if applicable
-            if leveled_up:
-                ai_response += f"\n\n🎉 Congratulations! You've reached level {self.user.level}!"
+            ai_response = ''.join(parts).strip()
+            if cached is None and ai_response and not contextual:
+                response_cache.set(cache_key, ai_response, user=self.user)
+                semantic_cache.add(message, ai_response, self.user)
             
-            return ai_response
+            final_response = self.record_exchange(message, ai_response, include_activities)
+            if len(final_response) > len(ai_response):
+                yield final_response[len(ai_response):]
             
         except Exception as e:
-            print(f"Error generating AI response: {str(e)}")
-            return "I apologize, but I'm having trouble processing that right now. Could you try rephrasing your message?"
+            db.session.rollback()
+            print(f"Error streaming AI response: {str(e)}")
+            if not parts:
+                yield self.fallback_response(message)
+    
+    def record_exchange(self, message, ai_response, include_activities=True):
+        """Record a completed exchange, update engagement and return the final reply
+        
+        Session state is saved to the current db session for the caller to
+        commit; telemetry goes through the write-behind buffer.
+        """
+        # Add interactive elements if needed
+        if include_activities and self.session.message_count % 5 == 0:
+            activity = self.suggest_activity()
+            ai_response += f"\n\n{activity}"
+        
+        timestamp = datetime.utcnow()
+        self._add_turn('assistant', ai_response, timestamp)
+        self._save_summary()
+        conversation_sessions.save(self.session)
+        
+        # Buffer the chat history row and the user's counter updates; they
+        # are written in batches by the telemetry buffer
+        engagement_score, topics = chat_scorer.score(message, ai_response)
+        points_earned = int(engagement_score * 10)
+        
+        experience = (self.user.experience or 0) + telemetry_buffer.pending_experience(self.user.id)
+        previous_level = ProgressTracker.calculate_level(experience)
+        new_level = ProgressTracker.calculate_level(experience + points_earned)
+        
+        telemetry_buffer.record_chat(
+            user_id=self.user.id,
+            message=message,
+            response=ai_response,
+            sentiment_score=chat_scorer.sentiment_score(message),
+            engagement_score=engagement_score,
+            topics=topics,
+            experience=points_earned,
+            timestamp=timestamp
+        )
+        
+        # Add level up message if applicable
+        if new_level > previous_level:
+            ai_response += f"\n\n🎉 Congratulations! You've reached level {new_level}!"
+        
+        return ai_response
     
     def suggest_activity(self):
         """Suggest an interactive activity based on user level and interests"""
@@ -136,41 +321,11 @@ class CareerAI:
     
     def calculate_engagement_score(self, message, response):
         """Calculate engagement score based on interaction quality"""
-        score = 0.5  # Base score
-        
-        # Length-based scoring
-        msg_length = len(message.split())
-        if msg_length > 20:
-            score += 0.2
-        elif msg_length > 10:
-            score += 0.1
-        
-        # Question-based scoring
-        if '?' in message:
-            score += 0.1
-        
-        # Keyword-based scoring
-        career_keywords = ['career', 'job', 'work', 'industry', 'company', 'skill']
-        for keyword in career_keywords:
-            if keyword in message.lower():
-                score += 0.05
-        
-        return min(1.0, score)  # Cap at 1.0
+        return chat_scorer.engagement_score(message)
     
     def extract_topics(self, text):
         """Extract main topics from the conversation"""
-        common_topics = [
-            'career planning', 'job search', 'skill development',
-            'interview prep', 'networking', 'industry insights',
-            'company culture', 'work-life balance', 'professional growth'
-        ]
-        
-        topics = []
-        for topic in common_topics:
-            if topic in text.lower():
-                topics.append(topic)
-        
-        return ','.join(topics[:3])  # Limit to top 3 topics
+        return chat_scorer.topics_for(text)
     
     def get_joke(self):
         """Get a career-related joke"""
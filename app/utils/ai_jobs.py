@@ -0,0 +1,168 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from app.utils.metrics import LatencyRecorder
+
+
+class QueueFull(Exception):
+    """Raised when the AI job queue is at its depth limit"""
+
+
+class AIJob:
+    def __init__(self, user_id):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.status = 'queued'  # 'queued', 'running', 'done' or 'failed'
+        self.result = None
+        self.error = None
+        self.submitted_at = time.perf_counter()
+        self.started_at = None
+        self.finished_at = None
+        self.created = datetime.utcnow()
+
+    @property
+    def queue_wait(self):
+        if self.started_at is None:
+            return None
+        return self.started_at - self.submitted_at
+
+    @property
+    def run_time(self):
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    def to_dict(self):
+        def ms(value):
+            return round(value * 1000, 1) if value is not None else None
+
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'result': self.result,
+            'error': self.error,
+            'created': self.created.strftime('%Y-%m-%d %H:%M:%S'),
+            'queue_wait_ms': ms(self.queue_wait),
+            'run_ms': ms(self.run_time)
+        }
+
+
+class AIJobQueue:
+    """Bounded worker pool for AI generation.
+
+    Requests submit a job and return its id straight away, so a slow model
+    call occupies one of AI_JOB_WORKERS pool threads instead of a web
+    worker. At most AI_JOB_QUEUE_DEPTH jobs may wait for a free thread;
+    beyond that submit() raises QueueFull.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.executor = None
+        self.workers = 0
+        self.max_depth = 0
+        self.result_ttl = 600
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.wait_times = LatencyRecorder()
+        self.run_times = LatencyRecorder()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.workers = app.config.get('AI_JOB_WORKERS', 4)
+        self.max_depth = app.config.get('AI_JOB_QUEUE_DEPTH', 32)
+        self.result_ttl = app.config.get('AI_JOB_RESULT_TTL', 600)
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.workers,
+            thread_name_prefix='ai-job'
+        )
+        app.extensions['ai_job_queue'] = self
+
+    def submit(self, user_id, fn, *args, on_complete=None):
+        """Queue fn(*args) to run in an app context and return its AIJob.
+
+        on_complete, if given, is called with the finished job (inside the
+        same app context) whether it succeeded or failed.
+        """
+        with self._lock:
+            self._prune()
+            if self.queued >= self.max_depth:
+                self.rejected += 1
+                raise QueueFull(f'AI job queue is full ({self.max_depth} waiting)')
+
+            job = AIJob(user_id)
+            self._jobs[job.id] = job
+            self.queued += 1
+
+        self.executor.submit(self._run, job, fn, args, on_complete)
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def _run(self, job, fn, args, on_complete):
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        job.status = 'running'
+        job.started_at = time.perf_counter()
+        self.wait_times.record(job.queue_wait)
+
+        with self.app.app_context():
+            try:
+                job.result = fn(*args)
+                job.status = 'done'
+            except Exception as e:
+                print(f"Error running AI job {job.id}: {str(e)}")
+                job.error = 'The AI advisor could not complete this request.'
+                job.status = 'failed'
+
+            job.finished_at = time.perf_counter()
+            self.run_times.record(job.run_time)
+            with self._lock:
+                self.running -= 1
+                if job.status == 'done':
+                    self.completed += 1
+                else:
+                    self.failed += 1
+
+            if on_complete is not None:
+                try:
+                    on_complete(job)
+                except Exception as e:
+                    print(f"Error notifying AI job {job.id}: {str(e)}")
+
+    def _prune(self):
+        """Forget finished jobs older than the result TTL (lock held)"""
+        cutoff = time.perf_counter() - self.result_ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'max_depth': self.max_depth,
+            'queued': self.queued,
+            'running': self.running,
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'queue_wait': self.wait_times.stats(),
+            'run_time': self.run_times.stats()
+        }
+
+
+ai_job_queue = AIJobQueue()
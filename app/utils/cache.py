@@ -0,0 +1,323 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with an optional per-entry TTL.
+
+    With ``sliding=True`` the TTL is an idle timeout that restarts on every
+    hit. ``max_bytes`` together with a ``sizeof`` callable caps the total
+    estimated size of the cached values as well as their number.
+    ``on_remove`` is called with the key of every entry that is evicted,
+    expires, is deleted or is cleared (with the cache's lock held).
+    """
+
+    def __init__(self, max_entries=1024, ttl=None, sliding=False, max_bytes=None, sizeof=None, on_remove=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.sliding = sliding
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.on_remove = on_remove
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        """Return a cached value and mark it as recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at, size = entry
+            now = time.monotonic()
+            if expires_at is not None and expires_at <= now:
+                del self._entries[key]
+                self.bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                self._removed(key)
+                return default
+
+            if self.sliding and self.ttl:
+                self._entries[key] = (value, now + self.ttl, size)
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Store a value, evicting the least recently used entries if full"""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        size = self.sizeof(value) if self.sizeof else 0
+        with self._lock:
+            self._purge_expired()
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[2]
+            self._entries[key] = (value, expires_at, size)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or \
+                    (self.max_bytes and self.bytes > self.max_bytes and len(self._entries) > 1):
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted[2]
+                self.evictions += 1
+                self._removed(evicted_key)
+
+    def _purge_expired(self):
+        """Drop expired entries from the least recently used end (lock held)"""
+        now = time.monotonic()
+        while self._entries:
+            key, (_, expires_at, size) = next(iter(self._entries.items()))
+            if expires_at is None or expires_at > now:
+                break
+            del self._entries[key]
+            self.bytes -= size
+            self.expirations += 1
+            self._removed(key)
+
+    def _removed(self, key):
+        if self.on_remove is not None:
+            self.on_remove(key)
+
+    def delete(self, key):
+        """Remove a single entry, returning True if it was present"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return False
+            self.bytes -= entry[2]
+            self._removed(key)
+            return True
+
+    def clear(self):
+        with self._lock:
+            keys = list(self._entries) if self.on_remove is not None else ()
+            self._entries.clear()
+            self.bytes = 0
+            for key in keys:
+                self._removed(key)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def stats(self):
+        """Return counters for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_entries': self.max_entries,
+            'bytes': self.bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class ResponseCache:
+    """Two-tier cache for AI responses.
+
+    The first tier is an in-process LRU with a TTL. The optional second tier
+    is the ``ai_response_cache`` table, which survives restarts and is shared
+    by every worker pointing at the same database. Writes to the shared tier
+    are added to the current session and persisted by the caller's commit.
+    """
+
+    def __init__(self, app=None):
+        self.local = LRUCache(on_remove=self._forget)
+        self.shared_enabled = False
+        self.ttl = 3600
+        self.shared_hits = 0
+        self.shared_misses = 0
+        self.invalidations = 0
+        # Keys of the locally cached entries served to or produced for each
+        # user, so a profile edit can drop exactly those entries. Both maps
+        # only hold keys that are in the local tier and shrink as it evicts
+        self._user_keys = {}
+        self._key_users = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config.get('AI_CACHE_TTL', 3600)
+        self.local = LRUCache(
+            max_entries=app.config.get('AI_CACHE_MAX_ENTRIES', 1024),
+            ttl=self.ttl,
+            on_remove=self._forget
+        )
+        with self._lock:
+            self._user_keys.clear()
+            self._key_users.clear()
+        self.shared_enabled = app.config.get('AI_CACHE_SHARED', True)
+        app.extensions['ai_response_cache'] = self
+
+    @staticmethod
+    def normalize_prompt(prompt):
+        """Collapse whitespace and case so trivially different prompts share a key"""
+        return re.sub(r'\s+', ' ', prompt or '').strip().lower()
+
+    @staticmethod
+    def profile_fingerprint(user):
+        """Hash every profile field the system prompt reads.
+
+        That is interests, level, age and goals (see
+        CareerAI.get_system_prompt). Objects without age or goals, such as
+        the rows replayed by semantic-cache-replay, hash them as empty.
+        """
+        interests = ','.join(sorted(
+            i.strip().lower() for i in (user.interests or '').split(',') if i.strip()
+        ))
+        age = getattr(user, 'age', None)
+        goals = ' '.join(str(getattr(user, 'goals', None) or '').split()).lower()
+        raw = f'{interests}|{user.level or 1}|{age if age is not None else ""}|{goals}'
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+    def make_key(self, prompt, user):
+        normalized = ResponseCache.normalize_prompt(prompt)
+        fingerprint = ResponseCache.profile_fingerprint(user)
+        return hashlib.sha256(f'{fingerprint}:{normalized}'.encode('utf-8')).hexdigest()
+
+    def get(self, key, user=None):
+        """Look up a response in the local tier, then the shared tier"""
+        value = self.local.get(key)
+        if value is not None:
+            if user is not None:
+                self._remember(user.id, key)
+            return value
+
+        if not self.shared_enabled:
+            return None
+
+        from app.models.models import AIResponseCache
+        from app import db
+        try:
+            with db.session.no_autoflush:
+                row = db.session.get(AIResponseCache, key)
+        except Exception as e:
+            print(f"Error reading shared response cache: {str(e)}")
+            return None
+
+        if row is None or row.expires_at <= datetime.utcnow():
+            self.shared_misses += 1
+            return None
+
+        self.shared_hits += 1
+        remaining = (row.expires_at - datetime.utcnow()).total_seconds()
+        self.local.set(key, row.response, ttl=max(1, int(remaining)))
+        if user is not None:
+            self._remember(user.id, key)
+        return row.response
+
+    def set(self, key, response, user=None):
+        """Store a response in both tiers"""
+        self.local.set(key, response)
+        if user is not None:
+            self._remember(user.id, key)
+
+        if not self.shared_enabled:
+            return
+
+        # Shared-tier writes join the caller's unit of work and are persisted
+        # by its commit, which keeps SQLite down to a single writer
+        from app.models.models import AIResponseCache
+        from app import db
+        db.session.merge(AIResponseCache(
+            key=key,
+            response=response,
+            user_id=user.id if user is not None else None,
+            created_at=datetime.utcnow(),
+            expires_at=datetime.utcnow() + timedelta(seconds=self.ttl)
+        ))
+
+    def get_or_compute(self, key, compute, user=None):
+        """Return the cached response for key, computing and storing it on a miss"""
+        cached = self.get(key, user=user)
+        if cached is not None:
+            return cached
+
+        response = compute()
+        if response:
+            self.set(key, response, user=user)
+        return response
+
+    def invalidate(self, key):
+        """Drop a single entry from both tiers"""
+        self.local.delete(key)
+        self.invalidations += 1
+        if not self.shared_enabled:
+            return
+
+        from app.models.models import AIResponseCache
+        AIResponseCache.query.filter_by(key=key).delete(synchronize_session=False)
+
+    def invalidate_user(self, user_id):
+        """Drop every entry produced for or served to a user"""
+        with self._lock:
+            keys = self._user_keys.pop(user_id, set())
+            for key in keys:
+                users = self._key_users.get(key)
+                if users is not None:
+                    users.discard(user_id)
+                    if not users:
+                        del self._key_users[key]
+
+        for key in keys:
+            self.local.delete(key)
+        self.invalidations += len(keys)
+
+        if not self.shared_enabled:
+            return
+
+        from app.models.models import AIResponseCache
+        AIResponseCache.query.filter(
+            (AIResponseCache.user_id == user_id) | AIResponseCache.key.in_(keys)
+        ).delete(synchronize_session=False)
+
+    def _remember(self, user_id, key):
+        with self._lock:
+            # An entry evicted since it was stored has already been forgotten
+            if key not in self.local:
+                return
+            self._user_keys.setdefault(user_id, set()).add(key)
+            self._key_users.setdefault(key, set()).add(user_id)
+
+    def _forget(self, key):
+        """Drop a key from the per-user sets once the local tier no longer holds it"""
+        with self._lock:
+            for user_id in self._key_users.pop(key, ()):
+                keys = self._user_keys.get(user_id)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._user_keys[user_id]
+
+    def stats(self):
+        stats = self.local.stats()
+        stats.update({
+            'shared_enabled': self.shared_enabled,
+            'shared_hits': self.shared_hits,
+            'shared_misses': self.shared_misses,
+            'invalidations': self.invalidations,
+            'tracked_users': len(self._user_keys)
+        })
+        return stats
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,246 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from datetime import datetime
+from app.utils.rate_limit import RateLimited
+
+
+class CircuitOpen(Exception):
+    """Raised without calling the model while the breaker is open"""
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a model call does not finish within its deadline"""
+
+
+class CircuitBreaker:
+    """Per-call deadlines and a circuit breaker around model calls.
+
+    ``call()`` runs the function on a worker thread and waits at most
+    ``timeout`` seconds for it, so a slow vendor no longer holds the request
+    worker. A failure, a missed deadline or a call slower than
+    ``slow_call_threshold`` counts against the breaker; after
+    ``failure_threshold`` of them in a row it opens and every call fails
+    fast with CircuitOpen. After ``reset_timeout`` seconds one trial call
+    is let through (half-open): success closes the breaker, failure opens it
+    again. Exceptions listed in ``ignore`` (such as our own rate limiting)
+    pass through without counting either way.
+
+    ``stream()`` does the same for a chunk generator, with one deadline for
+    the first chunk and another for the whole stream. Only the vendor call
+    runs on the worker thread and is timed, so callers take any concurrency
+    slot themselves and give it back as soon as a deadline fires.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, app=None, ignore=()):
+        self.name = name
+        self.ignore = tuple(ignore)
+        self.timeout = 20
+        self.first_chunk_timeout = 10
+        self.stream_timeout = 60
+        self.slow_call_threshold = 10
+        self.failure_threshold = 5
+        self.reset_timeout = 30
+        self.state = CircuitBreaker.CLOSED
+        self.opened_at = None
+        self.consecutive_failures = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix=f'{name}-call')
+        self.transitions = deque(maxlen=20)
+        self.calls = 0
+        self.failures = 0
+        self.slow_calls = 0
+        self.deadline_exceeded = 0
+        self.rejected = 0
+        self.fallbacks = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.timeout = app.config.get('AI_CALL_TIMEOUT', 20)
+        self.first_chunk_timeout = app.config.get('AI_STREAM_FIRST_CHUNK_TIMEOUT', 10)
+        self.stream_timeout = app.config.get('AI_STREAM_TIMEOUT', 60)
+        self.slow_call_threshold = app.config.get('AI_BREAKER_SLOW_CALL', 10)
+        self.failure_threshold = app.config.get('AI_BREAKER_FAILURE_THRESHOLD', 5)
+        self.reset_timeout = app.config.get('AI_BREAKER_RESET_TIMEOUT', 30)
+        # Calls that overrun their deadline keep their thread until the
+        # vendor answers, so leave room beyond the in-flight limit
+        self._executor = ThreadPoolExecutor(
+            max_workers=app.config.get('AI_MAX_IN_FLIGHT', 8) * 2,
+            thread_name_prefix=f'{self.name}-call'
+        )
+        app.extensions[f'{self.name}_breaker'] = self
+
+    def _transition(self, state):
+        """Move to a new state (lock held)"""
+        if state == self.state:
+            return
+        self.transitions.append({
+            'at': datetime.utcnow().isoformat(timespec='seconds'),
+            'from': self.state,
+            'to': state
+        })
+        print(f"Circuit breaker {self.name}: {self.state} -> {state}")
+        self.state = state
+        self.opened_at = time.monotonic() if state == CircuitBreaker.OPEN else None
+
+    def allow(self):
+        """Admit a call or raise CircuitOpen; pair with record_success/record_failure"""
+        with self._lock:
+            if self.state == CircuitBreaker.OPEN and \
+                    time.monotonic() - self.opened_at >= self.reset_timeout:
+                self._transition(CircuitBreaker.HALF_OPEN)
+            if self.state == CircuitBreaker.OPEN or \
+                    (self.state == CircuitBreaker.HALF_OPEN and self._trial_in_flight):
+                self.rejected += 1
+                raise CircuitOpen(f'{self.name} is unavailable')
+            if self.state == CircuitBreaker.HALF_OPEN:
+                self._trial_in_flight = True
+            self.calls += 1
+
+    def record_success(self, elapsed):
+        if elapsed >= self.slow_call_threshold:
+            with self._lock:
+                self.slow_calls += 1
+            self.record_failure()
+            return
+        with self._lock:
+            self.consecutive_failures = 0
+            self._trial_in_flight = False
+            self._transition(CircuitBreaker.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            if self.state == CircuitBreaker.HALF_OPEN or \
+                    self.consecutive_failures >= self.failure_threshold:
+                self._transition(CircuitBreaker.OPEN)
+            self._trial_in_flight = False
+
+    def release(self):
+        """Give back an admitted call that neither succeeded nor failed"""
+        with self._lock:
+            self.calls -= 1
+            self._trial_in_flight = False
+
+    def call(self, fn, timeout=None):
+        """Run fn() under the breaker, waiting at most timeout seconds for it"""
+        self.allow()
+        started = time.monotonic()
+        future = self._executor.submit(fn)
+        try:
+            result = future.result(timeout=self.timeout if timeout is None else timeout)
+        except FutureTimeout:
+            with self._lock:
+                self.deadline_exceeded += 1
+            self.record_failure()
+            raise DeadlineExceeded(f'{self.name} call exceeded its deadline')
+        except self.ignore:
+            self.release()
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success(time.monotonic() - started)
+        return result
+
+    _CHUNK, _DONE, _ERROR = range(3)
+
+    def stream(self, fn, first_chunk_timeout=None, timeout=None):
+        """Yield the chunks of fn() under the breaker.
+
+        The generator runs on a worker thread and hands its chunks over
+        through a queue, so a stalled vendor raises DeadlineExceeded here
+        instead of blocking the caller. Time to the first chunk is what
+        counts as the call's latency.
+        """
+        first_chunk_timeout = self.first_chunk_timeout if first_chunk_timeout is None else first_chunk_timeout
+        timeout = self.stream_timeout if timeout is None else timeout
+        self.allow()
+        started = time.monotonic()
+        chunks = queue.Queue()
+        cancelled = threading.Event()
+
+        def produce():
+            try:
+                iterator = fn()
+                try:
+                    for chunk in iterator:
+                        if cancelled.is_set():
+                            return
+                        chunks.put((CircuitBreaker._CHUNK, chunk))
+                finally:
+                    close = getattr(iterator, 'close', None)
+                    if close is not None:
+                        close()
+                chunks.put((CircuitBreaker._DONE, None))
+            except BaseException as e:
+                chunks.put((CircuitBreaker._ERROR, e))
+
+        self._executor.submit(produce)
+        first_chunk_at = None
+        finished = False
+        try:
+            while True:
+                deadline = started + (timeout if first_chunk_at is not None else min(first_chunk_timeout, timeout))
+                try:
+                    kind, value = chunks.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    finished = True
+                    with self._lock:
+                        self.deadline_exceeded += 1
+                    self.record_failure()
+                    stage = 'stream' if first_chunk_at is not None else 'first chunk'
+                    raise DeadlineExceeded(f'{self.name} {stage} exceeded its deadline')
+                if kind == CircuitBreaker._DONE:
+                    break
+                if kind == CircuitBreaker._ERROR:
+                    finished = True
+                    if isinstance(value, self.ignore):
+                        self.release()
+                    else:
+                        self.record_failure()
+                    raise value
+                if first_chunk_at is None:
+                    first_chunk_at = time.monotonic()
+                yield value
+            finished = True
+            self.record_success((first_chunk_at or time.monotonic()) - started)
+        finally:
+            cancelled.set()
+            if not finished:
+                # The consumer stopped reading before the stream ended
+                self.release()
+
+    def record_fallback(self, reason):
+        """Count a reply served from a fallback instead of the model"""
+        with self._lock:
+            self.fallbacks[reason] = self.fallbacks.get(reason, 0) + 1
+
+    def stats(self):
+        with self._lock:
+            attempts = self.calls + self.rejected
+            fallbacks = sum(self.fallbacks.values())
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'calls': self.calls,
+                'failures': self.failures,
+                'slow_calls': self.slow_calls,
+                'deadline_exceeded': self.deadline_exceeded,
+                'rejected_open': self.rejected,
+                'fallbacks': dict(self.fallbacks),
+                'fallback_rate': round(fallbacks / attempts, 4) if attempts else 0.0,
+                'transitions': list(self.transitions)
+            }
+
+
+llm_breaker = CircuitBreaker('llm', ignore=(RateLimited,))
@@ -0,0 +1,279 @@
+import re
+import threading
+import numpy as np
+from scipy import sparse
+from sqlalchemy import event, inspect, select
+from app.models.models import Company
+from app import db
+
+
+class CompanyIndex:
+    """BM25 index over every company's description and industry.
+
+    Each company is one row of a sparse term matrix. The matrix is stored
+    column-wise (CSC) and holds each term's saturated, length-normalised
+    frequency, so scoring a query is a slice of the query's columns and one
+    sparse matrix-vector product with their current IDF weights, followed by
+    an ``argpartition`` for the top k. Changed companies are re-tokenized
+    on the next search and appended as new rows, their old rows masked out;
+    once a quarter of the rows are dead the matrix is rebuilt from the
+    database, which also refreshes the average document length used for the
+    length normalisation.
+    """
+
+    STOPWORDS = frozenset([
+        'a', 'an', 'the', 'and', 'or', 'of', 'to', 'in', 'on', 'for', 'with',
+        'we', 'our', 'is', 'are', 'at', 'by', 'from', 'as', 'that', 'this', 'it'
+    ])
+
+    _TOKEN = re.compile(r"[a-z0-9+#]+")
+
+    def __init__(self, app=None, k1=1.2, b=0.75, rebuild_ratio=0.25):
+        self.k1 = k1
+        self.b = b
+        self.rebuild_ratio = rebuild_ratio
+        self.interest_labels = {}
+        self._lock = threading.Lock()
+        self._reset()
+        self.built = False
+        self.rebuilds = 0
+        self.updates = 0
+        self.searches = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        from app.forms.auth import RegistrationForm
+
+        self.k1 = app.config.get('COMPANY_INDEX_K1', 1.2)
+        self.b = app.config.get('COMPANY_INDEX_B', 0.75)
+        self.rebuild_ratio = app.config.get('COMPANY_INDEX_REBUILD_RATIO', 0.25)
+        # Interests are stored as choice keys ("ai_ml"); their labels
+        # ("AI & Machine Learning") carry most of the searchable words
+        self.interest_labels = {key: label for key, label in RegistrationForm.INTEREST_CHOICES}
+        app.extensions['company_index'] = self
+
+    def _reset(self):
+        self.vocabulary = {}
+        self.sizes = {}
+        self.slots = {}
+        self.terms = {}
+        self.matrix = sparse.csc_matrix((0, 0), dtype=np.float32)
+        self.df = np.zeros(0, dtype=np.int64)
+        self.company_ids = np.zeros(0, dtype=np.int64)
+        self.size_codes = np.zeros(0, dtype=np.int16)
+        self.alive = np.zeros(0, dtype=bool)
+        self.avgdl = 1.0
+        self.pending = set()
+
+    def tokens(self, text):
+        return [t for t in self._TOKEN.findall((text or '').lower()) if t not in self.STOPWORDS]
+
+    def query_tokens(self, interests):
+        """Words of a user's comma-separated interests and their labels"""
+        words = []
+        for interest in (interests or '').split(','):
+            interest = interest.strip()
+            if interest:
+                words.extend(self.tokens(interest.replace('_', ' ')))
+                words.extend(self.tokens(self.interest_labels.get(interest, '')))
+        return list(dict.fromkeys(words))
+
+    def _size_code(self, size):
+        return self.sizes.setdefault(size, len(self.sizes))
+
+    def _tokenize(self, documents):
+        """Return ids, size codes and {column: count} term counts of (company_id, text, size) documents"""
+        ids, codes, counts = [], [], []
+        for company_id, text, size in documents:
+            terms = {}
+            for token in self.tokens(text):
+                column = self.vocabulary.setdefault(token, len(self.vocabulary))
+                terms[column] = terms.get(column, 0) + 1
+            ids.append(company_id)
+            codes.append(self._size_code(size))
+            counts.append(terms)
+        return ids, codes, counts
+
+    def _matrix(self, counts, avgdl):
+        """CSC matrix of BM25 term weights, one row per {column: count} document"""
+        rows, cols, weights = [], [], []
+        for row, terms in enumerate(counts):
+            norm = self.k1 * (1 - self.b + self.b * sum(terms.values()) / avgdl)
+            for column, count in terms.items():
+                rows.append(row)
+                cols.append(column)
+                weights.append(count * (self.k1 + 1) / (count + norm))
+        return sparse.csc_matrix(
+            (np.asarray(weights, dtype=np.float32), (rows, cols)),
+            shape=(len(counts), len(self.vocabulary))
+        )
+
+    def _add_terms(self, company_id, terms):
+        columns = np.fromiter(terms, dtype=np.int64, count=len(terms))
+        self.terms[company_id] = columns
+        self.df[columns] += 1
+
+    def _grow_df(self):
+        if len(self.df) < len(self.vocabulary):
+            self.df = np.concatenate([self.df, np.zeros(len(self.vocabulary) - len(self.df), dtype=np.int64)])
+
+    def load_documents(self, documents):
+        """Replace the index with (company_id, text, size) documents"""
+        self._reset()
+        ids, codes, counts = self._tokenize(documents)
+        total = sum(sum(terms.values()) for terms in counts)
+        self.avgdl = max(total / len(counts), 1.0) if counts else 1.0
+
+        self.matrix = self._matrix(counts, self.avgdl)
+        self.company_ids = np.asarray(ids, dtype=np.int64)
+        self.size_codes = np.asarray(codes, dtype=np.int16)
+        self.alive = np.ones(len(ids), dtype=bool)
+        self.slots = {company_id: slot for slot, company_id in enumerate(ids)}
+        self._grow_df()
+        for company_id, terms in zip(ids, counts):
+            self._add_terms(company_id, terms)
+        self.built = True
+        self.rebuilds += 1
+
+    def update_documents(self, documents, removed=()):
+        """Re-index changed (company_id, text, size) documents and drop removed ids"""
+        documents = list(documents)
+        for company_id in [company_id for company_id, _, _ in documents] + list(removed):
+            slot = self.slots.pop(company_id, None)
+            if slot is None:
+                continue
+            self.alive[slot] = False
+            self.df[self.terms.pop(company_id)] -= 1
+        if not documents:
+            return
+
+        first = self.matrix.shape[0]
+        ids, codes, counts = self._tokenize(documents)
+        added = self._matrix(counts, self.avgdl)
+        self.matrix.resize(first, len(self.vocabulary))
+        self.matrix = sparse.vstack([self.matrix, added], format='csc')
+        self.company_ids = np.concatenate([self.company_ids, np.asarray(ids, dtype=np.int64)])
+        self.size_codes = np.concatenate([self.size_codes, np.asarray(codes, dtype=np.int16)])
+        self.alive = np.concatenate([self.alive, np.ones(len(ids), dtype=bool)])
+        self._grow_df()
+        for offset, (company_id, terms) in enumerate(zip(ids, counts)):
+            self.slots[company_id] = first + offset
+            self._add_terms(company_id, terms)
+        self.updates += len(ids)
+
+    @staticmethod
+    def _documents(query):
+        for company_id, description, industry, size in db.session.execute(query.execution_options(yield_per=10000)):
+            yield company_id, f"{description or ''} {industry or ''}", size
+
+    def rebuild(self):
+        """Reload the index from the company table"""
+        with self._lock:
+            self._rebuild()
+
+    def _rebuild(self):
+        self.load_documents(CompanyIndex._documents(
+            select(Company.id, Company.description, Company.industry, Company.size)
+        ))
+
+    def _refresh(self):
+        """Build the index on first use and re-index companies changed since"""
+        if not self.built:
+            self._rebuild()
+            return
+        if not self.pending:
+            return
+        changed, self.pending = self.pending, set()
+        documents = list(CompanyIndex._documents(
+            select(Company.id, Company.description, Company.industry, Company.size)
+            .where(Company.id.in_(changed))
+        ))
+        found = {company_id for company_id, _, _ in documents}
+        self.update_documents(documents, removed=changed - found)
+        if len(self.alive) and (~self.alive).sum() > self.rebuild_ratio * len(self.alive):
+            self._rebuild()
+
+    def invalidate(self, company_ids):
+        with self._lock:
+            self.pending.update(company_ids)
+
+    def scores(self, interests):
+        """BM25 score of every matrix row for a user's interests"""
+        columns = [self.vocabulary[t] for t in self.query_tokens(interests) if t in self.vocabulary]
+        if not columns:
+            return np.zeros(self.matrix.shape[0], dtype=np.float32)
+        df = self.df[columns]
+        count = len(self.slots)
+        idf = np.log1p((count - df + 0.5) / (df + 0.5)).astype(np.float32)
+        return self.matrix[:, columns] @ idf
+
+    def search(self, interests, size=None, limit=5, refresh=True):
+        """Ids of the best matching companies, optionally of one size.
+
+        Companies without any matching term fill the remaining places.
+        """
+        with self._lock:
+            if refresh:
+                self._refresh()
+            scores = self.scores(interests)
+            eligible = self.alive.copy()
+            if size:
+                eligible &= self.size_codes == self.sizes.get(size, -1)
+            candidates = np.flatnonzero(eligible)
+            if len(candidates) > limit:
+                # Keep everything above the k-th best score, then the lowest
+                # ids among the companies tied with it
+                candidate_scores = scores[candidates]
+                kth = np.partition(candidate_scores, len(candidates) - limit)[len(candidates) - limit]
+                above = candidates[candidate_scores > kth]
+                tied = candidates[candidate_scores == kth]
+                needed = limit - len(above)
+                if len(tied) > needed:
+                    tied = tied[np.argpartition(self.company_ids[tied], needed - 1)[:needed]]
+                candidates = np.concatenate([above, tied])
+            order = np.lexsort((self.company_ids[candidates], -scores[candidates]))
+            self.searches += 1
+            return self.company_ids[candidates[order]].tolist()
+
+    def stats(self):
+        return {
+            'built': self.built,
+            'companies': len(self.slots),
+            'terms': len(self.vocabulary),
+            'dead_rows': int((~self.alive).sum()),
+            'pending': len(self.pending),
+            'updates': self.updates,
+            'rebuilds': self.rebuilds,
+            'searches': self.searches
+        }
+
+
+company_index = CompanyIndex()
+
+_INDEXED_COLUMNS = ('description', 'industry', 'size')
+
+
+@event.listens_for(Company, 'after_insert')
+@event.listens_for(Company, 'after_delete')
+def _track_company(mapper, connection, target):
+    db.session.info.setdefault('company_index_changed', set()).add(target.id)
+
+
+@event.listens_for(Company, 'after_update')
+def _track_company_update(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[key].history.has_changes() for key in _INDEXED_COLUMNS):
+        db.session.info.setdefault('company_index_changed', set()).add(target.id)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _reindex_changed_companies(session):
+    changed = session.info.pop('company_index_changed', None)
+    if changed:
+        company_index.invalidate(changed)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_changed_companies(session):
+    session.info.pop('company_index_changed', None)
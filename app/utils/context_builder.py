@@ -0,0 +1,95 @@
+import math
+import re
+
+
+class ContextBuilder:
+    """Assembles model prompts within a fixed token budget.
+
+    The system prompt and the new message are always included. Recent turns
+    are added verbatim, newest first, until the budget runs out; the turns
+    that no longer fit are folded into a running summary, which is itself
+    capped at ``summary_budget`` tokens. Prompt size therefore stays bounded
+    however long a user's history grows.
+    """
+
+    SNIPPET_CHARS = 160
+
+    def __init__(self, budget=1500, summary_budget=300, chars_per_token=4):
+        self.budget = budget
+        self.summary_budget = summary_budget
+        self.chars_per_token = chars_per_token
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            budget=config.get('AI_CONTEXT_TOKEN_BUDGET', 1500),
+            summary_budget=config.get('AI_SUMMARY_TOKEN_BUDGET', 300),
+            chars_per_token=config.get('AI_CHARS_PER_TOKEN', 4)
+        )
+
+    def count_tokens(self, text):
+        """Estimate the token count of text without a round trip to the API"""
+        return math.ceil(len(text or '') / self.chars_per_token)
+
+    def build(self, system_prompt, session, message):
+        """Return the prompt for message, folding turns that do not fit into the summary"""
+        message_part = "\n\nUser: " + message
+        used = self.count_tokens(system_prompt) + self.count_tokens(message_part) + \
+            self.count_tokens(session.summary) + 10
+
+        # Walk back from the newest turn until the budget is spent
+        kept = 0
+        turns = list(session.turns)
+        for turn in reversed(turns):
+            cost = self.count_tokens(turn['content']) + 2
+            if used + cost > self.budget:
+                break
+            used += cost
+            kept += 1
+
+        overflow = len(turns) - kept
+        if overflow:
+            self.fold(session, [session.turns.popleft() for _ in range(overflow)])
+
+        parts = [system_prompt]
+        if session.summary:
+            parts.append("\n\nSummary of the earlier conversation:\n" + session.summary)
+        if session.turns:
+            parts.append("\n\nRecent conversation:")
+            for turn in session.turns:
+                speaker = 'User' if turn['role'] == 'user' else 'Advisor'
+                parts.append(f"\n{speaker}: {turn['content']}")
+        parts.append(message_part)
+        return ''.join(parts)
+
+    def fold(self, session, turns):
+        """Fold older turns into the session's running summary.
+
+        Each turn contributes its first sentence; the oldest lines are dropped
+        once the summary exceeds its budget, so folding is incremental and
+        cheap and needs no extra model call.
+        """
+        if not turns:
+            return
+
+        lines = session.summary.split('\n') if session.summary else []
+        for turn in turns:
+            speaker = 'User asked' if turn['role'] == 'user' else 'Advisor said'
+            lines.append(f"- {speaker}: {ContextBuilder._first_sentence(turn['content'])}")
+            if turn.get('timestamp') and turn['role'] == 'assistant':
+                session.summarized_through = turn['timestamp']
+
+        while len(lines) > 1 and self.count_tokens('\n'.join(lines)) > self.summary_budget:
+            lines.pop(0)
+
+        session.summary = '\n'.join(lines)
+        session.summary_dirty = True
+
+    @staticmethod
+    def _first_sentence(text):
+        text = re.sub(r'\s+', ' ', text or '').strip()
+        match = re.match(r'(.+?[.!?])(\s|$)', text)
+        sentence = match.group(1) if match else text
+        if len(sentence) > ContextBuilder.SNIPPET_CHARS:
+            sentence = sentence[:ContextBuilder.SNIPPET_CHARS].rstrip() + '...'
+        return sentence
@@ -0,0 +1,76 @@
+import sys
+from collections import deque
+from app.utils.cache import LRUCache
+
+
+class ConversationSession:
+    """Per-user conversation state kept between requests"""
+
+    def __init__(self, user_id, max_turns=10):
+        self.user_id = user_id
+        self.turns = deque(maxlen=max_turns)
+        self.message_count = 0
+        # Running summary of turns no longer kept verbatim, and the
+        # timestamp of the newest exchange folded into it
+        self.summary = ''
+        self.summarized_through = None
+        self.summary_dirty = False
+
+    def add_turn(self, role, content, timestamp=None):
+        """Append a turn, returning the oldest turn if it had to make room"""
+        evicted = None
+        if len(self.turns) == self.turns.maxlen:
+            evicted = self.turns.popleft()
+        self.turns.append({'role': role, 'content': content, 'timestamp': timestamp})
+        return evicted
+
+    def estimated_size(self):
+        """Rough memory footprint in bytes, used for the cache's memory cap"""
+        return sys.getsizeof(self) + sys.getsizeof(self.summary) + sum(
+            sys.getsizeof(turn['content']) for turn in self.turns
+        )
+
+
+class ConversationSessionCache:
+    """LRU of ConversationSession objects with idle eviction and a memory cap.
+
+    A hit lets CareerAI skip reloading ChatHistory for the user. Sessions are
+    local to the process, so a user whose requests land on another worker
+    simply starts from the database again.
+    """
+
+    def __init__(self, app=None):
+        self.max_turns = 10
+        self.sessions = LRUCache()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.max_turns = app.config.get('AI_SESSION_MAX_TURNS', 10)
+        self.sessions = LRUCache(
+            max_entries=app.config.get('AI_SESSION_MAX_ENTRIES', 5000),
+            ttl=app.config.get('AI_SESSION_IDLE_TIMEOUT', 1800),
+            sliding=True,
+            max_bytes=app.config.get('AI_SESSION_MAX_BYTES', 64 * 1024 * 1024),
+            sizeof=ConversationSession.estimated_size
+        )
+        app.extensions['ai_conversation_sessions'] = self
+
+    def get(self, user_id):
+        return self.sessions.get(user_id)
+
+    def create(self, user_id):
+        return ConversationSession(user_id, max_turns=self.max_turns)
+
+    def save(self, session):
+        """Store (or re-store after a change, so its size is re-measured) a session"""
+        self.sessions.set(session.user_id, session)
+
+    def discard(self, user_id):
+        self.sessions.delete(user_id)
+
+    def stats(self):
+        return self.sessions.stats()
+
+
+conversation_sessions = ConversationSessionCache()
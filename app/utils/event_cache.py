@@ -0,0 +1,100 @@
+from datetime import datetime
+from sqlalchemy import event, inspect
+from app.models.models import Event, User
+from app.utils.cache import LRUCache
+from app import db
+
+
+class EventBucketCache:
+    """Short-lived cache of the event lists shown on the dashboard and /events.
+
+    The lists depend only on a bucket (list kind and user level, which also
+    fixes the recommended company size) and the current time, so each
+    bucket caches the ids and start times of its events in order. A hit
+    drops events that have started since and loads the rest by primary key
+    in one query, instead of re-running the filtered, sorted and joined
+    selects behind the list. Creating, changing or deleting an event, and a
+    registration that fills or frees the last place, clears the cache once
+    the transaction commits.
+    """
+
+    def __init__(self, app=None):
+        self.buckets = LRUCache(max_entries=64, ttl=60)
+        self.enabled = True
+        self.invalidations = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('EVENT_CACHE_ENABLED', True)
+        self.buckets = LRUCache(
+            max_entries=app.config.get('EVENT_CACHE_MAX_BUCKETS', 64),
+            ttl=app.config.get('EVENT_CACHE_TTL', 60)
+        )
+        app.extensions['event_cache'] = self
+
+    @staticmethod
+    def load_ids(ids):
+        """Return the events with the given ids, in that order"""
+        if not ids:
+            return []
+        by_id = {event.id: event for event in Event.query.filter(Event.id.in_(ids))}
+        return [by_id[event_id] for event_id in ids if event_id in by_id]
+
+    def get_or_load(self, key, load):
+        """Return the events of a bucket, running load() to fill it on a miss"""
+        if not self.enabled:
+            return load()
+
+        cached = self.buckets.get(key)
+        if cached is None:
+            events = load()
+            self.buckets.set(key, [(event.id, event.date) for event in events])
+            return events
+
+        now = datetime.utcnow()
+        return EventBucketCache.load_ids([event_id for event_id, date in cached if date > now])
+
+    def invalidate(self):
+        self.buckets.clear()
+        self.invalidations += 1
+
+    def stats(self):
+        return dict(self.buckets.stats(), enabled=self.enabled, invalidations=self.invalidations)
+
+
+event_cache = EventBucketCache()
+
+
+def _mark_stale():
+    db.session.info['event_cache_stale'] = True
+
+
+@event.listens_for(Event, 'after_insert')
+@event.listens_for(Event, 'after_update')
+@event.listens_for(Event, 'after_delete')
+def _track_event_change(mapper, connection, target):
+    _mark_stale()
+
+
+# Event.participants is the backref side and fires these same listeners
+@event.listens_for(User.registered_events, 'append')
+@event.listens_for(User.registered_events, 'remove')
+def _track_registration(target, value, initiator):
+    """Registrations only matter when they fill or free the last places"""
+    if not value.max_participants:
+        return
+    if 'participants' in inspect(value).unloaded or \
+            len(value.participants) >= value.max_participants - 1:
+        _mark_stale()
+
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_stale_events(session):
+    if session.info.pop('event_cache_stale', False):
+        event_cache.invalidate()
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_stale_events(session):
+    session.info.pop('event_cache_stale', None)
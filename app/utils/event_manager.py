@@ -1,26 +1,43 @@
-from app.models.models import Event, Company, User, GroupChat
+from app.models.models import Event, Company, User, GroupChat, XpLedger, event_participants
 from app import db
 from datetime import datetime, timedelta
 from app.utils.ai_chat import CareerAI
+from app.utils.progress_tracker import ProgressTracker
+from app.utils.event_cache import event_cache
+from app.utils.company_index import company_index
+from app.utils.xp_ledger import REASON_EVENT
+from app.utils.interests import interest_mask
+import numpy as np
 import random
 
 class EventManager:
+    @staticmethod
+    def has_open_places():
+        """Filter for events that are not full"""
+        taken = db.select(db.func.count()).select_from(event_participants)\
+            .where(event_participants.c.event_id == Event.id)\
+            .scalar_subquery()
+        return (Event.max_participants == None) | (taken < Event.max_participants)
+    
     @staticmethod
     def get_recommended_events(user):
         """Get personalized event recommendations for a user"""
         # Get user's recommended company type
         company_type = user.get_recommended_company_type()
         
-        # Get upcoming events
-        upcoming_events = Event.query.join(Company)\
-            .filter(Event.date > datetime.utcnow(),
-                   Event.level_required <= user.level,
-                   Company.size == company_type if company_type else True)\
-            .order_by(Event.date.asc())\
-            .limit(5)\
-            .all()
-        
-        return upcoming_events
+        # Upcoming events only depend on the level (which also picks the
+        # company type), so they are cached per level
+        def load():
+            return Event.query.join(Company)\
+                .filter(Event.date > datetime.utcnow(),
+                       Event.level_required <= user.level,
+                       EventManager.has_open_places(),
+                       Company.size == company_type if company_type else True)\
+                .order_by(Event.date.asc())\
+                .limit(5)\
+                .all()
+        
+        return event_cache.get_or_load(('recommended', user.level), load)
     
     @staticmethod
     def get_available_webinars(user):
@@ -28,14 +45,16 @@ class EventManager:
         if not user.can_attend_webinars():
             return []
         
-        webinars = Event.query\
-            .filter(Event.event_type == 'webinar',
-                   Event.date > datetime.utcnow(),
-                   Event.level_required <= user.level)\
-            .order_by(Event.date.asc())\
-            .all()
+        def load():
+            return Event.query\
+                .filter(Event.event_type == 'webinar',
+                       Event.date > datetime.utcnow(),
+                       Event.level_required <= user.level,
+                       EventManager.has_open_places())\
+                .order_by(Event.date.asc())\
+                .all()
         
-        return webinars
+        return event_cache.get_or_load(('webinars', user.level), load)
     
     @staticmethod
     def register_for_event(user, event_id):
@@ -82,63 +101,95 @@ class EventManager:
             user.webinars_attended += 1
         
         # Add experience points
-        user.add_experience(event.points)
+        user.add_experience(event.points, reason=REASON_EVENT, source_id=event.id)
         
         db.session.commit()
         return True, "Successfully registered for event"
     
+    @staticmethod
+    def award_participants(event_id, points=None):
+        """Grant XP to every participant of a finished event
+        
+        Defaults to the event's points. Returns (user_id, new level) for the
+        participants who levelled up. Participants who already have a ledger
+        entry for the event are skipped, so calling it again only reaches
+        those who have not been granted yet.
+        """
+        event = db.session.get(Event, event_id)
+        if event is None:
+            return []
+        
+        if event.date + timedelta(minutes=event.duration or 0) > datetime.utcnow():
+            return []
+        
+        user_ids = db.session.scalars(
+            db.select(event_participants.c.user_id).where(
+                event_participants.c.event_id == event_id,
+                ~db.exists().where(
+                    XpLedger.user_id == event_participants.c.user_id,
+                    XpLedger.reason == REASON_EVENT,
+                    XpLedger.source_id == event.id
+                )
+            )
+        ).all()
+        levelled_up = ProgressTracker.grant_experience(
+            user_ids, event.points if points is None else points, reason=REASON_EVENT, source_id=event.id
+        )
+        db.session.commit()
+        return levelled_up
+    
     @staticmethod
     def get_matching_buddies(user, event_id, limit=3):
         """Find matching buddies for an event"""
-        event = Event.query.get(event_id)
+        event = db.session.get(Event, event_id)
         if not event:
             return []
         
-        # Get other participants
-        other_participants = User.query\
-            .join(event_participants)\
-            .filter(event_participants.c.event_id == event_id,
-                   User.id != user.id)\
-            .all()
-        
-        # Score participants based on common interests
-        user_interests = set(user.interests.lower().split(',')) if user.interests else set()
-        scored_participants = []
-        
-        for participant in other_participants:
-            participant_interests = set(participant.interests.lower().split(',')) if participant.interests else set()
-            common_interests = len(user_interests & participant_interests)
-            scored_participants.append((participant, common_interests))
+        # Only the other participants' ids and interest masks are loaded, as
+        # plain rows (the session's connection skips ORM result processing)
+        rows = db.session.connection().execute(
+            db.select(User.id, User.interest_mask)
+            .join(event_participants, event_participants.c.user_id == User.id)
+            .where(event_participants.c.event_id == event_id, User.id != user.id)
+        ).all()
+        if not rows:
+            return []
         
-        # Sort by number of common interests
-        scored_participants.sort(key=lambda x: x[1], reverse=True)
+        # Score participants by the number of interests they share
+        ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        masks = np.fromiter((row[1] or 0 for row in rows), dtype=np.uint64, count=len(rows))
+        common = np.bitwise_count(masks & np.uint64(interest_mask(user.interests)))
+        best = EventManager.top_k(common, ids, limit)
         
-        return [p[0] for p in scored_participants[:limit]]
+        participants = {u.id: u for u in User.query.filter(User.id.in_(ids[best].tolist()))}
+        return [participants[user_id] for user_id in ids[best].tolist() if user_id in participants]
+    
+    @staticmethod
+    def top_k(scores, ids, k):
+        """Positions of the k highest scores, ties going to the lowest ids"""
+        if len(scores) > k:
+            # Keep everything above the k-th best score, then the lowest ids
+            # among those tied with it
+            kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+            above = np.flatnonzero(scores > kth)
+            tied = np.flatnonzero(scores == kth)
+            if len(tied) > k - len(above):
+                tied = tied[np.argpartition(ids[tied], k - len(above) - 1)[:k - len(above)]]
+            positions = np.concatenate([above, tied])
+        else:
+            positions = np.arange(len(scores))
+        return positions[np.lexsort((ids[positions], -scores[positions].astype(np.int64)))]
     
     @staticmethod
     def get_company_recommendations(user):
         """Get personalized company recommendations"""
         company_type = user.get_recommended_company_type()
         
-        # Get companies matching user's level and interests
-        companies = Company.query\
-            .filter(Company.size == company_type if company_type else True)\
-            .limit(10)\
-            .all()
-        
-        # Score companies based on user interests
-        user_interests = set(user.interests.lower().split(',')) if user.interests else set()
-        scored_companies = []
-        
-        for company in companies:
-            # Create a set of keywords from company description and industry
-            company_keywords = set((company.description + ' ' + company.industry).lower().split())
-            interest_match = len(user_interests & company_keywords)
-            scored_companies.append((company, interest_match))
-        
-        # Sort by match score and return top companies
-        scored_companies.sort(key=lambda x: x[1], reverse=True)
-        return [c[0] for c in scored_companies[:5]]
+        # Rank every company of the user's size by how well its description
+        # and industry match the user's interests
+        company_ids = company_index.search(user.interests, company_type, limit=5)
+        companies = {c.id: c for c in Company.query.filter(Company.id.in_(company_ids))}
+        return [companies[company_id] for company_id in company_ids if company_id in companies]
     
     @staticmethod
     def create_event_summary(event):
@@ -0,0 +1,203 @@
+from apscheduler.schedulers.background import BackgroundScheduler
+from datetime import datetime, timedelta
+from sqlalchemy import event, inspect
+from app.models.models import Company, CompanyInsight
+from app import db
+
+LEVEL_BANDS = ('beginner', 'intermediate', 'advanced')
+
+
+class InsightRefresher:
+    """Keeps the company_insight table filled so pages never wait on the LLM.
+
+    Rows are keyed by (company, interest bucket, level band). New and edited
+    companies are queued for generation after their transaction commits, a
+    page view for a missing row queues that row, and a periodic job
+    regenerates rows that are stale or older than INSIGHT_MAX_AGE.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.scheduler = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['insight_refresher'] = self
+
+        if not app.config.get('INSIGHT_REFRESHER_ENABLED', True) or app.config.get('TESTING'):
+            return
+
+        self.scheduler = BackgroundScheduler(daemon=True)
+        self.scheduler.add_job(
+            self.refresh_stale,
+            'interval',
+            minutes=app.config.get('INSIGHT_REFRESH_INTERVAL', 30),
+            id='refresh_stale_insights',
+            max_instances=1,
+            coalesce=True
+        )
+        self.scheduler.start()
+
+    @staticmethod
+    def interest_bucket(user):
+        """Bucket a user by their primary (first listed) interest"""
+        interests = [i.strip() for i in (user.interests or '').split(',') if i.strip()]
+        return interests[0].lower() if interests else 'general'
+
+    @staticmethod
+    def level_band(level):
+        """Map a user level onto the bands used in the advisor prompt"""
+        level = level or 1
+        if level <= 2:
+            return 'beginner'
+        elif level <= 4:
+            return 'intermediate'
+        return 'advanced'
+
+    def get_insight(self, company, user):
+        """Return pre-generated insights for a user, queueing a refresh on a miss"""
+        bucket = InsightRefresher.interest_bucket(user)
+        band = InsightRefresher.level_band(user.level)
+
+        insight = CompanyInsight.query.filter_by(
+            company_id=company.id,
+            interest_bucket=bucket,
+            level_band=band
+        ).first()
+
+        if insight is None:
+            self.enqueue(company.id, bucket, band)
+            return None
+
+        if insight.is_stale:
+            self.enqueue(company.id, bucket, band)
+        return insight.content
+
+    def enqueue(self, company_id, interest_bucket='general', level_band=None):
+        """Queue generation of one row, or of every band when level_band is None"""
+        if self.scheduler is None:
+            return
+
+        bands = [level_band] if level_band else LEVEL_BANDS
+        for band in bands:
+            # One pending job per row, however many page views asked for it
+            self.scheduler.add_job(
+                self._refresh_row,
+                args=[company_id, interest_bucket, band],
+                id=f'insight:{company_id}:{interest_bucket}:{band}',
+                replace_existing=True,
+                misfire_grace_time=None
+            )
+
+    def company_changed(self, company_id):
+        """Queue regeneration of every row for a new or edited company"""
+        if self.scheduler is None:
+            return
+
+        self.scheduler.add_job(
+            self._regenerate_company,
+            args=[company_id],
+            id=f'insight:{company_id}',
+            replace_existing=True,
+            misfire_grace_time=None
+        )
+
+    def _regenerate_company(self, company_id):
+        with self.app.app_context():
+            CompanyInsight.query.filter_by(company_id=company_id)\
+                .update({'is_stale': True}, synchronize_session=False)
+            db.session.commit()
+
+            keys = db.session.query(
+                CompanyInsight.interest_bucket,
+                CompanyInsight.level_band
+            ).filter_by(company_id=company_id).all()
+
+        keys = set(keys) | {('general', band) for band in LEVEL_BANDS}
+        for bucket, band in keys:
+            self._refresh_row(company_id, bucket, band)
+
+    def refresh_stale(self):
+        """Regenerate a batch of stale or expired rows"""
+        with self.app.app_context():
+            cutoff = datetime.utcnow() - timedelta(hours=self.app.config.get('INSIGHT_MAX_AGE', 24))
+            rows = db.session.query(
+                CompanyInsight.company_id,
+                CompanyInsight.interest_bucket,
+                CompanyInsight.level_band
+            ).filter(
+                (CompanyInsight.is_stale == True) | (CompanyInsight.generated_at < cutoff)
+            ).order_by(CompanyInsight.generated_at.asc())\
+             .limit(self.app.config.get('INSIGHT_REFRESH_BATCH', 20))\
+             .all()
+
+        for company_id, bucket, band in rows:
+            self._refresh_row(company_id, bucket, band)
+
+    def _refresh_row(self, company_id, interest_bucket, level_band):
+        """Generate and upsert a single insight row"""
+        from app.utils.ai_chat import CareerAI
+
+        with self.app.app_context():
+            company = db.session.get(Company, company_id)
+            if company is None:
+                return
+
+            try:
+                content = CareerAI.generate_company_insight(company, interest_bucket, level_band)
+            except Exception as e:
+                print(f"Error generating insights for company {company_id}: {str(e)}")
+                return
+
+            insight = CompanyInsight.query.filter_by(
+                company_id=company_id,
+                interest_bucket=interest_bucket,
+                level_band=level_band
+            ).first()
+            if insight is None:
+                insight = CompanyInsight(
+                    company_id=company_id,
+                    interest_bucket=interest_bucket,
+                    level_band=level_band
+                )
+                db.session.add(insight)
+
+            insight.content = content
+            insight.is_stale = False
+            insight.generated_at = datetime.utcnow()
+
+            try:
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error saving insights for company {company_id}: {str(e)}")
+
+
+insight_refresher = InsightRefresher()
+
+
+@event.listens_for(Company, 'after_insert')
+def _track_company_insert(mapper, connection, target):
+    """Remember new companies until their transaction commits"""
+    db.session.info.setdefault('changed_companies', set()).add(target.id)
+
+
+@event.listens_for(Company, 'after_update')
+def _track_company_update(mapper, connection, target):
+    """Remember companies whose prompt fields changed"""
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in ('name', 'industry', 'description')):
+        db.session.info.setdefault('changed_companies', set()).add(target.id)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _refresh_changed_companies(session):
+    for company_id in session.info.pop('changed_companies', ()):
+        insight_refresher.company_changed(company_id)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_changed_companies(session):
+    session.info.pop('changed_companies', None)
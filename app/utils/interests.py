@@ -0,0 +1,29 @@
+from sqlalchemy import event
+from app.forms.auth import RegistrationForm, ProfileForm
+from app.models.models import User
+
+# Bit i of User.interest_mask is INTEREST_KEYS[i]. Masks are stored, so new
+# choices must only ever be appended to the forms' lists
+INTEREST_KEYS = tuple(dict.fromkeys(
+    key for key, _ in RegistrationForm.INTEREST_CHOICES + ProfileForm.INTEREST_CHOICES
+))
+
+# The mask is a signed 64-bit column read into uint64 arrays, so the sign
+# bit stays clear
+MAX_INTERESTS = 63
+if len(INTEREST_KEYS) > MAX_INTERESTS:
+    raise RuntimeError(f'User.interest_mask holds {MAX_INTERESTS} interests, got {len(INTEREST_KEYS)}')
+INTEREST_BITS = {key: 1 << bit for bit, key in enumerate(INTEREST_KEYS)}
+
+
+def interest_mask(interests):
+    """Bitmask of a comma-separated interests string (unknown values are ignored)"""
+    mask = 0
+    for interest in (interests or '').split(','):
+        mask |= INTEREST_BITS.get(interest.strip().lower(), 0)
+    return mask
+
+
+@event.listens_for(User.interests, 'set')
+def _update_interest_mask(target, value, oldvalue, initiator):
+    target.interest_mask = interest_mask(value)
@@ -0,0 +1,340 @@
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from sqlalchemy import event, select
+from app.models.models import User
+from app.utils.xp_ledger import ExperienceLedger
+from app import db
+
+_ID_BITS = 32
+_ID_MASK = (1 << _ID_BITS) - 1
+
+
+class RankedBoard:
+    """Users ordered by experience (highest first, ties by user id).
+
+    Each member is packed into one signed 64-bit key, ``-experience << 32 |
+    user_id``, so ascending key order is leaderboard order. The keys are
+    kept in sorted ``array('q')`` buckets of at most ``2 * load`` keys, with
+    each bucket's last key in ``maxes`` and the bucket sizes in a Fenwick
+    tree. Finding a key's bucket is a bisect and the number of keys before
+    it a prefix sum, so ranks, pages and XP changes are O(log n) plus a
+    memmove inside one small bucket.
+    """
+
+    def __init__(self, load=1000):
+        self.load = load
+        self.buckets = []
+        self.maxes = []
+        self.members = {}
+        self._tree = []
+
+    @staticmethod
+    def key(user_id, experience):
+        return (-(experience or 0) << _ID_BITS) | user_id
+
+    @staticmethod
+    def unpack(key):
+        """Return (user_id, experience) for a key"""
+        return key & _ID_MASK, -(key >> _ID_BITS)
+
+    def load_entries(self, entries):
+        """Replace the board with (user_id, experience) pairs"""
+        self.members = {user_id: RankedBoard.key(user_id, experience) for user_id, experience in entries}
+        keys = sorted(self.members.values())
+        self.buckets = [array('q', keys[i:i + self.load]) for i in range(0, len(keys), self.load)]
+        self._reindex()
+
+    def _reindex(self):
+        """Rebuild maxes and the Fenwick tree after buckets were split or dropped"""
+        self.maxes = [bucket[-1] for bucket in self.buckets]
+        tree = [len(bucket) for bucket in self.buckets]
+        for i in range(len(tree)):
+            parent = i | (i + 1)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _add(self, index, delta):
+        while index < len(self._tree):
+            self._tree[index] += delta
+            index |= index + 1
+
+    def _before(self, index):
+        """Number of keys in the buckets before bucket ``index``"""
+        total = 0
+        while index > 0:
+            total += self._tree[index - 1]
+            index &= index - 1
+        return total
+
+    def _locate(self, position):
+        """Return (bucket index, offset in bucket) of the key at a 0-based position"""
+        index = 0
+        step = 1 << len(self._tree).bit_length()
+        while step:
+            candidate = index + step
+            if candidate <= len(self._tree) and self._tree[candidate - 1] <= position:
+                index = candidate
+                position -= self._tree[candidate - 1]
+            step >>= 1
+        return index, position
+
+    def _insert(self, key):
+        if not self.buckets:
+            self.buckets.append(array('q', [key]))
+            self._reindex()
+            return
+        index = min(bisect_left(self.maxes, key), len(self.buckets) - 1)
+        bucket = self.buckets[index]
+        bucket.insert(bisect_left(bucket, key), key)
+        if len(bucket) > 2 * self.load:
+            self.buckets[index:index + 1] = [bucket[:self.load], bucket[self.load:]]
+            self._reindex()
+        else:
+            self.maxes[index] = bucket[-1]
+            self._add(index, 1)
+
+    def _remove(self, key):
+        index = bisect_left(self.maxes, key)
+        bucket = self.buckets[index]
+        del bucket[bisect_left(bucket, key)]
+        if not bucket:
+            del self.buckets[index]
+            self._reindex()
+        else:
+            self.maxes[index] = bucket[-1]
+            self._add(index, -1)
+
+    def set(self, user_id, experience):
+        new_key = RankedBoard.key(user_id, experience)
+        old_key = self.members.get(user_id)
+        if old_key == new_key:
+            return
+        if old_key is not None:
+            self._remove(old_key)
+        self._insert(new_key)
+        self.members[user_id] = new_key
+
+    def discard(self, user_id):
+        old_key = self.members.pop(user_id, None)
+        if old_key is not None:
+            self._remove(old_key)
+
+    def rank(self, user_id):
+        """1-based position of a user, or None if not on the board"""
+        key = self.members.get(user_id)
+        if key is None:
+            return None
+        index = bisect_left(self.maxes, key)
+        return self._before(index) + bisect_left(self.buckets[index], key) + 1
+
+    def page(self, offset, limit):
+        """Return (rank, user_id, experience) rows starting at offset"""
+        rows = []
+        if offset >= len(self.members):
+            return rows
+        index, start = self._locate(offset)
+        while len(rows) < limit and index < len(self.buckets):
+            for key in self.buckets[index][start:start + limit - len(rows)]:
+                rows.append((offset + len(rows) + 1,) + RankedBoard.unpack(key))
+            index += 1
+            start = 0
+        return rows
+
+    def __len__(self):
+        return len(self.members)
+
+
+class Leaderboard:
+    """Global and per-interest XP leaderboards kept in memory.
+
+    The boards are built from the user table on first use and then follow
+    XP and interest changes: ORM changes (``User.add_experience``, profile
+    edits, new users) are picked up at flush, bulk SQL updates stage their
+    new totals with ``stage()``, and both are applied once the transaction
+    commits. Like the other in-process caches each worker keeps its own
+    copy, so a worker only sees its own writes until it is rebuilt; a read
+    rebuilds the boards once they are older than ``rebuild_interval``
+    seconds, which bounds how far behind another worker's writes they get.
+    Reads and updates hold the same lock.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.max_per_page = 100
+        self.rebuild_interval = 900
+        self.built = False
+        self.built_at = None
+        self.global_board = RankedBoard()
+        self.interest_boards = {}
+        self.interests = {}
+        self._lock = threading.Lock()
+        self.updates = 0
+        self.rebuilds = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('LEADERBOARD_ENABLED', True)
+        self.max_per_page = app.config.get('LEADERBOARD_MAX_PER_PAGE', 100)
+        self.rebuild_interval = app.config.get('LEADERBOARD_REBUILD_INTERVAL', 900)
+        app.extensions['leaderboard'] = self
+
+    @staticmethod
+    def split_interests(interests):
+        seen = []
+        for interest in (interests or '').split(','):
+            interest = interest.strip().lower()
+            if interest and interest not in seen:
+                seen.append(interest)
+        return tuple(seen)
+
+    def rebuild(self):
+        """Reload every board from the user table"""
+        with self._lock:
+            self._rebuild()
+
+    def _rebuild(self):
+        entries = []
+        interests = {}
+        by_interest = {}
+        rows = db.session.execute(
+            select(User.id, ExperienceLedger.balance_expression(), User.interests).execution_options(yield_per=10000)
+        )
+        for user_id, experience, user_interests in rows:
+            entries.append((user_id, experience))
+            names = Leaderboard.split_interests(user_interests)
+            if names:
+                interests[user_id] = names
+            for name in names:
+                by_interest.setdefault(name, []).append((user_id, experience))
+
+        self.global_board.load_entries(entries)
+        self.interest_boards = {}
+        for name, members in by_interest.items():
+            board = RankedBoard()
+            board.load_entries(members)
+            self.interest_boards[name] = board
+        self.interests = interests
+        self.built = True
+        self.built_at = time.monotonic()
+        self.rebuilds += 1
+
+    def _board(self, interest=None):
+        """Return the requested board, (re)building the boards when missing or stale (lock held)"""
+        if not self.built or \
+                (self.rebuild_interval and time.monotonic() - self.built_at >= self.rebuild_interval):
+            self._rebuild()
+        if interest is None:
+            return self.global_board
+        return self.interest_boards.get(interest.strip().lower(), RankedBoard())
+
+    def mark(self, user):
+        """Stage a loaded user's experience and interests at the next flush"""
+        db.session.info.setdefault('leaderboard_users', set()).add(user)
+
+    def stage(self, user_id, experience, interests=None, session=None):
+        """Queue a user's new totals until the current transaction commits.
+
+        ``interests`` of None leaves the user's interest boards unchanged.
+        """
+        session = session or db.session
+        staged = session.info.setdefault('leaderboard_updates', {})
+        previous = staged.get(user_id)
+        if interests is None and previous is not None:
+            interests = previous[1]
+        staged[user_id] = (experience, interests)
+
+    def apply(self, updates):
+        """Apply committed {user_id: (experience, interests)} updates"""
+        with self._lock:
+            if not self.built:
+                return
+            for user_id, (experience, interests) in updates.items():
+                if interests is not None:
+                    names = Leaderboard.split_interests(interests)
+                    for name in set(self.interests.get(user_id, ())) - set(names):
+                        self.interest_boards[name].discard(user_id)
+                    if names:
+                        self.interests[user_id] = names
+                    else:
+                        self.interests.pop(user_id, None)
+                self.global_board.set(user_id, experience)
+                for name in self.interests.get(user_id, ()):
+                    self.interest_boards.setdefault(name, RankedBoard()).set(user_id, experience)
+                self.updates += 1
+
+    def top(self, page=1, per_page=25, interest=None):
+        """One page of a board as a JSON-ready dict"""
+        per_page = max(1, min(per_page, self.max_per_page))
+        page = max(1, page)
+        with self._lock:
+            board = self._board(interest)
+            total = len(board)
+            rows = board.page((page - 1) * per_page, per_page)
+        return {
+            'interest': interest,
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+            'entries': [
+                {'rank': rank, 'user_id': user_id, 'experience': experience}
+                for rank, user_id, experience in rows
+            ]
+        }
+
+    def rank(self, user_id, interest=None):
+        """A user's rank on a board, or None if they are not on it"""
+        with self._lock:
+            return self._board(interest).rank(user_id)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'built': self.built,
+                'users': len(self.global_board),
+                'interests': len(self.interest_boards),
+                'updates': self.updates,
+                'rebuilds': self.rebuilds
+            }
+
+
+leaderboard = Leaderboard()
+
+
+@event.listens_for(User.experience, 'set')
+def _track_experience_change(target, value, oldvalue, initiator):
+    leaderboard.mark(target)
+
+
+@event.listens_for(User.interests, 'set')
+def _track_interests_change(target, value, oldvalue, initiator):
+    leaderboard.mark(target)
+
+
+@event.listens_for(User, 'after_insert')
+def _track_new_user(mapper, connection, target):
+    leaderboard.mark(target)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _stage_marked_users(session, flush_context):
+    for user in session.info.pop('leaderboard_users', ()):
+        if user.id is not None:
+            leaderboard.stage(user.id, user.experience, user.interests or '', session=session)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _apply_staged_updates(session):
+    updates = session.info.pop('leaderboard_updates', None)
+    if updates and leaderboard.enabled:
+        leaderboard.apply(updates)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_staged_updates(session):
+    session.info.pop('leaderboard_users', None)
+    session.info.pop('leaderboard_updates', None)
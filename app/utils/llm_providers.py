@@ -0,0 +1,137 @@
+import hashlib
+import random
+import threading
+import time
+import google.generativeai as genai
+
+
+class LLMError(Exception):
+    """Raised by a provider when a generation fails"""
+
+
+class LLMProvider:
+    """Interface for the text generation backends CareerAI can use"""
+
+    name = 'base'
+
+    def generate(self, prompt, generation_config=None):
+        """Return the complete reply text for prompt"""
+        raise NotImplementedError
+
+    def stream(self, prompt, generation_config=None):
+        """Yield the reply text in chunks as it is produced"""
+        raise NotImplementedError
+
+
+class GeminiProvider(LLMProvider):
+    """Google Gemini through google.generativeai"""
+
+    name = 'gemini'
+
+    def __init__(self, model_name='gemini-pro'):
+        # The model object holds no per-conversation state, so one instance
+        # serves the whole process
+        self.model = genai.GenerativeModel(model_name)
+
+    def generate(self, prompt, generation_config=None):
+        response = self.model.generate_content(prompt, generation_config=generation_config)
+        return response.text.strip()
+
+    def stream(self, prompt, generation_config=None):
+        response = self.model.generate_content(
+            prompt,
+            generation_config=generation_config,
+            stream=True
+        )
+        for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+
+class FakeProvider(LLMProvider):
+    """Deterministic local stand-in for load testing and CI.
+
+    The reply text depends only on the prompt, so runs are repeatable.
+    Latency is drawn from a seeded 'fixed', 'uniform' or 'lognormal'
+    distribution around ``latency_ms``, a fraction ``error_rate`` of calls
+    fail with LLMError, and streamed replies arrive in ``chunk_size``
+    character chunks spread over the sampled latency.
+    """
+
+    name = 'fake'
+
+    SENTENCES = [
+        "Exploring {topic} is a great way to discover what energizes you at work.",
+        "Many professionals in {topic} started by building small projects and sharing them.",
+        "Try talking to someone already working in {topic} to learn what a typical day looks like.",
+        "Employers in {topic} value curiosity, clear communication and steady practice.",
+        "A short online course can help you test whether {topic} suits you.",
+        "Here's a challenge: list three skills you already have that transfer to {topic}."
+    ]
+
+    def __init__(self, latency='lognormal', latency_ms=800, sigma=0.5,
+                 error_rate=0.0, chunk_size=40, seed=42):
+        self.latency = latency
+        self.latency_ms = latency_ms
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.chunk_size = chunk_size
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _sample(self):
+        """Return (latency in seconds, should fail) for one call"""
+        with self._lock:
+            if self.latency == 'fixed':
+                ms = self.latency_ms
+            elif self.latency == 'uniform':
+                ms = self._random.uniform(0, 2 * self.latency_ms)
+            else:
+                ms = self._random.lognormvariate(0, self.sigma) * self.latency_ms
+            fail = self._random.random() < self.error_rate
+        return ms / 1000.0, fail
+
+    def reply_for(self, prompt):
+        """The deterministic reply text for a prompt"""
+        digest = hashlib.sha256(prompt.encode('utf-8')).digest()
+        words = prompt.rsplit('User:', 1)[-1].split()
+        topic = ' '.join(words[-3:]).strip('?.!') if words else 'your career'
+        count = 2 + digest[0] % 3
+        return ' '.join(
+            FakeProvider.SENTENCES[(digest[i + 1]) % len(FakeProvider.SENTENCES)].format(topic=topic)
+            for i in range(count)
+        )
+
+    def generate(self, prompt, generation_config=None):
+        delay, fail = self._sample()
+        time.sleep(delay)
+        if fail:
+            raise LLMError('Fake provider error')
+        return self.reply_for(prompt)
+
+    def stream(self, prompt, generation_config=None):
+        delay, fail = self._sample()
+        text = self.reply_for(prompt)
+        chunks = [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+        for index, chunk in enumerate(chunks):
+            time.sleep(delay / len(chunks))
+            if fail and index == len(chunks) // 2:
+                raise LLMError('Fake provider error')
+            yield chunk
+
+
+def create_provider(config):
+    """Build the provider selected by LLM_PROVIDER"""
+    name = config.get('LLM_PROVIDER', 'gemini')
+    if name == 'fake':
+        return FakeProvider(
+            latency=config.get('FAKE_LLM_LATENCY', 'lognormal'),
+            latency_ms=config.get('FAKE_LLM_LATENCY_MS', 800),
+            sigma=config.get('FAKE_LLM_LATENCY_SIGMA', 0.5),
+            error_rate=config.get('FAKE_LLM_ERROR_RATE', 0.0),
+            chunk_size=config.get('FAKE_LLM_CHUNK_SIZE', 40),
+            seed=config.get('FAKE_LLM_SEED', 42)
+        )
+    if name == 'gemini':
+        return GeminiProvider(config.get('GEMINI_MODEL', 'gemini-pro'))
+    raise ValueError(f'Unknown LLM_PROVIDER: {name}')
@@ -0,0 +1,53 @@
+import math
+import threading
+from collections import deque
+
+
+class LatencyRecorder:
+    """Thread-safe recorder for latency samples (in seconds).
+
+    Keeps a running count and total plus a bounded window of recent samples
+    from which percentiles are computed.
+    """
+
+    def __init__(self, window=1000):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+    def percentile(self, pct):
+        """Return the pct-th percentile of the recent window, or None if empty"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = max(0, math.ceil(pct / 100 * len(samples)) - 1)
+        return samples[index]
+
+    def stats(self):
+        """Return a summary in milliseconds for monitoring"""
+        def ms(value):
+            return round(value * 1000, 1) if value is not None else None
+
+        return {
+            'count': self.count,
+            'mean_ms': ms(self.total / self.count) if self.count else None,
+            'p50_ms': ms(self.percentile(50)),
+            'p95_ms': ms(self.percentile(95)),
+            'p99_ms': ms(self.percentile(99)),
+            'max_ms': ms(self.max) if self.count else None
+        }
+
+
+# Latency of streamed AI replies: time to first chunk and to the full reply
+ai_stream_ttft = LatencyRecorder()
+ai_stream_total = LatencyRecorder()
@@ -1,7 +1,9 @@
 from app.models.models import User, Badge, Event
+from app.utils.user_progress import ProgressStore
 from app import db
+from bisect import bisect_right
 from datetime import datetime, timedelta
-import math
+from sqlalchemy import case, func
 
 class ProgressTracker:
     # Experience points required for each level
@@ -18,42 +20,149 @@ class ProgressTracker:
         10: 4500   # Career master
     }
     
-    # Achievement criteria
+    # Thresholds in ascending order, for bisecting
+    _LEVEL_STEPS = sorted(LEVEL_THRESHOLDS.items(), key=lambda step: step[1])
+    _LEVEL_FLOORS = [threshold for _, threshold in _LEVEL_STEPS]
+    
+    # Achievement criteria. Each achievement names the domain events that can
+    # newly satisfy it ('triggers', see app.utils.achievements) and what it
+    # requires: a minimum value of a user_progress column.
     ACHIEVEMENTS = {
         'first_chat': {
             'title': 'First Steps',
             'description': 'Had your first career conversation',
-            'points': 50
+            'points': 50,
+            'triggers': ('chat_recorded',),
+            'requires': ('chat_count', 1)
         },
         'chat_streak': {
             'title': 'Consistent Explorer',
             'description': 'Maintained a 5-day chat streak',
-            'points': 100
+            'points': 100,
+            'triggers': ('chat_recorded',),
+            'requires': ('current_streak', 5)
         },
         'company_visit': {
             'title': 'Company Explorer',
             'description': 'Attended first company visit',
-            'points': 150
+            'points': 150,
+            'triggers': ('event_registered',),
+            'requires': ('company_visits', 1)
         },
         'webinar_attendee': {
             'title': 'Knowledge Seeker',
             'description': 'Attended first exclusive webinar',
-            'points': 120
+            'points': 120,
+            'triggers': ('event_registered',),
+            'requires': ('webinars_attended', 1)
         },
         'networking_pro': {
             'title': 'Networking Pro',
             'description': 'Connected with 5 other users',
-            'points': 200
+            'points': 200,
+            'triggers': ('connection_made',),
+            'requires': ('connection_count', 5)
         }
     }
     
     @staticmethod
     def calculate_level(experience):
         """Calculate user level based on experience points"""
-        for level, threshold in sorted(ProgressTracker.LEVEL_THRESHOLDS.items(), reverse=True):
-            if experience >= threshold:
-                return level
-        return 1
+        index = bisect_right(ProgressTracker._LEVEL_FLOORS, experience or 0) - 1
+        return ProgressTracker._LEVEL_STEPS[index][0] if index >= 0 else 1
+    
+    @staticmethod
+    def level_expression(experience):
+        """SQL expression computing the level for an experience column or expression"""
+        return case(
+            *[(experience >= threshold, level)
+              for level, threshold in reversed(ProgressTracker._LEVEL_STEPS)],
+            else_=1
+        )
+    
+    @staticmethod
+    def grant_experience(user_ids, points, reason='grant', source_id=None):
+        """Grant the same XP to many users as one batch of ledger entries
+        
+        Returns (user_id, new level) for the users who levelled up, for
+        notifying them in one batch. The caller commits.
+        """
+        from app.utils.xp_ledger import ExperienceLedger
+        
+        balances = ExperienceLedger.record(
+            {'user_id': user_id, 'delta': points, 'reason': reason, 'source_id': source_id}
+            for user_id in set(user_ids)
+        )
+        levelled_up = []
+        for user_id, balance in balances.items():
+            level = ProgressTracker.calculate_level(balance)
+            if level > ProgressTracker.calculate_level(balance - points):
+                levelled_up.append((user_id, level))
+        return levelled_up
+    
+    @staticmethod
+    def streak_runs(dates):
+        """Split dates into runs of consecutive days, returned as (first, last) pairs"""
+        runs = []
+        for day in sorted(set(dates)):
+            if runs and (day - runs[-1][1]).days == 1:
+                runs[-1] = (runs[-1][0], day)
+            else:
+                runs.append((day, day))
+        return runs
+    
+    @staticmethod
+    def streak_values(chat_dates):
+        """SQL values for the User streak columns after chats on the given dates.
+        
+        Only the stored streak, longest streak and last chat date are
+        consulted, so recording a chat costs the same however long the
+        history is.
+        """
+        runs = ProgressTracker.streak_runs(chat_dates)
+        current = func.coalesce(User.current_streak, 0)
+        
+        def extended(run_end):
+            # A stored streak ending the day before or inside the run
+            # continues through to the run's last day
+            run_start = next(start for start, end in runs if end == run_end)
+            days = (run_end - run_start).days + 1
+            return case(
+                *[(User.last_chat_date == run_end - timedelta(days=offset), current + offset)
+                  for offset in range(days + 1)],
+                else_=days
+            )
+        
+        last_day = runs[-1][1]
+        new_current = case(
+            (User.last_chat_date > last_day, current),
+            else_=extended(last_day)
+        )
+        longest = max((end - start).days + 1 for start, end in runs)
+        return {
+            'current_streak': new_current,
+            'longest_streak': ProgressTracker._greatest(
+                func.coalesce(User.longest_streak, 0), new_current, extended(runs[0][1]), longest
+            ),
+            'last_chat_date': case((User.last_chat_date > last_day, User.last_chat_date), else_=last_day)
+        }
+    
+    @staticmethod
+    def _greatest(*values):
+        """Portable SQL GREATEST() built from CASE expressions"""
+        result = values[0]
+        for value in values[1:]:
+            result = case((result >= value, result), else_=value)
+        return result
+    
+    @staticmethod
+    def streaks_from_dates(dates):
+        """Return (current streak, longest streak, last chat date) for a full history"""
+        runs = ProgressTracker.streak_runs(dates)
+        if not runs:
+            return 0, 0, None
+        lengths = [(end - start).days + 1 for start, end in runs]
+        return lengths[-1], max(lengths), runs[-1][1]
     
     @staticmethod
     def experience_for_next_level(current_experience):
@@ -66,90 +175,36 @@ class ProgressTracker:
         return next_threshold - current_experience
     
     @staticmethod
-    def check_achievements(user):
-        """Check and award new achievements for a user"""
-        new_badges = []
-        
-        # Check first chat achievement
-        if user.chat_history and not user.has_badge('first_chat'):
-            badge = Badge.query.filter_by(name='first_chat').first()
-            if badge:
-                user.badges.append(badge)
-                new_badges.append(badge)
-                user.add_experience(ProgressTracker.ACHIEVEMENTS['first_chat']['points'])
-        
-        # Check chat streak
-        streak = ProgressTracker.calculate_chat_streak(user)
-        if streak >= 5 and not user.has_badge('chat_streak'):
-            badge = Badge.query.filter_by(name='chat_streak').first()
-            if badge:
-                user.badges.append(badge)
-                new_badges.append(badge)
-                user.add_experience(ProgressTracker.ACHIEVEMENTS['chat_streak']['points'])
-        
-        # Check company visit achievement
-        if user.company_visits > 0 and not user.has_badge('company_visit'):
-            badge = Badge.query.filter_by(name='company_visit').first()
-            if badge:
-                user.badges.append(badge)
-                new_badges.append(badge)
-                user.add_experience(ProgressTracker.ACHIEVEMENTS['company_visit']['points'])
+    def check_achievements(user, trigger=None):
+        """Award the achievements a user has newly earned and return their badges
         
-        # Check webinar achievement
-        if user.webinars_attended > 0 and not user.has_badge('webinar_attendee'):
-            badge = Badge.query.filter_by(name='webinar_attendee').first()
-            if badge:
-                user.badges.append(badge)
-                new_badges.append(badge)
-                user.add_experience(ProgressTracker.ACHIEVEMENTS['webinar_attendee']['points'])
+        With a trigger ('chat_recorded', 'event_registered',
+        'connection_made') only the rules that event can satisfy are checked.
+        """
+        from app.utils.achievements import achievement_engine
         
-        # Check networking achievement
-        if len(user.connections) >= 5 and not user.has_badge('networking_pro'):
-            badge = Badge.query.filter_by(name='networking_pro').first()
-            if badge:
-                user.badges.append(badge)
-                new_badges.append(badge)
-                user.add_experience(ProgressTracker.ACHIEVEMENTS['networking_pro']['points'])
+        awarded = achievement_engine.evaluate([user.id], trigger).get(user.id, [])
+        if not awarded:
+            return []
         
-        if new_badges:
-            db.session.commit()
-        
-        return new_badges
+        db.session.commit()
+        return [db.session.get(Badge, badge_id) for badge_id in awarded]
     
     @staticmethod
     def calculate_chat_streak(user):
-        """Calculate user's current chat streak"""
-        if not user.chat_history:
-            return 0
-        
-        # Get chat history sorted by date
-        chats = sorted(user.chat_history, key=lambda x: x.timestamp, reverse=True)
-        
-        streak = 0
-        last_date = None
+        """Return the user's chat streak, in days, ending at their last chat.
         
-        for chat in chats:
-            chat_date = chat.timestamp.date()
-            
-            if last_date is None:
-                streak = 1
-                last_date = chat_date
-                continue
-            
-            # Check if this chat is from the previous day
-            if (last_date - chat_date).days == 1:
-                streak += 1
-                last_date = chat_date
-            elif (last_date - chat_date).days > 1:
-                break
-        
-        return streak
+        The streak is kept on the user as chats are recorded (see
+        streak_values); `flask repair-streaks` rebuilds it from history.
+        """
+        return user.current_streak or 0
     
     @staticmethod
     def get_progress_summary(user):
-        """Get a summary of user's progress"""
-        current_level = user.level
-        current_exp = user.experience
+        """Get a summary of user's progress from the materialized progress row"""
+        progress = ProgressStore.get(user)
+        current_level = progress.level
+        current_exp = progress.experience
         exp_for_next = ProgressTracker.experience_for_next_level(current_exp)
         
         summary = {
@@ -159,37 +214,21 @@ class ProgressTracker:
             'progress_percentage': (current_exp - ProgressTracker.LEVEL_THRESHOLDS[current_level]) / 
                                  (ProgressTracker.LEVEL_THRESHOLDS[current_level + 1] - 
                                   ProgressTracker.LEVEL_THRESHOLDS[current_level]) * 100 if exp_for_next else 100,
-            'badges': len(user.badges),
-            'company_visits': user.company_visits,
-            'webinars_attended': user.webinars_attended,
-            'chat_streak': ProgressTracker.calculate_chat_streak(user),
-            'total_chats': len(user.chat_history) if user.chat_history else 0,
-            'connections': len(user.connections) if hasattr(user, 'connections') else 0
+            'badges': progress.badge_count,
+            'company_visits': progress.company_visits,
+            'webinars_attended': progress.webinars_attended,
+            'chat_streak': progress.current_streak,
+            'total_chats': progress.chat_count,
+            'connections': progress.connection_count
         }
         
         return summary
     
     @staticmethod
     def get_engagement_score(user):
-        """Calculate user's engagement score based on various factors"""
-        base_score = 0
-        
-        # Activity-based scoring
-        base_score += len(user.chat_history) * 2  # 2 points per chat
-        base_score += user.company_visits * 10    # 10 points per company visit
-        base_score += user.webinars_attended * 8  # 8 points per webinar
-        
-        # Streak bonus
-        streak = ProgressTracker.calculate_chat_streak(user)
-        base_score += streak * 5  # 5 points per day of streak
-        
-        # Level bonus
-        base_score += user.level * 15  # 15 points per level
-        
-        # Badge bonus
-        base_score += len(user.badges) * 20  # 20 points per badge
-        
-        # Normalize score to 0-100 range
-        normalized_score = min(100, math.ceil(base_score / 5))
+        """Return the user's 0-100 engagement score.
         
-        return normalized_score 
\ No newline at end of file
+        The score (chats, company visits, webinars, streak, level and badges)
+        is kept on the materialized progress row; see ProgressStore.expected.
+        """
+        return ProgressStore.get(user).engagement_score
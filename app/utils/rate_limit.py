@@ -0,0 +1,125 @@
+import threading
+import time
+from contextlib import contextmanager
+from app.utils.cache import LRUCache
+from app.utils.metrics import LatencyRecorder
+
+
+class RateLimited(Exception):
+    """Raised when an AI call is over a user's budget or the global limit"""
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = max(1, int(round(retry_after)))
+
+
+class TokenBucket:
+    def __init__(self, capacity, refill_per_second):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_consume(self, amount=1):
+        """Take tokens if available; return (allowed, seconds until enough refill)"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+            self.updated = now
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return True, 0
+            return False, (amount - self.tokens) / self.refill_per_second
+
+
+class LLMLimiter:
+    """Global cap on concurrent LLM calls plus per-user token buckets.
+
+    ``slot()`` guards every model call: at most AI_MAX_IN_FLIGHT run at once
+    and further callers queue for up to AI_QUEUE_DEADLINE seconds before
+    being rejected. ``check_user()`` charges a user's bucket, whose size and
+    refill rate depend on their level (AI_USER_RATE_LIMITS).
+    """
+
+    def __init__(self, app=None):
+        self.max_in_flight = 8
+        self.queue_deadline = 10
+        self.user_limits = {1: (5, 5)}
+        self._semaphore = threading.BoundedSemaphore(self.max_in_flight)
+        self._buckets = LRUCache(max_entries=10000)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected_capacity = 0
+        self.rejected_user = 0
+        self.wait_times = LatencyRecorder()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.max_in_flight = app.config.get('AI_MAX_IN_FLIGHT', 8)
+        self.queue_deadline = app.config.get('AI_QUEUE_DEADLINE', 10)
+        self.user_limits = app.config.get('AI_USER_RATE_LIMITS', {1: (5, 5)})
+        self._semaphore = threading.BoundedSemaphore(self.max_in_flight)
+        app.extensions['ai_limiter'] = self
+
+    def _limits_for(self, level):
+        """Return (burst, per-minute rate) for the highest tier at or below level"""
+        tiers = [tier for tier in sorted(self.user_limits) if tier <= (level or 1)]
+        return self.user_limits[tiers[-1] if tiers else min(self.user_limits)]
+
+    def check_user(self, user):
+        """Charge one AI call to a user's bucket, raising RateLimited when it is empty"""
+        burst, per_minute = self._limits_for(user.level)
+        bucket = self._buckets.get(user.id)
+        if bucket is None or bucket.capacity != burst:
+            bucket = TokenBucket(burst, per_minute / 60.0)
+            self._buckets.set(user.id, bucket)
+
+        allowed, retry_after = bucket.try_consume()
+        if not allowed:
+            with self._lock:
+                self.rejected_user += 1
+            raise RateLimited("You're sending messages faster than the AI advisor can keep up. "
+                              "Please wait a moment.", retry_after)
+
+    @contextmanager
+    def slot(self):
+        """Hold one of the global in-flight slots for the duration of a model call"""
+        started = time.perf_counter()
+        with self._lock:
+            self.waiting += 1
+        acquired = self._semaphore.acquire(timeout=self.queue_deadline)
+        with self._lock:
+            self.waiting -= 1
+        self.wait_times.record(time.perf_counter() - started)
+
+        if not acquired:
+            with self._lock:
+                self.rejected_capacity += 1
+            raise RateLimited('The AI advisor is busy right now. Please try again shortly.',
+                              self.queue_deadline)
+
+        with self._lock:
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self):
+        return {
+            'max_in_flight': self.max_in_flight,
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+            'rejected_capacity': self.rejected_capacity,
+            'rejected_user': self.rejected_user,
+            'tracked_users': len(self._buckets),
+            'queue_wait': self.wait_times.stats()
+        }
+
+
+llm_limiter = LLMLimiter()
@@ -0,0 +1,213 @@
+import re
+import threading
+import time
+import zlib
+import numpy as np
+from app.utils.cache import ResponseCache
+
+
+class HashedNgramVectorizer:
+    """Embeds short texts as L2-normalised hashed bag-of-n-gram vectors.
+
+    Content words and the character trigrams inside them are hashed (CRC32,
+    so vectors are stable across processes) into ``dim`` signed buckets.
+    Trigrams let inflections match ("engineer" / "engineering"), and
+    function words are dropped so phrasing differences count for little.
+    """
+
+    STOPWORDS = frozenset([
+        'a', 'an', 'the', 'i', 'me', 'my', 'you', 'your', 'to', 'of', 'in',
+        'into', 'on', 'for', 'and', 'or', 'is', 'are', 'am', 'be', 'do', 'does',
+        'can', 'could', 'should', 'would', 'how', 'what', 'which', 'about',
+        'with', 'it', 'this', 'that', 'some', 'any', 'get', 'getting', 'please',
+        # Intent-neutral verbs and nouns ("start a career in", "get into")
+        'start', 'started', 'begin', 'become', 'break', 'go', 'going', 'want',
+        'career', 'careers', 'field',
+        # Conversational filler that only makes sense in context
+        'tell', 'more', 'again', 'yes', 'no', 'ok', 'okay', 'thanks', 'thank',
+        'sure', 'so', 'also', 'then', 'why'
+    ])
+
+    TRIGRAM_WEIGHT = 0.5
+
+    _TOKEN = re.compile(r"[a-z0-9+#]+")
+
+    def __init__(self, dim=1024):
+        self.dim = dim
+
+    def tokens(self, text):
+        return [t for t in self._TOKEN.findall((text or '').lower()) if t not in self.STOPWORDS]
+
+    def _add(self, vector, feature, weight):
+        h = zlib.crc32(feature.encode('utf-8'))
+        vector[h % self.dim] += weight if h & 0x80000000 else -weight
+
+    def transform(self, text):
+        """Return the unit vector for text (all zeros if it has no content words)"""
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in self.tokens(text):
+            self._add(vector, 'w:' + token, 1.0)
+            padded = f' {token} '
+            for i in range(len(padded) - 2):
+                self._add(vector, 'c:' + padded[i:i + 3], self.TRIGRAM_WEIGHT)
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector
+
+
+class SemanticCache:
+    """Near-duplicate question cache in front of the AI model.
+
+    Questions are embedded with HashedNgramVectorizer and kept as rows of a
+    preallocated NumPy matrix. A lookup is one matrix-vector product: the
+    most similar question asked under the same profile fingerprint (see
+    ResponseCache.profile_fingerprint) is a hit if its cosine similarity
+    reaches the threshold. When the matrix is full the least recently used
+    row is overwritten. Messages with fewer than ``min_tokens`` content
+    words ("yes", "tell me more") depend on the conversation and are never
+    cached or served from the cache.
+    """
+
+    def __init__(self, app=None, max_entries=5000, threshold=0.85, dim=1024,
+                 ttl=3600, min_tokens=2, enabled=True):
+        self._configure(max_entries, threshold, dim, ttl, min_tokens, enabled)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self._configure(
+            app.config.get('AI_SEMANTIC_CACHE_MAX_ENTRIES', 5000),
+            app.config.get('AI_SEMANTIC_CACHE_THRESHOLD', 0.85),
+            app.config.get('AI_SEMANTIC_CACHE_DIM', 1024),
+            app.config.get('AI_CACHE_TTL', 3600),
+            app.config.get('AI_SEMANTIC_CACHE_MIN_TOKENS', 2),
+            app.config.get('AI_SEMANTIC_CACHE_ENABLED', True)
+        )
+        app.extensions['ai_semantic_cache'] = self
+
+    def _configure(self, max_entries, threshold, dim, ttl, min_tokens, enabled):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl = ttl
+        self.min_tokens = min_tokens
+        self.enabled = enabled
+        self.vectorizer = HashedNgramVectorizer(dim)
+        self._vectors = None  # allocated on first add
+        self._fingerprints = np.zeros(max_entries, dtype=np.int64)
+        self._last_used = np.zeros(max_entries, dtype=np.float64)
+        self._expires_at = np.zeros(max_entries, dtype=np.float64)
+        self._responses = [None] * max_entries
+        self._questions = [None] * max_entries
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self.evictions = 0
+        self.hit_similarity_total = 0.0
+
+    @staticmethod
+    def fingerprint_id(user):
+        return int(ResponseCache.profile_fingerprint(user)[:15], 16)
+
+    def needs_context(self, message):
+        """Whether a message has too few content words to mean anything on its own"""
+        return len(self.vectorizer.tokens(message)) < self.min_tokens
+
+    def _embed(self, message):
+        """Return the message vector, or None if it is too short to cache"""
+        if not self.enabled or self.needs_context(message):
+            return None
+        return self.vectorizer.transform(message)
+
+    def lookup(self, message, user, threshold=None):
+        """Return (response, similarity, cached question) for a near-duplicate, else None
+
+        A lower ``threshold`` than the configured one accepts looser matches,
+        e.g. when the model is unavailable and any related answer beats none.
+        """
+        vector = self._embed(message)
+        if vector is None:
+            self.skipped += 1
+            return None
+
+        fingerprint = self.fingerprint_id(user)
+        with self._lock:
+            if not self._size:
+                self.misses += 1
+                return None
+            now = time.monotonic()
+            similarities = self._vectors[:self._size] @ vector
+            usable = (self._fingerprints[:self._size] == fingerprint) & (self._expires_at[:self._size] > now)
+            similarities[~usable] = -1.0
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < (self.threshold if threshold is None else threshold):
+                self.misses += 1
+                return None
+
+            self._last_used[best] = now
+            self.hits += 1
+            self.hit_similarity_total += similarity
+            return self._responses[best], similarity, self._questions[best]
+
+    def add(self, message, response, user):
+        """Store a response for a question, overwriting the least recently used row if full"""
+        vector = self._embed(message)
+        if vector is None or not response:
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, self.vectorizer.dim), dtype=np.float32)
+            if self._size < self.max_entries:
+                slot = self._size
+                self._size += 1
+            else:
+                slot = int(np.argmin(self._last_used))
+                self.evictions += 1
+            self._vectors[slot] = vector
+            self._fingerprints[slot] = self.fingerprint_id(user)
+            self._last_used[slot] = now
+            self._expires_at[slot] = now + self.ttl if self.ttl else np.inf
+            self._responses[slot] = response
+            self._questions[slot] = message
+
+    def get_or_compute(self, message, user, compute):
+        """Return a near-duplicate's response, or compute and store a new one"""
+        found = self.lookup(message, user)
+        if found is not None:
+            return found[0]
+
+        response = compute()
+        self.add(message, response, user)
+        return response
+
+    def clear(self):
+        with self._lock:
+            self._size = 0
+            self._responses = [None] * self.max_entries
+            self._questions = [None] * self.max_entries
+
+    def __len__(self):
+        return self._size
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'size': self._size,
+            'max_entries': self.max_entries,
+            'threshold': self.threshold,
+            'hits': self.hits,
+            'misses': self.misses,
+            'skipped_short': self.skipped,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'mean_hit_similarity': round(self.hit_similarity_total / self.hits, 4) if self.hits else None
+        }
+
+
+semantic_cache = SemanticCache()
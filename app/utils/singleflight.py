@@ -0,0 +1,81 @@
+import threading
+
+
+class SingleFlightTimeout(TimeoutError):
+    """Raised to a waiter when the in-flight call it joined takes too long"""
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait for it and receive the same result, or the same
+    exception if it failed. Waiters give up after ``timeout`` seconds with
+    SingleFlightTimeout, while the leader carries on.
+    """
+
+    def __init__(self, timeout=60):
+        self.timeout = timeout
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    def init_app(self, app):
+        self.timeout = app.config.get('AI_SINGLEFLIGHT_TIMEOUT', 60)
+        app.extensions['ai_singleflight'] = self
+
+    def do(self, key, fn, timeout=None):
+        """Run fn() once for all concurrent callers with the same key"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+
+        if leader:
+            try:
+                call.result = fn()
+            except Exception as e:
+                call.error = e
+                self.errors += 1
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+            return call.result
+
+        if not call.done.wait(self.timeout if timeout is None else timeout):
+            self.timeouts += 1
+            raise SingleFlightTimeout(f'Timed out waiting for in-flight call {key}')
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self):
+        return {
+            'in_flight': len(self._calls),
+            'executions': self.executions,
+            'coalesced': self.coalesced,
+            'timeouts': self.timeouts,
+            'errors': self.errors
+        }
+
+
+ai_singleflight = SingleFlight()
@@ -0,0 +1,115 @@
+from collections import Counter
+from sqlalchemy import bindparam, delete, func, insert, select, update
+from app.models.models import ChatHistory, UserTopicCount, chat_topic
+from app import db
+
+
+class TopicIndex:
+    """Normalized chat topics and per-user topic counters.
+
+    Each ChatHistory row's comma-joined ``topics`` string is mirrored as one
+    ``chat_topic`` row per distinct topic, and ``user_topic_count`` keeps a
+    running count per user and topic so "most discussed topics" is an
+    indexed read. All writes join the caller's transaction.
+    """
+
+    @staticmethod
+    def split(topics):
+        """Return the distinct, normalized topics in a comma-joined string"""
+        seen = []
+        for topic in (topics or '').split(','):
+            topic = topic.strip().lower()
+            if topic and topic not in seen:
+                seen.append(topic)
+        return seen
+
+    @staticmethod
+    def record(chats):
+        """Index new chats given as (chat_history_id, user_id, topics) tuples"""
+        links = []
+        counts = Counter()
+        for chat_id, user_id, topics in chats:
+            for topic in TopicIndex.split(topics):
+                links.append({'chat_history_id': chat_id, 'topic': topic})
+                counts[(user_id, topic)] += 1
+
+        if links:
+            db.session.execute(insert(chat_topic), links)
+        TopicIndex._increment(counts)
+
+    @staticmethod
+    def _increment(counts):
+        """Add to user_topic_count, inserting counters that do not exist yet"""
+        if not counts:
+            return
+
+        user_ids = {user_id for user_id, _ in counts}
+        existing = set(db.session.execute(
+            select(UserTopicCount.user_id, UserTopicCount.topic)
+            .where(UserTopicCount.user_id.in_(user_ids))
+        ).all())
+
+        updates = [
+            {'b_user_id': user_id, 'b_topic': topic, 'b_count': count}
+            for (user_id, topic), count in counts.items() if (user_id, topic) in existing
+        ]
+        inserts = [
+            {'user_id': user_id, 'topic': topic, 'count': count}
+            for (user_id, topic), count in counts.items() if (user_id, topic) not in existing
+        ]
+
+        table = UserTopicCount.__table__
+        if updates:
+            db.session.execute(
+                update(table)
+                .where(table.c.user_id == bindparam('b_user_id'))
+                .where(table.c.topic == bindparam('b_topic'))
+                .values(count=table.c.count + bindparam('b_count')),
+                updates
+            )
+        if inserts:
+            db.session.execute(insert(table), inserts)
+
+    @staticmethod
+    def replace(chats):
+        """Re-index rescored chats given as (chat_history_id, topics) tuples.
+
+        Counters are not adjusted; call rebuild_counts() once the rescoring
+        run is over.
+        """
+        chats = list(chats)
+        if not chats:
+            return
+        db.session.execute(
+            delete(chat_topic).where(chat_topic.c.chat_history_id.in_([chat_id for chat_id, _ in chats]))
+        )
+        links = [
+            {'chat_history_id': chat_id, 'topic': topic}
+            for chat_id, topics in chats
+            for topic in TopicIndex.split(topics)
+        ]
+        if links:
+            db.session.execute(insert(chat_topic), links)
+
+    @staticmethod
+    def rebuild_counts():
+        """Recompute every user's topic counters from chat_topic in one statement"""
+        db.session.execute(delete(UserTopicCount.__table__))
+        db.session.execute(
+            insert(UserTopicCount.__table__).from_select(
+                ['user_id', 'topic', 'count'],
+                select(ChatHistory.user_id, chat_topic.c.topic, func.count())
+                .join(chat_topic, chat_topic.c.chat_history_id == ChatHistory.id)
+                .group_by(ChatHistory.user_id, chat_topic.c.topic)
+            )
+        )
+
+    @staticmethod
+    def top_topics(user_id, limit=5):
+        """Return a user's most discussed topics as (topic, count) rows"""
+        return db.session.execute(
+            select(UserTopicCount.topic, UserTopicCount.count)
+            .where(UserTopicCount.user_id == user_id)
+            .order_by(UserTopicCount.count.desc())
+            .limit(limit)
+        ).all()
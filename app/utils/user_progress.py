@@ -0,0 +1,125 @@
+from datetime import datetime
+from sqlalchemy import case, delete, event, func, insert, literal, select
+from app.models.models import (
+    User, Event, UserProgress, user_badges, user_connections, event_participants
+)
+from app.utils.xp_ledger import ExperienceLedger
+from app import db
+
+
+class ProgressStore:
+    """Keeps the ``user_progress`` row for each user in step with its sources.
+
+    The row is recomputed, inside the transaction that changed it, whenever
+    a user's badges, event registrations, connections or experience change
+    (through the ORM listeners below) or chats are recorded (the write-behind
+    flush calls refresh()). Recomputing reads the user row, the user's
+    association rows and their uncompacted XP ledger entries by index, so its
+    cost does not grow with chat history, and reads are a single primary-key
+    lookup.
+    """
+
+    @staticmethod
+    def expected(user_ids=None):
+        """SELECT of freshly computed progress rows, optionally for some users"""
+        from app.utils.progress_tracker import ProgressTracker
+
+        def count(table, *criteria):
+            return select(func.count()).select_from(table).where(*criteria).scalar_subquery()
+
+        registrations = event_participants.join(Event, Event.id == event_participants.c.event_id)
+        chat_count = func.coalesce(User.chat_count, 0)
+        streak = func.coalesce(User.current_streak, 0)
+        experience = ExperienceLedger.balance_expression()
+        level = ProgressTracker.level_expression(experience)
+        badge_count = count(user_badges, user_badges.c.user_id == User.id)
+        company_visits = count(registrations, event_participants.c.user_id == User.id,
+                               Event.event_type == 'company_visit')
+        webinars = count(registrations, event_participants.c.user_id == User.id,
+                         Event.event_type == 'webinar')
+
+        # 2 points per chat, 10 per company visit, 8 per webinar, 5 per day
+        # of streak, 15 per level and 20 per badge, scaled to 0-100
+        base = chat_count * 2 + company_visits * 10 + webinars * 8 + streak * 5 + level * 15 + badge_count * 20
+        engagement = case(((base + 4) // 5 > 100, 100), else_=(base + 4) // 5)
+
+        query = select(
+            User.id.label('user_id'),
+            experience.label('experience'),
+            level.label('level'),
+            chat_count.label('chat_count'),
+            streak.label('current_streak'),
+            badge_count.label('badge_count'),
+            count(user_connections, user_connections.c.user_id == User.id).label('connection_count'),
+            company_visits.label('company_visits'),
+            webinars.label('webinars_attended'),
+            engagement.label('engagement_score'),
+            literal(datetime.utcnow()).label('updated_at')
+        )
+        if user_ids is not None:
+            query = query.where(User.id.in_(user_ids))
+        return query
+
+    @staticmethod
+    def refresh(user_ids, connection=None):
+        """Recompute the progress rows of the given users"""
+        user_ids = list(user_ids)
+        if not user_ids:
+            return
+        connection = connection if connection is not None else db.session
+        table = UserProgress.__table__
+        connection.execute(delete(table).where(table.c.user_id.in_(user_ids)))
+        connection.execute(insert(table).from_select(
+            [column.name for column in table.columns],
+            ProgressStore.expected(user_ids)
+        ))
+
+    @staticmethod
+    def get(user):
+        """Return the user's progress row, building it if it is missing"""
+        progress = db.session.get(UserProgress, user.id, populate_existing=True)
+        if progress is None:
+            ProgressStore.refresh([user.id])
+            progress = db.session.get(UserProgress, user.id, populate_existing=True)
+        return progress
+
+    @staticmethod
+    def mark(user):
+        """Queue a user's progress row for recomputation at the next flush"""
+        db.session.info.setdefault('progress_users', set()).add(user)
+
+
+# Domain events: the backref sides (Event.participants, Badge.users,
+# User.connected_by) fire these same listeners
+@event.listens_for(User.badges, 'append')
+@event.listens_for(User.badges, 'remove')
+@event.listens_for(User.registered_events, 'append')
+@event.listens_for(User.registered_events, 'remove')
+@event.listens_for(User.connections, 'append')
+@event.listens_for(User.connections, 'remove')
+def _track_collection_change(target, value, initiator):
+    ProgressStore.mark(target)
+
+
+@event.listens_for(User.experience, 'set')
+def _track_experience_change(target, value, oldvalue, initiator):
+    ProgressStore.mark(target)
+
+
+@event.listens_for(User, 'after_insert')
+def _track_new_user(mapper, connection, target):
+    ProgressStore.mark(target)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _refresh_marked_progress(session, flush_context):
+    users = session.info.pop('progress_users', ())
+    ProgressStore.refresh(
+        {user.id for user in users if user.id is not None},
+        connection=session.connection()
+    )
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_marked_progress(session):
+    session.info.pop('progress_users', None)
@@ -0,0 +1,276 @@
+import atexit
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import func, insert, update
+from app.models.models import ChatHistory, User
+from app.utils.metrics import LatencyRecorder
+from app import db
+
+# Weight kept by the running engagement average on each new exchange
+ENGAGEMENT_DECAY = 0.8
+
+# Buffered row fields that are not ChatHistory columns
+_ROW_META = ('experience', 'attempts')
+
+
+class _UserDelta:
+    """Counter changes for one user accumulated since the last flush"""
+
+    def __init__(self):
+        self.chats = 0
+        self.experience = 0
+        self.engagement_scores = []
+        self.last_active = None
+        self.chat_dates = set()
+
+    def add(self, experience, engagement_score, timestamp):
+        self.chats += 1
+        self.chat_dates.add(timestamp.date())
+        self.experience += experience
+        self.engagement_scores.append(engagement_score)
+        self.last_active = max(self.last_active or timestamp, timestamp)
+
+    def engagement_update(self):
+        """Return (factor, offset) so that new = old * factor + offset.
+
+        This replays the per-exchange average old * 0.8 + score * 0.2 over
+        every buffered score in order.
+        """
+        factor = 1.0
+        offset = 0.0
+        for score in self.engagement_scores:
+            factor *= ENGAGEMENT_DECAY
+            offset = offset * ENGAGEMENT_DECAY + score * (1 - ENGAGEMENT_DECAY)
+        return factor, offset
+
+
+class TelemetryBuffer:
+    """Write-behind buffer for AI chat telemetry.
+
+    ChatHistory rows, their topic index entries, XP ledger entries and
+    per-user counter changes (chat count, engagement, last active, chat
+    streak, topic counts, progress row) are held in memory and written in
+    a single transaction once WRITE_BEHIND_BATCH_SIZE rows are waiting or
+    every WRITE_BEHIND_INTERVAL seconds, whichever comes first. Whatever is
+    left is flushed when the process exits.
+
+    A batch that fails to write goes back in front of the buffer. Once its
+    rows have failed WRITE_BEHIND_MAX_RETRIES times they are written one
+    by one, so a bad row cannot hold back the rest, and a row that still
+    fails on its own is appended to the WRITE_BEHIND_DEAD_LETTER file.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.batch_size = 100
+        self.interval = 2.0
+        self.max_retries = 5
+        self.dead_letter_path = None
+        self._rows = []
+        self._deltas = {}
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.flushes = 0
+        self.rows_flushed = 0
+        self.failures = 0
+        self.dead_lettered = 0
+        self.batch_sizes = LatencyRecorder()
+        self.lag = LatencyRecorder()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.batch_size = app.config.get('WRITE_BEHIND_BATCH_SIZE', 100)
+        self.interval = app.config.get('WRITE_BEHIND_INTERVAL', 2.0)
+        self.max_retries = app.config.get('WRITE_BEHIND_MAX_RETRIES', 5)
+        self.dead_letter_path = app.config.get('WRITE_BEHIND_DEAD_LETTER') or \
+            os.path.join(app.instance_path, 'telemetry_dead_letter.jsonl')
+        app.extensions['telemetry_buffer'] = self
+        atexit.register(self.flush)
+
+        if not app.config.get('TESTING'):
+            self._thread = threading.Thread(target=self._run, name='telemetry-flush', daemon=True)
+            self._thread.start()
+
+    def record_chat(self, user_id, message, response, sentiment_score,
+                    engagement_score, topics, experience, timestamp=None):
+        """Buffer one AI exchange and its effect on the user's counters"""
+        timestamp = timestamp or datetime.utcnow()
+        with self._lock:
+            self._rows.append({
+                'user_id': user_id,
+                'message': message,
+                'response': response,
+                'sentiment_score': sentiment_score,
+                'engagement_score': engagement_score,
+                'topics': topics,
+                'timestamp': timestamp,
+                'experience': experience
+            })
+            self._deltas.setdefault(user_id, _UserDelta()).add(experience, engagement_score, timestamp)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            full = len(self._rows) >= self.batch_size
+
+        if full:
+            if self._thread is not None:
+                self._wakeup.set()
+            else:
+                self.flush()
+
+    def pending_experience(self, user_id):
+        """Experience buffered for a user but not yet written"""
+        with self._lock:
+            delta = self._deltas.get(user_id)
+            return delta.experience if delta else 0
+
+    def flush(self):
+        """Write everything buffered so far in one transaction"""
+        with self._flush_lock:
+            with self._lock:
+                rows, deltas, oldest = self._rows, self._deltas, self._oldest
+                self._rows, self._deltas, self._oldest = [], {}, None
+            if not rows:
+                return 0
+
+            with self.app.app_context():
+                try:
+                    self._write(rows, deltas)
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    self.failures += 1
+                    print(f"Error flushing chat telemetry: {str(e)}")
+                    return self._retry(rows, oldest)
+
+            self.flushes += 1
+            self.rows_flushed += len(rows)
+            self.batch_sizes.record(len(rows))
+            self.lag.record(time.monotonic() - oldest)
+            return len(rows)
+
+    @staticmethod
+    def _deltas_for(rows):
+        """Per-user counter changes of buffered rows, in order"""
+        deltas = {}
+        for row in rows:
+            deltas.setdefault(row['user_id'], _UserDelta()).add(
+                row['experience'], row['engagement_score'], row['timestamp']
+            )
+        return deltas
+
+    def _retry(self, rows, oldest):
+        """Requeue a failed batch, or write it row by row once it is out of retries.
+
+        Called with an app context and the flush lock held; returns the
+        number of rows written.
+        """
+        for row in rows:
+            row['attempts'] = row.get('attempts', 0) + 1
+        if all(row['attempts'] < self.max_retries for row in rows):
+            self._requeue(rows, oldest)
+            return 0
+
+        written = 0
+        retry = []
+        for row in rows:
+            try:
+                self._write([row], TelemetryBuffer._deltas_for([row]))
+                db.session.commit()
+                written += 1
+            except Exception as e:
+                db.session.rollback()
+                if row['attempts'] < self.max_retries:
+                    retry.append(row)
+                else:
+                    self._dead_letter(row, e)
+        if retry:
+            self._requeue(retry, oldest)
+        self.rows_flushed += written
+        return written
+
+    def _dead_letter(self, row, error):
+        """Give up on a row, keeping it in the dead letter file for replay"""
+        self.dead_lettered += 1
+        print(f"Dropping chat telemetry for user {row['user_id']} after {row['attempts']} attempts: {str(error)}")
+        try:
+            with open(self.dead_letter_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(dict(row, error=str(error)), default=str) + '\n')
+        except OSError as e:
+            print(f"Error writing chat telemetry dead letter: {str(e)}")
+
+    def _write(self, rows, deltas):
+        from app.utils.achievements import CHAT_RECORDED, achievement_engine
+        from app.utils.progress_tracker import ProgressTracker
+        from app.utils.topic_index import TopicIndex
+        from app.utils.user_progress import ProgressStore
+        from app.utils.xp_ledger import ExperienceLedger, REASON_CHAT
+
+        chat_ids = db.session.scalars(
+            insert(ChatHistory).returning(ChatHistory.id, sort_by_parameter_order=True),
+            [{k: v for k, v in row.items() if k not in _ROW_META} for row in rows]
+        ).all()
+        TopicIndex.record(
+            (chat_id, row['user_id'], row['topics']) for chat_id, row in zip(chat_ids, rows)
+        )
+        for user_id, delta in deltas.items():
+            factor, offset = delta.engagement_update()
+            db.session.execute(
+                update(User)
+                .where(User.id == user_id)
+                .values(
+                    chat_count=func.coalesce(User.chat_count, 0) + delta.chats,
+                    engagement_score=func.coalesce(User.engagement_score, 0.0) * factor + offset,
+                    last_active=delta.last_active,
+                    **ProgressTracker.streak_values(delta.chat_dates)
+                )
+            )
+        ExperienceLedger.record((
+            {'user_id': row['user_id'], 'delta': row['experience'], 'reason': REASON_CHAT, 'source_id': chat_id}
+            for chat_id, row in zip(chat_ids, rows)
+        ), refresh_progress=False)
+        ProgressStore.refresh(deltas)
+        achievement_engine.evaluate(deltas, CHAT_RECORDED)
+
+    def _requeue(self, rows, oldest):
+        """Put failed rows back in front of anything buffered since"""
+        with self._lock:
+            self._rows = rows + self._rows
+            self._deltas = TelemetryBuffer._deltas_for(self._rows)
+            self._oldest = oldest if self._oldest is None else min(oldest, self._oldest)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._rows)
+            current_lag = time.monotonic() - self._oldest if self._oldest is not None else 0.0
+        return {
+            'pending_rows': pending,
+            'pending_users': len(self._deltas),
+            'current_lag_ms': round(current_lag * 1000, 1),
+            'flushes': self.flushes,
+            'rows_flushed': self.rows_flushed,
+            'failures': self.failures,
+            'dead_lettered': self.dead_lettered,
+            'batch_size': {
+                'count': self.batch_sizes.count,
+                'mean': round(self.batch_sizes.total / self.batch_sizes.count, 1) if self.batch_sizes.count else None,
+                'max': self.batch_sizes.max
+            },
+            'flush_lag': self.lag.stats()
+        }
+
+
+telemetry_buffer = TelemetryBuffer()
@@ -0,0 +1,341 @@
+from apscheduler.schedulers.background import BackgroundScheduler
+from datetime import datetime, timedelta
+from sqlalchemy import bindparam, event, func, insert, inspect, select, update
+from sqlalchemy.orm.attributes import set_committed_value
+from app.models.models import User, XpLedger, XpCompaction
+from app import db
+
+# Ledger entry reasons
+REASON_CHAT = 'chat'
+REASON_EVENT = 'event'
+REASON_ACHIEVEMENT = 'achievement'
+REASON_GRANT = 'grant'
+REASON_OPENING_BALANCE = 'opening_balance'
+
+
+class ExperienceLedger:
+    """Append-only XP history with a compacted balance on the user row.
+
+    Every XP change is an ``xp_ledger`` insert, so awarding XP no longer
+    updates the user row. ``user.experience`` and ``user.level`` hold the
+    balance of every entry up to the ``xp_compaction`` watermark; the
+    compactor folds newer entries into it in batches and moves the
+    watermark in the same transaction. A user's balance is therefore the
+    stored experience plus their entries past the watermark (one indexed
+    range read), and rebuild() recomputes the stored balances exactly from
+    the ledger. Loaded users show that balance: each ORM select of users
+    adds their pending entries to the committed experience and level with
+    one grouped ledger read for the whole result.
+    """
+
+    @staticmethod
+    def watermark():
+        """Id of the newest ledger entry folded into the user balances"""
+        return db.session.scalar(select(XpCompaction.compacted_through).where(XpCompaction.id == 1)) or 0
+
+    @staticmethod
+    def pending_expression(user_id):
+        """SQL sum of a user's ledger entries past the watermark"""
+        watermark = select(XpCompaction.compacted_through).where(XpCompaction.id == 1).scalar_subquery()
+        return func.coalesce(
+            select(func.sum(XpLedger.delta))
+            .where(XpLedger.user_id == user_id, XpLedger.id > func.coalesce(watermark, 0))
+            .scalar_subquery(),
+            0
+        )
+
+    @staticmethod
+    def balance_expression():
+        """SQL expression for the current balance of the User row in scope"""
+        return func.coalesce(User.experience, 0) + ExperienceLedger.pending_expression(User.id)
+
+    @staticmethod
+    def balances(user_ids):
+        """Return {user_id: current balance}"""
+        return dict(db.session.execute(
+            select(User.id, ExperienceLedger.balance_expression()).where(User.id.in_(list(user_ids)))
+        ).all())
+
+    @staticmethod
+    def add(user, points, reason, source_id=None):
+        """Append one entry for a loaded user and return their new level.
+
+        The user object shows the new balance straight away; the user row
+        itself is left for the compactor.
+        """
+        from app.utils.leaderboard import leaderboard
+        from app.utils.progress_tracker import ProgressTracker
+        from app.utils.user_progress import ProgressStore
+
+        balance = ExperienceLedger.balances([user.id]).get(user.id, 0) + points
+        db.session.add(XpLedger(user_id=user.id, delta=points, reason=reason, source_id=source_id))
+        set_committed_value(user, 'experience', balance)
+        set_committed_value(user, 'level', ProgressTracker.calculate_level(balance))
+        ProgressStore.mark(user)
+        leaderboard.mark(user)
+        return user.level
+
+    @staticmethod
+    def record(entries, refresh_progress=True):
+        """Append entries given as dicts of user_id, delta, reason and source_id.
+
+        Refreshes the users' progress rows (unless the caller will) and
+        stages their leaderboard totals; returns {user_id: new balance}. The
+        caller commits.
+        """
+        from app.utils.leaderboard import leaderboard
+        from app.utils.user_progress import ProgressStore
+
+        entries = [
+            dict(entry, source_id=entry.get('source_id'), created_at=datetime.utcnow())
+            for entry in entries if entry['delta']
+        ]
+        if not entries:
+            return {}
+
+        db.session.execute(insert(XpLedger), entries)
+        balances = ExperienceLedger.balances({entry['user_id'] for entry in entries})
+        if refresh_progress:
+            ProgressStore.refresh(balances)
+        for user_id, balance in balances.items():
+            leaderboard.stage(user_id, balance)
+        return balances
+
+    @staticmethod
+    def compact(batch_size=5000, min_age=5):
+        """Fold ledger entries older than min_age seconds into user balances.
+
+        Each batch is one transaction: add the per-user sums of the next
+        ``batch_size`` entries to the user rows (recomputing the level) and
+        move the watermark past them. Returns the number of entries folded.
+        """
+        from app.utils.progress_tracker import ProgressTracker
+
+        table = User.__table__
+        new_experience = func.coalesce(table.c.experience, 0) + bindparam('b_delta')
+        fold = update(table).where(table.c.id == bindparam('b_id')).values(
+            experience=new_experience,
+            level=ProgressTracker.level_expression(new_experience)
+        )
+
+        folded = 0
+        while True:
+            watermark = ExperienceLedger.watermark()
+            # Stop short of entries that are too recent: a transaction that
+            # took a lower id may not have committed yet
+            cutoff = datetime.utcnow() - timedelta(seconds=min_age)
+            first_recent = db.session.scalar(
+                select(func.min(XpLedger.id)).where(XpLedger.id > watermark, XpLedger.created_at > cutoff)
+            )
+            query = select(XpLedger.id).where(XpLedger.id > watermark)
+            if first_recent is not None:
+                query = query.where(XpLedger.id < first_recent)
+            ids = db.session.scalars(query.order_by(XpLedger.id).limit(batch_size)).all()
+            if not ids:
+                break
+
+            try:
+                totals = db.session.execute(
+                    select(XpLedger.user_id, func.sum(XpLedger.delta))
+                    .where(XpLedger.id > watermark, XpLedger.id <= ids[-1])
+                    .group_by(XpLedger.user_id)
+                ).all()
+                if totals:
+                    db.session.execute(fold, [{'b_id': user_id, 'b_delta': delta} for user_id, delta in totals])
+                ExperienceLedger._move_watermark(watermark, ids[-1])
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error compacting the XP ledger: {str(e)}")
+                break
+            folded += len(ids)
+        return folded
+
+    @staticmethod
+    def _move_watermark(previous, through):
+        """Advance the watermark, failing if another compactor moved it first"""
+        moved = db.session.execute(
+            update(XpCompaction)
+            .where(XpCompaction.id == 1, XpCompaction.compacted_through == previous)
+            .values(compacted_through=through, compacted_at=datetime.utcnow())
+        ).rowcount
+        if not moved:
+            raise RuntimeError('the XP ledger watermark moved during compaction')
+
+    @staticmethod
+    def rebuild(batch_size=1000):
+        """Recompute every stored balance from the ledger up to the watermark.
+
+        Users are rebuilt in id order, one transaction per batch. Returns
+        the number of users whose stored experience changed.
+        """
+        from app.utils.progress_tracker import ProgressTracker
+        from app.utils.user_progress import ProgressStore
+
+        watermark = select(XpCompaction.compacted_through).where(XpCompaction.id == 1).scalar_subquery()
+        ledger_total = func.coalesce(
+            select(func.sum(XpLedger.delta))
+            .where(XpLedger.user_id == User.id, XpLedger.id <= func.coalesce(watermark, 0))
+            .scalar_subquery(),
+            0
+        )
+
+        changed = 0
+        last_id = 0
+        while True:
+            rows = db.session.execute(
+                select(User.id, func.coalesce(User.experience, 0) != ledger_total)
+                .where(User.id > last_id)
+                .order_by(User.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+
+            drifted = [user_id for user_id, differs in rows if differs]
+            if drifted:
+                db.session.execute(
+                    update(User)
+                    .where(User.id.in_(drifted))
+                    .values(experience=ledger_total, level=ProgressTracker.level_expression(ledger_total))
+                    .execution_options(synchronize_session=False)
+                )
+                ProgressStore.refresh(drifted)
+                db.session.commit()
+            changed += len(drifted)
+            last_id = rows[-1][0]
+        return changed
+
+
+_OVERLAY_KEY = 'xp_overlay_users'
+
+
+def _overlay_pending(session, loaded_users):
+    """Add pending ledger entries to the users a query just loaded.
+
+    One grouped read covers every user in the batch and runs on the
+    session's connection, so it never autoflushes. Only the level is
+    recomputed for users refreshed without their experience.
+    """
+    from app.utils.progress_tracker import ProgressTracker
+
+    needs_pending = {}
+    for user, attrs in loaded_users:
+        loaded = inspect(user).dict
+        if 'experience' not in loaded:
+            continue
+        if attrs is not None and 'experience' not in attrs:
+            if 'level' in attrs:
+                set_committed_value(user, 'level', ProgressTracker.calculate_level(loaded['experience']))
+            continue
+        needs_pending[loaded['id']] = user
+    if not needs_pending:
+        return
+
+    watermark = select(XpCompaction.compacted_through).where(XpCompaction.id == 1).scalar_subquery()
+    pending = session.connection().execute(
+        select(XpLedger.user_id, func.sum(XpLedger.delta))
+        .where(XpLedger.user_id.in_(list(needs_pending)), XpLedger.id > func.coalesce(watermark, 0))
+        .group_by(XpLedger.user_id)
+    ).all()
+    for user_id, delta in pending:
+        if not delta:
+            continue
+        user = needs_pending[user_id]
+        balance = (inspect(user).dict['experience'] or 0) + delta
+        set_committed_value(user, 'experience', balance)
+        set_committed_value(user, 'level', ProgressTracker.calculate_level(balance))
+
+
+@event.listens_for(User, 'load')
+def _collect_loaded_user(target, context):
+    collected = context.session.info.get(_OVERLAY_KEY)
+    if collected is not None:
+        collected.append((target, None))
+
+
+@event.listens_for(User, 'refresh')
+def _collect_refreshed_user(target, context, attrs):
+    # ORM UPDATEs refresh evaluated attributes without a query context
+    if context is None:
+        return
+    collected = context.session.info.get(_OVERLAY_KEY)
+    if collected is not None:
+        collected.append((target, attrs))
+
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _overlay_pending_on_execute(orm_execute_state):
+    """Buffer ORM selects of users and overlay their balances in one query.
+
+    The load and refresh listeners above only note which users the
+    statement populated; streamed (yield_per) results are left alone.
+    """
+    if not orm_execute_state.is_select or orm_execute_state.execution_options.get('yield_per') or \
+            not any(mapper.class_ is User for mapper in orm_execute_state.all_mappers):
+        return None
+
+    info = orm_execute_state.session.info
+    outer = info.get(_OVERLAY_KEY)
+    info[_OVERLAY_KEY] = collected = []
+    try:
+        frozen = orm_execute_state.invoke_statement().freeze()
+    finally:
+        if outer is None:
+            info.pop(_OVERLAY_KEY, None)
+        else:
+            info[_OVERLAY_KEY] = outer
+    _overlay_pending(orm_execute_state.session, collected)
+    return frozen()
+
+
+class XpCompactor:
+    """Runs ExperienceLedger.compact() every XP_COMPACT_INTERVAL seconds"""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.scheduler = None
+        self.batch_size = 5000
+        self.min_age = 5
+        self.runs = 0
+        self.folded = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.batch_size = app.config.get('XP_COMPACT_BATCH', 5000)
+        self.min_age = app.config.get('XP_COMPACT_MIN_AGE', 5)
+        app.extensions['xp_compactor'] = self
+
+        if not app.config.get('XP_COMPACTOR_ENABLED', True) or app.config.get('TESTING'):
+            return
+
+        self.scheduler = BackgroundScheduler(daemon=True)
+        self.scheduler.add_job(
+            self.run,
+            'interval',
+            seconds=app.config.get('XP_COMPACT_INTERVAL', 60),
+            id='compact_xp_ledger',
+            max_instances=1,
+            coalesce=True
+        )
+        self.scheduler.start()
+
+    def run(self):
+        with self.app.app_context():
+            self.folded += ExperienceLedger.compact(self.batch_size, self.min_age)
+        self.runs += 1
+
+    def stats(self):
+        watermark = ExperienceLedger.watermark()
+        pending = db.session.scalar(select(func.count(XpLedger.id)).where(XpLedger.id > watermark))
+        return {
+            'runs': self.runs,
+            'entries_folded': self.folded,
+            'watermark': watermark,
+            'pending_entries': pending
+        }
+
+
+xp_compactor = XpCompactor()
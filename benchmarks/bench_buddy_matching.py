@@ -0,0 +1,97 @@
+"""Time event buddy matching on events with many participants.
+
+Seeds a throwaway SQLite database with users holding random interests and
+events with growing numbers of participants, then compares
+EventManager.get_matching_buddies (interest bitmasks and a NumPy top-k over
+the id and mask columns) with the previous approach of loading every
+participant and intersecting interest sets. Each call runs in a fresh
+session, as in a request.
+
+Usage: python benchmarks/bench_buddy_matching.py [largest_event]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+os.environ.setdefault('LLM_PROVIDER', 'fake')
+for flag in ('INSIGHT_REFRESHER_ENABLED', 'ACHIEVEMENT_SWEEP_ENABLED', 'XP_COMPACTOR_ENABLED'):
+    os.environ[flag] = 'false'
+
+from sqlalchemy import insert
+from app import create_app, db
+from app.models.models import Event, User, event_participants
+from app.utils.event_manager import EventManager
+from app.utils.interests import INTEREST_KEYS, interest_mask
+
+
+def seed(sizes):
+    rng = random.Random(5)
+    db.create_all()
+    users = []
+    for i in range(max(sizes) + 1):
+        interests = ','.join(rng.sample(INTEREST_KEYS[:20], rng.randint(1, 6)))
+        users.append({'name': f'User {i}', 'email': f'user{i}@example.com', 'password_hash': 'x',
+                      'interests': interests, 'interest_mask': interest_mask(interests)})
+    db.session.execute(insert(User), users)
+
+    events = []
+    for size in sizes:
+        event = Event(title=f'{size} participants', date=datetime.utcnow() + timedelta(days=7),
+                      duration=60, max_participants=size + 1, event_type='webinar')
+        db.session.add(event)
+        db.session.flush()
+        db.session.execute(insert(event_participants), [
+            {'event_id': event.id, 'user_id': user_id} for user_id in range(1, size + 2)
+        ])
+        events.append((size, event.id))
+    db.session.commit()
+    return events
+
+
+def load_and_intersect(user, event_id, limit=3):
+    """The previous implementation"""
+    other_participants = User.query\
+        .join(event_participants)\
+        .filter(event_participants.c.event_id == event_id,
+               User.id != user.id)\
+        .all()
+    user_interests = set(user.interests.lower().split(',')) if user.interests else set()
+    scored_participants = []
+    for participant in other_participants:
+        participant_interests = set(participant.interests.lower().split(',')) if participant.interests else set()
+        scored_participants.append((participant, len(user_interests & participant_interests)))
+    scored_participants.sort(key=lambda x: x[1], reverse=True)
+    return [p[0] for p in scored_participants[:limit]]
+
+
+def timed(fn, user_id, event_id, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        buddies = fn(db.session.get(User, user_id), event_id)
+        shared = [bin(b.interest_mask & db.session.get(User, user_id).interest_mask).count('1') for b in buddies]
+        db.session.remove()
+    return (time.perf_counter() - started) / repeat * 1000, shared
+
+
+def main(largest):
+    sizes = [size for size in (1_000, 10_000, 50_000) if size < largest] + [largest]
+    app = create_app()
+    with app.app_context():
+        events = seed(sizes)
+        print(f"{'participants':>12}{'bitmask (ms)':>15}{'load all (ms)':>15}  shared interests of the top 3")
+        for size, event_id in events:
+            repeat = max(3, 20_000 // size)
+            fast, fast_shared = timed(EventManager.get_matching_buddies, 1, event_id, repeat)
+            slow, slow_shared = timed(load_and_intersect, 1, event_id, max(1, repeat // 4))
+            agree = 'same' if fast_shared == slow_shared else f'{fast_shared} vs {slow_shared}'
+            print(f"{size:>12}{fast:>15.2f}{slow:>15.2f}  {agree}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,91 @@
+"""Time company recommendations over a large synthetic catalog.
+
+Indexes synthetic companies in a CompanyIndex and compares its searches
+with the previous approach (splitting each company's description and
+industry into a keyword set per request) applied to the whole catalog.
+Also times the index build and incremental re-indexing, and checks the
+top-k against a full sort of the index's own scores.
+
+Usage: python benchmarks/bench_company_index.py [number_of_companies]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from app.forms.auth import RegistrationForm
+from app.utils.company_index import CompanyIndex
+
+WORDS = (
+    'software development data science analytics machine learning ai cloud computing devops '
+    'infrastructure security cybersecurity web mobile design ux product marketing digital business '
+    'project management blockchain iot embedded game testing qa writing database platform payments '
+    'health logistics retail energy fintech consulting research hardware robotics media education'
+).split()
+FILLER = 'we build tools for teams customers partners across europe since founded growing fast'.split()
+INDUSTRIES = ['Tech', 'Finance', 'Healthcare', 'Retail', 'Energy', 'Media', 'Education', 'Logistics']
+SIZES = ['startup', 'medium', 'enterprise']
+
+
+def company(rng, company_id):
+    words = rng.choices(WORDS, k=rng.randint(4, 12)) + rng.choices(FILLER, k=rng.randint(5, 20))
+    rng.shuffle(words)
+    return company_id, ' '.join(words) + ' ' + rng.choice(INDUSTRIES), rng.choice(SIZES)
+
+
+def keyword_scan(documents, interests, size, limit=5):
+    """The previous scoring, applied to every company of the size"""
+    user_interests = set(interests.lower().split(','))
+    scored = []
+    for company_id, text, company_size in documents:
+        if company_size == size:
+            scored.append((company_id, len(user_interests & set(text.lower().split()))))
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return [c[0] for c in scored[:limit]]
+
+
+def timed(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main(count):
+    rng = random.Random(11)
+    documents = [company(rng, company_id) for company_id in range(1, count + 1)]
+    choices = [key for key, _ in RegistrationForm.INTEREST_CHOICES]
+    profiles = [(','.join(rng.sample(choices, rng.randint(1, 5))), rng.choice(SIZES)) for _ in range(200)]
+
+    index = CompanyIndex()
+    index.interest_labels = dict(RegistrationForm.INTEREST_CHOICES)
+    started = time.perf_counter()
+    index.load_documents(documents)
+    print(f"{count} companies: indexed {len(index.vocabulary)} terms, "
+          f"{index.matrix.nnz} entries in {time.perf_counter() - started:.2f}s")
+
+    searches = iter(profiles * 100)
+    scans = iter(profiles * 100)
+    print(f"{'operation':<28}{'ms':>10}")
+    print(f"{'bm25 search (top 5)':<28}{timed(lambda: index.search(*next(searches), refresh=False), 200):>10.2f}")
+    print(f"{'keyword scan of catalog':<28}{timed(lambda: keyword_scan(documents, *next(scans)), 20):>10.2f}")
+
+    changed = [company(rng, company_id) for company_id in rng.sample(range(1, count + 1), 100)]
+    print(f"{'re-index 1 company':<28}{timed(lambda: index.update_documents(changed[:1]), 20):>10.2f}")
+    print(f"{'re-index 100 companies':<28}{timed(lambda: index.update_documents(changed), 5):>10.2f}")
+
+    mismatches = 0
+    for interests, size in profiles:
+        found = index.search(interests, size, limit=5, refresh=False)
+        scores = index.scores(interests)
+        eligible = np.flatnonzero(index.alive & (index.size_codes == index.sizes[size]))
+        expected = sorted(eligible, key=lambda slot: (-scores[slot], index.company_ids[slot]))[:5]
+        mismatches += found != index.company_ids[expected].tolist()
+    print(f"top-5 mismatches against a full sort: {mismatches}/{len(profiles)}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
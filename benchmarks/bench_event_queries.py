@@ -0,0 +1,102 @@
+"""Count the SQL statements a dashboard request issues with and without the event cache.
+
+Runs against a throwaway SQLite database seeded with companies, events and
+users. For each simulated request it loads a user and runs the lookups the
+/dashboard view makes before rendering, in a fresh session. It reports the
+statements per request and their time, first with the event cache off and
+then on.
+
+Usage: python benchmarks/bench_event_queries.py [requests]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+os.environ.setdefault('LLM_PROVIDER', 'fake')
+for flag in ('INSIGHT_REFRESHER_ENABLED', 'ACHIEVEMENT_SWEEP_ENABLED', 'XP_COMPACTOR_ENABLED'):
+    os.environ[flag] = 'false'
+
+from sqlalchemy import event
+from app import create_app, db
+from app.models.models import Company, Event, User
+from app.utils.event_manager import EventManager
+from app.utils.progress_tracker import ProgressTracker
+
+
+def seed(users=50, companies=40, events=400):
+    rng = random.Random(3)
+    db.create_all()
+    sizes = ['startup', 'medium', 'enterprise']
+    db.session.add_all(
+        Company(name=f'Company {i}', industry='Tech', description='We build things', size=rng.choice(sizes))
+        for i in range(companies)
+    )
+    db.session.flush()
+    now = datetime.utcnow()
+    db.session.add_all(
+        Event(title=f'Event {i}', description='...', date=now + timedelta(days=rng.randint(1, 90)),
+              duration=60, max_participants=50, level_required=rng.randint(1, 6), points=50,
+              event_type=rng.choice(['company_visit', 'webinar']), company_id=rng.randint(1, companies))
+        for i in range(events)
+    )
+    for i in range(users):
+        user = User(name=f'User {i}', email=f'user{i}@example.com', level=rng.randint(1, 6))
+        user.set_password('password')
+        db.session.add(user)
+    db.session.commit()
+    return [user_id for (user_id,) in db.session.query(User.id)]
+
+
+def dashboard_data(user):
+    """The lookups made by the /dashboard view"""
+    ProgressTracker.get_progress_summary(user)
+    ProgressTracker.get_engagement_score(user)
+    EventManager.get_recommended_events(user)
+    EventManager.get_available_webinars(user)
+    EventManager.get_company_recommendations(user)
+    ProgressTracker.check_achievements(user)
+
+
+def run(app, user_ids, requests):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', count)
+        try:
+            started = time.perf_counter()
+            for i in range(requests):
+                user = db.session.get(User, user_ids[i % len(user_ids)])
+                dashboard_data(user)
+                db.session.remove()
+            elapsed = time.perf_counter() - started
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count)
+    event_lists = sum(1 for s in statements if s.lstrip().startswith('SELECT event.'))
+    return len(statements) / requests, event_lists / requests, elapsed / requests * 1000
+
+
+def main(requests):
+    app = create_app()
+    with app.app_context():
+        user_ids = seed()
+
+    from app.utils.event_cache import event_cache
+    print(f"{'event cache':<14}{'queries/req':>13}{'event list queries/req':>24}{'ms/req':>9}")
+    for enabled in (False, True):
+        event_cache.enabled = enabled
+        event_cache.invalidate()
+        total, event_lists, ms = run(app, user_ids, requests)
+        print(f"{'on' if enabled else 'off':<14}{total:>13.1f}{event_lists:>24.1f}{ms:>9.2f}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,87 @@
+"""Compare leaderboard rank and top-N reads against SQL over the user table.
+
+Builds a RankedBoard and an in-memory SQLite table (indexed on experience)
+with the same synthetic users, then times builds, XP updates, rank-of-user
+and top-N page reads on both.
+
+Usage: python benchmarks/bench_leaderboard.py [number_of_users]
+"""
+import os
+import random
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.leaderboard import RankedBoard
+
+
+def timed(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main(count):
+    rng = random.Random(7)
+    users = [(user_id, int(rng.paretovariate(1.2) * 50)) for user_id in range(1, count + 1)]
+
+    started = time.perf_counter()
+    board = RankedBoard()
+    board.load_entries(users)
+    print(f"{count} users: board built in {time.perf_counter() - started:.2f}s")
+
+    db = sqlite3.connect(':memory:')
+    db.execute('CREATE TABLE user (id INTEGER PRIMARY KEY, experience INTEGER)')
+    db.executemany('INSERT INTO user VALUES (?, ?)', users)
+    db.execute('CREATE INDEX ix_user_experience ON user (experience, id)')
+    db.commit()
+    experience = dict(users)
+
+    def board_update():
+        user_id = rng.randint(1, count)
+        experience[user_id] += rng.randint(1, 50)
+        board.set(user_id, experience[user_id])
+
+    def sql_update():
+        user_id = rng.randint(1, count)
+        db.execute('UPDATE user SET experience = experience + ? WHERE id = ?', (rng.randint(1, 50), user_id))
+
+    def board_rank():
+        board.rank(rng.randint(1, count))
+
+    def sql_rank():
+        user_id = rng.randint(1, count)
+        db.execute(
+            'SELECT COUNT(*) + 1 FROM user u, user me WHERE me.id = ? AND '
+            '(u.experience > me.experience OR (u.experience = me.experience AND u.id < me.id))',
+            (user_id,)
+        ).fetchone()
+
+    def board_page():
+        board.page(rng.randint(0, 100) * 25, 25)
+
+    def sql_page():
+        db.execute(
+            'SELECT id, experience FROM user ORDER BY experience DESC, id LIMIT 25 OFFSET ?',
+            (rng.randint(0, 100) * 25,)
+        ).fetchall()
+
+    print(f"{'operation':<16}{'board (us)':>14}{'sql (us)':>14}")
+    for name, board_fn, sql_fn, repeat in (
+        ('xp update', board_update, sql_update, 2000),
+        ('rank of user', board_rank, sql_rank, 50),
+        ('top-25 page', board_page, sql_page, 200),
+    ):
+        print(f"{name:<16}{timed(board_fn, repeat):>14.1f}{timed(sql_fn, repeat):>14.1f}")
+
+    ranked = board.page(0, count)
+    expected = sorted(experience.items(), key=lambda item: (-item[1], item[0]))
+    mismatches = sum(1 for (_, user_id, xp), pair in zip(ranked, expected) if (user_id, xp) != pair)
+    print(f"mismatches after updates: {mismatches}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
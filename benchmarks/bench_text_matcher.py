@@ -0,0 +1,122 @@
+"""Compare ChatTextScorer.score_many with the original per-keyword loops.
+
+Also times one precompiled alternation of every keyword and topic over
+each exchange, the single-pass alternative score_many was measured
+against, and per-exchange score() calls. Exchanges are scored in batches
+of 1000, as rescore-chats does.
+
+Usage: python benchmarks/bench_text_matcher.py [number_of_exchanges]
+"""
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.text_matcher import ChatTextScorer
+
+
+def loop_engagement(message):
+    """The per-keyword implementation previously in CareerAI"""
+    score = 0.5
+    msg_length = len(message.split())
+    if msg_length > 20:
+        score += 0.2
+    elif msg_length > 10:
+        score += 0.1
+    if '?' in message:
+        score += 0.1
+    for keyword in ChatTextScorer.CAREER_KEYWORDS:
+        if keyword in message.lower():
+            score += 0.05
+    return min(1.0, score)
+
+
+def loop_topics(text):
+    """The per-topic implementation previously in CareerAI"""
+    topics = []
+    for topic in ChatTextScorer.COMMON_TOPICS:
+        if topic in text.lower():
+            topics.append(topic)
+    return ','.join(topics[:3])
+
+
+def make_exchanges(count, seed=7):
+    rng = random.Random(seed)
+    vocabulary = (
+        'how do i start a career in data science what skills does the industry '
+        'want from a junior developer networking helps with the job search and '
+        'interview prep company culture matters for work-life balance and '
+        'professional growth at any company i want to improve my skill development'
+    ).split()
+    exchanges = []
+    for _ in range(count):
+        message = ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(3, 30)))
+        if rng.random() < 0.5:
+            message += '?'
+        response = ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(40, 160)))
+        exchanges.append((message, response))
+    return exchanges
+
+
+def alternation_scorer():
+    """One finditer per exchange over a precompiled alternation, longest first.
+
+    A zero-width lookahead finds overlapping terms ("work" inside
+    "networking"); the shorter terms at a position are prefixes of the
+    longest one matched there.
+    """
+    keywords = [k.lower() for k in ChatTextScorer.CAREER_KEYWORDS]
+    topics = [t.lower() for t in ChatTextScorer.COMMON_TOPICS]
+    terms = sorted(set(keywords + topics), key=len, reverse=True)
+    pattern = re.compile('(?=(%s))' % '|'.join(map(re.escape, terms)))
+    prefixes = {term: [other for other in terms if term.startswith(other)] for term in terms}
+
+    def score(message, response):
+        lowered = message.lower()
+        found_keywords, found_topics = set(), set()
+        for match in pattern.finditer(lowered + ' ' + response.lower()):
+            for term in prefixes[match.group(1)]:
+                if term in topics:
+                    found_topics.add(term)
+                if term in keywords and match.start() + len(term) <= len(lowered):
+                    found_keywords.add(term)
+        return (
+            ChatTextScorer._engagement(message, len(found_keywords)),
+            ','.join([topic for topic in topics if topic in found_topics][:ChatTextScorer.MAX_TOPICS])
+        )
+    return score
+
+
+def timed(label, fn, exchanges, expected=None, batch=1000):
+    started = time.perf_counter()
+    actual = []
+    for i in range(0, len(exchanges), batch):
+        actual.extend(fn(exchanges[i:i + batch]))
+    elapsed = time.perf_counter() - started
+    mismatches = sum(1 for a, b in zip(expected, actual) if a != b) if expected is not None else 0
+    print(f"{label:<22}{elapsed:>8.3f}s {len(exchanges) / elapsed:>12,.0f}/s  mismatches: {mismatches}")
+    return actual, elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    exchanges = make_exchanges(count)
+    scorer = ChatTextScorer()
+    alternation = alternation_scorer()
+
+    print(f"{count} exchanges")
+    expected, loop_time = timed('per-keyword loops', lambda batch: [
+        (loop_engagement(message), loop_topics(message + ' ' + response))
+        for message, response in batch
+    ], exchanges)
+    timed('regex alternation', lambda batch: [alternation(m, r) for m, r in batch], exchanges, expected)
+    timed('score() per exchange', lambda batch: [scorer.score(m, r) for m, r in batch], exchanges, expected)
+    _, batch_time = timed('score_many()', scorer.score_many, exchanges, expected)
+    print(f"score_many speedup over the loops: {loop_time / batch_time:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
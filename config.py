@@ -34,5 +34,105 @@ class Config:
     # API Keys
     GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
     
+    # LLM provider: 'gemini', or 'fake' for offline load testing and CI
+    LLM_PROVIDER = os.environ.get('LLM_PROVIDER') or 'gemini'
+    GEMINI_MODEL = os.environ.get('GEMINI_MODEL') or 'gemini-pro'
+    FAKE_LLM_LATENCY = os.environ.get('FAKE_LLM_LATENCY') or 'lognormal'  # 'fixed', 'uniform' or 'lognormal'
+    FAKE_LLM_LATENCY_MS = float(os.environ.get('FAKE_LLM_LATENCY_MS') or 800)
+    FAKE_LLM_LATENCY_SIGMA = float(os.environ.get('FAKE_LLM_LATENCY_SIGMA') or 0.5)
+    FAKE_LLM_ERROR_RATE = float(os.environ.get('FAKE_LLM_ERROR_RATE') or 0.0)
+    FAKE_LLM_CHUNK_SIZE = int(os.environ.get('FAKE_LLM_CHUNK_SIZE') or 40)
+    FAKE_LLM_SEED = int(os.environ.get('FAKE_LLM_SEED') or 42)
+    
+    # AI response cache
+    AI_CACHE_MAX_ENTRIES = int(os.environ.get('AI_CACHE_MAX_ENTRIES') or 1024)
+    AI_CACHE_TTL = int(os.environ.get('AI_CACHE_TTL') or 3600)  # seconds
+    AI_CACHE_SHARED = os.environ.get('AI_CACHE_SHARED', 'true').lower() in ['true', 'on', '1']
+    
+    # Near-duplicate question cache (per process, shares AI_CACHE_TTL)
+    AI_SEMANTIC_CACHE_ENABLED = os.environ.get('AI_SEMANTIC_CACHE_ENABLED', 'true').lower() in ['true', 'on', '1']
+    AI_SEMANTIC_CACHE_MAX_ENTRIES = int(os.environ.get('AI_SEMANTIC_CACHE_MAX_ENTRIES') or 5000)
+    AI_SEMANTIC_CACHE_THRESHOLD = float(os.environ.get('AI_SEMANTIC_CACHE_THRESHOLD') or 0.85)
+    AI_SEMANTIC_CACHE_DIM = int(os.environ.get('AI_SEMANTIC_CACHE_DIM') or 1024)
+    AI_SEMANTIC_CACHE_MIN_TOKENS = int(os.environ.get('AI_SEMANTIC_CACHE_MIN_TOKENS') or 2)
+    
+    # AI conversation sessions (per process)
+    AI_SESSION_MAX_ENTRIES = int(os.environ.get('AI_SESSION_MAX_ENTRIES') or 5000)
+    AI_SESSION_MAX_TURNS = int(os.environ.get('AI_SESSION_MAX_TURNS') or 10)
+    AI_SESSION_IDLE_TIMEOUT = int(os.environ.get('AI_SESSION_IDLE_TIMEOUT') or 1800)  # seconds
+    AI_SESSION_MAX_BYTES = int(os.environ.get('AI_SESSION_MAX_BYTES') or 64 * 1024 * 1024)
+    
+    # AI prompt context
+    AI_CONTEXT_TOKEN_BUDGET = int(os.environ.get('AI_CONTEXT_TOKEN_BUDGET') or 1500)
+    AI_SUMMARY_TOKEN_BUDGET = int(os.environ.get('AI_SUMMARY_TOKEN_BUDGET') or 300)
+    AI_CHARS_PER_TOKEN = int(os.environ.get('AI_CHARS_PER_TOKEN') or 4)
+    
+    # Seconds a request waits on an identical in-flight AI call
+    AI_SINGLEFLIGHT_TIMEOUT = int(os.environ.get('AI_SINGLEFLIGHT_TIMEOUT') or 60)
+    
+    # Model call deadline and circuit breaker
+    AI_CALL_TIMEOUT = float(os.environ.get('AI_CALL_TIMEOUT') or 20)  # seconds
+    AI_STREAM_FIRST_CHUNK_TIMEOUT = float(os.environ.get('AI_STREAM_FIRST_CHUNK_TIMEOUT') or 10)  # seconds
+    AI_STREAM_TIMEOUT = float(os.environ.get('AI_STREAM_TIMEOUT') or 60)  # seconds
+    AI_BREAKER_SLOW_CALL = float(os.environ.get('AI_BREAKER_SLOW_CALL') or 10)  # seconds
+    AI_BREAKER_FAILURE_THRESHOLD = int(os.environ.get('AI_BREAKER_FAILURE_THRESHOLD') or 5)
+    AI_BREAKER_RESET_TIMEOUT = int(os.environ.get('AI_BREAKER_RESET_TIMEOUT') or 30)  # seconds
+    # Similarity accepted from the near-duplicate cache when the model is down
+    AI_FALLBACK_SIMILARITY = float(os.environ.get('AI_FALLBACK_SIMILARITY') or 0.6)
+    
+    # LLM concurrency and per-user budgets
+    AI_MAX_IN_FLIGHT = int(os.environ.get('AI_MAX_IN_FLIGHT') or 8)
+    AI_QUEUE_DEADLINE = float(os.environ.get('AI_QUEUE_DEADLINE') or 10)  # seconds, 0 fails fast
+    # Minimum level -> (burst size, requests per minute)
+    AI_USER_RATE_LIMITS = {
+        1: (5, 5),
+        3: (10, 10),
+        5: (20, 20)
+    }
+    
+    # AI job queue
+    AI_JOB_WORKERS = int(os.environ.get('AI_JOB_WORKERS') or 4)
+    AI_JOB_QUEUE_DEPTH = int(os.environ.get('AI_JOB_QUEUE_DEPTH') or 32)
+    AI_JOB_RESULT_TTL = int(os.environ.get('AI_JOB_RESULT_TTL') or 600)  # seconds
+    
+    # Write-behind buffer for chat telemetry
+    WRITE_BEHIND_BATCH_SIZE = int(os.environ.get('WRITE_BEHIND_BATCH_SIZE') or 100)
+    WRITE_BEHIND_INTERVAL = float(os.environ.get('WRITE_BEHIND_INTERVAL') or 2.0)  # seconds
+    WRITE_BEHIND_MAX_RETRIES = int(os.environ.get('WRITE_BEHIND_MAX_RETRIES') or 5)  # failed flushes before rows are written singly
+    WRITE_BEHIND_DEAD_LETTER = os.environ.get('WRITE_BEHIND_DEAD_LETTER')  # defaults to instance/telemetry_dead_letter.jsonl
+    
+    # Company insight refresher (run it in a single process per deployment)
+    INSIGHT_REFRESHER_ENABLED = os.environ.get('INSIGHT_REFRESHER_ENABLED', 'true').lower() in ['true', 'on', '1']
+    INSIGHT_REFRESH_INTERVAL = int(os.environ.get('INSIGHT_REFRESH_INTERVAL') or 30)  # minutes
+    INSIGHT_MAX_AGE = int(os.environ.get('INSIGHT_MAX_AGE') or 24)  # hours
+    INSIGHT_REFRESH_BATCH = int(os.environ.get('INSIGHT_REFRESH_BATCH') or 20)
+    
+    # In-memory XP leaderboards
+    LEADERBOARD_ENABLED = os.environ.get('LEADERBOARD_ENABLED', 'true').lower() in ['true', 'on', '1']
+    LEADERBOARD_MAX_PER_PAGE = int(os.environ.get('LEADERBOARD_MAX_PER_PAGE') or 100)
+    LEADERBOARD_REBUILD_INTERVAL = int(os.environ.get('LEADERBOARD_REBUILD_INTERVAL') or 900)  # seconds, 0 never
+    
+    # Cached dashboard and /events event lists
+    EVENT_CACHE_ENABLED = os.environ.get('EVENT_CACHE_ENABLED', 'true').lower() in ['true', 'on', '1']
+    EVENT_CACHE_TTL = int(os.environ.get('EVENT_CACHE_TTL') or 60)  # seconds
+    EVENT_CACHE_MAX_BUCKETS = int(os.environ.get('EVENT_CACHE_MAX_BUCKETS') or 64)
+    
+    # BM25 company recommendation index
+    COMPANY_INDEX_K1 = float(os.environ.get('COMPANY_INDEX_K1') or 1.2)
+    COMPANY_INDEX_B = float(os.environ.get('COMPANY_INDEX_B') or 0.75)
+    COMPANY_INDEX_REBUILD_RATIO = float(os.environ.get('COMPANY_INDEX_REBUILD_RATIO') or 0.25)  # dead rows before a rebuild
+    
+    # XP ledger compaction (run it in a single process per deployment)
+    XP_COMPACTOR_ENABLED = os.environ.get('XP_COMPACTOR_ENABLED', 'true').lower() in ['true', 'on', '1']
+    XP_COMPACT_INTERVAL = int(os.environ.get('XP_COMPACT_INTERVAL') or 60)  # seconds
+    XP_COMPACT_BATCH = int(os.environ.get('XP_COMPACT_BATCH') or 5000)
+    XP_COMPACT_MIN_AGE = int(os.environ.get('XP_COMPACT_MIN_AGE') or 5)  # seconds
+    
+    # Nightly achievement sweep (run it in a single process per deployment)
+    ACHIEVEMENT_SWEEP_ENABLED = os.environ.get('ACHIEVEMENT_SWEEP_ENABLED', 'true').lower() in ['true', 'on', '1']
+    ACHIEVEMENT_SWEEP_HOUR = int(os.environ.get('ACHIEVEMENT_SWEEP_HOUR') or 3)  # UTC hour of day
+    ACHIEVEMENT_SWEEP_LOOKBACK = int(os.environ.get('ACHIEVEMENT_SWEEP_LOOKBACK') or 25)  # hours
+    ACHIEVEMENT_SWEEP_CHUNK = int(os.environ.get('ACHIEVEMENT_SWEEP_CHUNK') or 1000)
+    
     # Development settings
     DEBUG = os.environ.get('FLASK_DEBUG', '0') == '1' 
\ No newline at end of file
@@ -0,0 +1,36 @@
+"""add ai response cache
+
+Revision ID: 3f1a9c2b7d41
+Revises: 8c9ded2d3ea6
+Create Date: 2026-10-18 09:12:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1a9c2b7d41'
+down_revision = '8c9ded2d3ea6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ai_response_cache',
+        sa.Column('key', sa.String(length=64), nullable=False),
+        sa.Column('response', sa.Text(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], name='fk_ai_response_cache_user'),
+        sa.PrimaryKeyConstraint('key', name='pk_ai_response_cache')
+    )
+    op.create_index('ix_ai_response_cache_user_id', 'ai_response_cache', ['user_id'])
+    op.create_index('ix_ai_response_cache_expires_at', 'ai_response_cache', ['expires_at'])
+
+
+def downgrade():
+    op.drop_index('ix_ai_response_cache_expires_at', table_name='ai_response_cache')
+    op.drop_index('ix_ai_response_cache_user_id', table_name='ai_response_cache')
+    op.drop_table('ai_response_cache')
@@ -0,0 +1,37 @@
+"""add company insight
+
+Revision ID: 5b7e2d90c3a8
+Revises: 3f1a9c2b7d41
+Create Date: 2026-10-18 10:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b7e2d90c3a8'
+down_revision = '3f1a9c2b7d41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('company_insight',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('company_id', sa.Integer(), nullable=False),
+        sa.Column('interest_bucket', sa.String(length=50), nullable=False),
+        sa.Column('level_band', sa.String(length=20), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('is_stale', sa.Boolean(), nullable=True),
+        sa.Column('generated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['company_id'], ['company.id'], name='fk_company_insight_company'),
+        sa.PrimaryKeyConstraint('id', name='pk_company_insight'),
+        sa.UniqueConstraint('company_id', 'interest_bucket', 'level_band', name='uq_company_insight_key')
+    )
+    op.create_index('ix_company_insight_generated_at', 'company_insight', ['generated_at'])
+
+
+def downgrade():
+    op.drop_index('ix_company_insight_generated_at', table_name='company_insight')
+    op.drop_table('company_insight')
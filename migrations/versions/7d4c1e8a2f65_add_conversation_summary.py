@@ -0,0 +1,31 @@
+"""add conversation summary
+
+Revision ID: 7d4c1e8a2f65
+Revises: 5b7e2d90c3a8
+Create Date: 2026-10-18 11:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d4c1e8a2f65'
+down_revision = '5b7e2d90c3a8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('conversation_summary',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('summary', sa.Text(), nullable=False),
+        sa.Column('summarized_through', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], name='fk_conversation_summary_user'),
+        sa.PrimaryKeyConstraint('user_id', name='pk_conversation_summary')
+    )
+
+
+def downgrade():
+    op.drop_table('conversation_summary')
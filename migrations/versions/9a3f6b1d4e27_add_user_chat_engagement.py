@@ -0,0 +1,38 @@
+"""add user chat engagement columns
+
+Revision ID: 9a3f6b1d4e27
+Revises: 7d4c1e8a2f65
+Create Date: 2026-10-18 13:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a3f6b1d4e27'
+down_revision = '7d4c1e8a2f65'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Use batch mode for SQLite
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.add_column(sa.Column('chat_count', sa.Integer(), nullable=True, server_default='0'))
+        batch_op.add_column(sa.Column('engagement_score', sa.Float(), nullable=True, server_default='0'))
+        batch_op.add_column(sa.Column('last_active', sa.DateTime(), nullable=True))
+
+    # Seed the counters from existing history
+    op.execute(
+        'UPDATE user SET chat_count = '
+        '(SELECT COUNT(*) FROM chat_history WHERE chat_history.user_id = user.id)'
+    )
+
+
+def downgrade():
+    # Use batch mode for SQLite
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.drop_column('last_active')
+        batch_op.drop_column('engagement_score')
+        batch_op.drop_column('chat_count')
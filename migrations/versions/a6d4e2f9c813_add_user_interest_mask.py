@@ -0,0 +1,62 @@
+"""add user interest mask
+
+Revision ID: a6d4e2f9c813
+Revises: f3a8d6e1b947
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6d4e2f9c813'
+down_revision = 'f3a8d6e1b947'
+branch_labels = None
+depends_on = None
+
+# app.utils.interests.INTEREST_KEYS as of this revision
+INTEREST_KEYS = (
+    'software_development', 'data_science', 'ai_ml', 'cybersecurity', 'cloud_computing',
+    'devops', 'web_development', 'mobile_development', 'ui_ux', 'product_management',
+    'digital_marketing', 'business_analytics', 'project_management', 'blockchain', 'iot',
+    'ar_vr', 'game_development', 'technical_writing', 'qa_testing', 'database_admin',
+    'technology', 'healthcare', 'finance', 'education', 'marketing',
+    'design', 'engineering', 'business', 'science', 'arts'
+)
+
+
+def upgrade():
+    # Use batch mode for SQLite
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.add_column(sa.Column('interest_mask', sa.Integer(), nullable=False, server_default='0'))
+    op.create_index('ix_event_participants_event_id_user_id', 'event_participants',
+                    ['event_id', 'user_id'], unique=False)
+
+    # Seed the masks from the interests strings
+    bits = {key: 1 << bit for bit, key in enumerate(INTEREST_KEYS)}
+    bind = op.get_bind()
+    user = sa.table('user',
+        sa.column('id', sa.Integer),
+        sa.column('interest_mask', sa.Integer)
+    )
+    rows = bind.execute(sa.text("SELECT id, interests FROM user WHERE interests IS NOT NULL AND interests != ''")).all()
+    masks = []
+    for user_id, interests in rows:
+        mask = 0
+        for interest in interests.split(','):
+            mask |= bits.get(interest.strip().lower(), 0)
+        if mask:
+            masks.append({'b_id': user_id, 'b_mask': mask})
+    if masks:
+        bind.execute(
+            user.update().where(user.c.id == sa.bindparam('b_id')).values(interest_mask=sa.bindparam('b_mask')),
+            masks
+        )
+
+
+def downgrade():
+    op.drop_index('ix_event_participants_event_id_user_id', table_name='event_participants')
+    # Use batch mode for SQLite
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.drop_column('interest_mask')
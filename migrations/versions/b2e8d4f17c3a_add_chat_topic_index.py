@@ -0,0 +1,82 @@
+"""add chat topic index
+
+Revision ID: b2e8d4f17c3a
+Revises: 9a3f6b1d4e27
+Create Date: 2026-10-18 15:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2e8d4f17c3a'
+down_revision = '9a3f6b1d4e27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('chat_topic',
+        sa.Column('chat_history_id', sa.Integer(), nullable=False),
+        sa.Column('topic', sa.String(length=50), nullable=False),
+        sa.ForeignKeyConstraint(['chat_history_id'], ['chat_history.id'], name='fk_chat_topic_chat_history'),
+        sa.PrimaryKeyConstraint('chat_history_id', 'topic', name='pk_chat_topic')
+    )
+    op.create_index('ix_chat_topic_topic', 'chat_topic', ['topic'], unique=False)
+
+    op.create_table('user_topic_count',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('topic', sa.String(length=50), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], name='fk_user_topic_count_user'),
+        sa.PrimaryKeyConstraint('user_id', 'topic', name='pk_user_topic_count')
+    )
+    op.create_index('ix_user_topic_count_user_count', 'user_topic_count', ['user_id', 'count'], unique=False)
+
+    # Split the existing comma-joined topics into chat_topic rows, in chunks
+    bind = op.get_bind()
+    chat_history = sa.table('chat_history',
+        sa.column('id', sa.Integer),
+        sa.column('topics', sa.String)
+    )
+    chat_topic = sa.table('chat_topic',
+        sa.column('chat_history_id', sa.Integer),
+        sa.column('topic', sa.String)
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(chat_history.c.id, chat_history.c.topics)
+            .where(chat_history.c.id > last_id)
+            .where(chat_history.c.topics.isnot(None))
+            .order_by(chat_history.c.id)
+            .limit(5000)
+        ).all()
+        if not rows:
+            break
+        links = []
+        for chat_id, topics in rows:
+            seen = set()
+            for topic in topics.split(','):
+                topic = topic.strip().lower()
+                if topic and topic not in seen:
+                    seen.add(topic)
+                    links.append({'chat_history_id': chat_id, 'topic': topic})
+        if links:
+            op.bulk_insert(chat_topic, links)
+        last_id = rows[-1][0]
+
+    op.execute(
+        'INSERT INTO user_topic_count (user_id, topic, count) '
+        'SELECT chat_history.user_id, chat_topic.topic, COUNT(*) '
+        'FROM chat_topic JOIN chat_history ON chat_history.id = chat_topic.chat_history_id '
+        'GROUP BY chat_history.user_id, chat_topic.topic'
+    )
+
+
+def downgrade():
+    op.drop_index('ix_user_topic_count_user_count', table_name='user_topic_count')
+    op.drop_table('user_topic_count')
+    op.drop_index('ix_chat_topic_topic', table_name='chat_topic')
+    op.drop_table('chat_topic')
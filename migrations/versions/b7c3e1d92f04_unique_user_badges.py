@@ -0,0 +1,45 @@
+"""unique user badges
+
+Revision ID: b7c3e1d92f04
+Revises: a6d4e2f9c813
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7c3e1d92f04'
+down_revision = 'a6d4e2f9c813'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Collapse any badge awarded to a user more than once into a single row
+    bind = op.get_bind()
+    user_badges = sa.table('user_badges',
+        sa.column('user_id', sa.Integer),
+        sa.column('badge_id', sa.Integer)
+    )
+    duplicates = bind.execute(
+        sa.select(user_badges.c.user_id, user_badges.c.badge_id)
+        .group_by(user_badges.c.user_id, user_badges.c.badge_id)
+        .having(sa.func.count() > 1)
+    ).all()
+    for user_id, badge_id in duplicates:
+        bind.execute(user_badges.delete().where(
+            user_badges.c.user_id == user_id, user_badges.c.badge_id == badge_id
+        ))
+        bind.execute(user_badges.insert().values(user_id=user_id, badge_id=badge_id))
+
+    # Use batch mode for SQLite
+    with op.batch_alter_table('user_badges') as batch_op:
+        batch_op.create_unique_constraint('uq_user_badges_user_id_badge_id', ['user_id', 'badge_id'])
+
+
+def downgrade():
+    # Use batch mode for SQLite
+    with op.batch_alter_table('user_badges') as batch_op:
+        batch_op.drop_constraint('uq_user_badges_user_id_badge_id', type_='unique')
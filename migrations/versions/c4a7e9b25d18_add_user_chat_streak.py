@@ -0,0 +1,60 @@
+"""add user chat streak columns
+
+Revision ID: c4a7e9b25d18
+Revises: b2e8d4f17c3a
+Create Date: 2026-10-18 16:05:00.000000
+
+"""
+from datetime import date
+from itertools import groupby
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a7e9b25d18'
+down_revision = 'b2e8d4f17c3a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Use batch mode for SQLite
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.add_column(sa.Column('current_streak', sa.Integer(), nullable=True, server_default='0'))
+        batch_op.add_column(sa.Column('longest_streak', sa.Integer(), nullable=True, server_default='0'))
+        batch_op.add_column(sa.Column('last_chat_date', sa.Date(), nullable=True))
+
+    # Seed the streaks from existing history (same rules as
+    # ProgressTracker.streaks_from_dates)
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        'SELECT DISTINCT user_id, date(timestamp) AS day FROM chat_history '
+        'WHERE timestamp IS NOT NULL ORDER BY user_id, day'
+    )).all()
+    user = sa.table('user',
+        sa.column('id', sa.Integer),
+        sa.column('current_streak', sa.Integer),
+        sa.column('longest_streak', sa.Integer),
+        sa.column('last_chat_date', sa.Date)
+    )
+    for user_id, days in groupby(rows, key=lambda row: row[0]):
+        days = [d if isinstance(d, date) else date.fromisoformat(d) for _, d in days]
+        current = longest = 0
+        previous = None
+        for day in days:
+            current = current + 1 if previous is not None and (day - previous).days == 1 else 1
+            longest = max(longest, current)
+            previous = day
+        bind.execute(
+            user.update().where(user.c.id == user_id)
+            .values(current_streak=current, longest_streak=longest, last_chat_date=previous)
+        )
+
+
+def downgrade():
+    # Use batch mode for SQLite
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.drop_column('last_chat_date')
+        batch_op.drop_column('longest_streak')
+        batch_op.drop_column('current_streak')
@@ -0,0 +1,36 @@
+"""widen user interest mask
+
+Revision ID: c9e4a7b1d630
+Revises: b7c3e1d92f04
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9e4a7b1d630'
+down_revision = 'b7c3e1d92f04'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Use batch mode for SQLite
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.alter_column('interest_mask',
+               existing_type=sa.Integer(),
+               type_=sa.BigInteger(),
+               existing_nullable=False,
+               existing_server_default='0')
+
+
+def downgrade():
+    # Use batch mode for SQLite
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.alter_column('interest_mask',
+               existing_type=sa.BigInteger(),
+               type_=sa.Integer(),
+               existing_nullable=False,
+               existing_server_default='0')
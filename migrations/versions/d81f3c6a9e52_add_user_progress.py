@@ -0,0 +1,68 @@
+"""add user progress
+
+Revision ID: d81f3c6a9e52
+Revises: c4a7e9b25d18
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd81f3c6a9e52'
+down_revision = 'c4a7e9b25d18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_progress',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('experience', sa.Integer(), nullable=False),
+        sa.Column('level', sa.Integer(), nullable=False),
+        sa.Column('chat_count', sa.Integer(), nullable=False),
+        sa.Column('current_streak', sa.Integer(), nullable=False),
+        sa.Column('badge_count', sa.Integer(), nullable=False),
+        sa.Column('connection_count', sa.Integer(), nullable=False),
+        sa.Column('company_visits', sa.Integer(), nullable=False),
+        sa.Column('webinars_attended', sa.Integer(), nullable=False),
+        sa.Column('engagement_score', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], name='fk_user_progress_user'),
+        sa.PrimaryKeyConstraint('user_id', name='pk_user_progress')
+    )
+
+    # The progress counts are read per user
+    op.create_index('ix_user_badges_user_id', 'user_badges', ['user_id'], unique=False)
+    op.create_index('ix_user_connections_user_id', 'user_connections', ['user_id'], unique=False)
+    op.create_index('ix_event_participants_user_id', 'event_participants', ['user_id'], unique=False)
+
+    # Seed a row per user (same rules as ProgressStore.expected)
+    op.execute(
+        'INSERT INTO user_progress (user_id, experience, level, chat_count, current_streak, '
+        'badge_count, connection_count, company_visits, webinars_attended, engagement_score, updated_at) '
+        'SELECT user.id, COALESCE(user.experience, 0), COALESCE(user.level, 1), '
+        'COALESCE(user.chat_count, 0), COALESCE(user.current_streak, 0), '
+        '(SELECT COUNT(*) FROM user_badges WHERE user_badges.user_id = user.id), '
+        '(SELECT COUNT(*) FROM user_connections WHERE user_connections.user_id = user.id), '
+        '(SELECT COUNT(*) FROM event_participants JOIN event ON event.id = event_participants.event_id '
+        " WHERE event_participants.user_id = user.id AND event.event_type = 'company_visit'), "
+        '(SELECT COUNT(*) FROM event_participants JOIN event ON event.id = event_participants.event_id '
+        " WHERE event_participants.user_id = user.id AND event.event_type = 'webinar'), "
+        '0, CURRENT_TIMESTAMP FROM user'
+    )
+    op.execute(
+        'UPDATE user_progress SET engagement_score = CASE '
+        'WHEN (chat_count * 2 + company_visits * 10 + webinars_attended * 8 + current_streak * 5 '
+        '      + level * 15 + badge_count * 20 + 4) / 5 > 100 THEN 100 '
+        'ELSE (chat_count * 2 + company_visits * 10 + webinars_attended * 8 + current_streak * 5 '
+        '      + level * 15 + badge_count * 20 + 4) / 5 END'
+    )
+
+
+def downgrade():
+    op.drop_index('ix_event_participants_user_id', table_name='event_participants')
+    op.drop_index('ix_user_connections_user_id', table_name='user_connections')
+    op.drop_index('ix_user_badges_user_id', table_name='user_badges')
+    op.drop_table('user_progress')
@@ -0,0 +1,25 @@
+"""index user progress updated_at
+
+Revision ID: e5b92c7d4a31
+Revises: d81f3c6a9e52
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b92c7d4a31'
+down_revision = 'd81f3c6a9e52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The nightly achievement sweep only reads recently refreshed rows
+    op.create_index('ix_user_progress_updated_at', 'user_progress', ['updated_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_user_progress_updated_at', table_name='user_progress')
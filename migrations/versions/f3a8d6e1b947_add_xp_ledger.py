@@ -0,0 +1,67 @@
+"""add xp ledger
+
+Revision ID: f3a8d6e1b947
+Revises: e5b92c7d4a31
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a8d6e1b947'
+down_revision = 'e5b92c7d4a31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('xp_ledger',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('delta', sa.Integer(), nullable=False),
+        sa.Column('reason', sa.String(length=30), nullable=False),
+        sa.Column('source_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], name='fk_xp_ledger_user'),
+        sa.PrimaryKeyConstraint('id', name='pk_xp_ledger')
+    )
+    op.create_index('ix_xp_ledger_user_id_id', 'xp_ledger', ['user_id', 'id'], unique=False)
+    op.create_table('xp_compaction',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('compacted_through', sa.Integer(), nullable=False),
+        sa.Column('compacted_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id', name='pk_xp_compaction')
+    )
+
+    # Open the ledger with each user's current balance, already compacted
+    op.execute(
+        'INSERT INTO xp_ledger (user_id, delta, reason, created_at) '
+        "SELECT id, experience, 'opening_balance', CURRENT_TIMESTAMP FROM user "
+        'WHERE experience IS NOT NULL AND experience != 0 ORDER BY id'
+    )
+    op.execute(
+        'INSERT INTO xp_compaction (id, compacted_through, compacted_at) '
+        'SELECT 1, COALESCE(MAX(id), 0), CURRENT_TIMESTAMP FROM xp_ledger'
+    )
+
+
+def downgrade():
+    # Fold anything not yet compacted back into the user rows
+    op.execute(
+        'UPDATE user SET experience = COALESCE(experience, 0) + COALESCE(('
+        'SELECT SUM(delta) FROM xp_ledger WHERE xp_ledger.user_id = user.id '
+        'AND xp_ledger.id > (SELECT compacted_through FROM xp_compaction WHERE id = 1)), 0)'
+    )
+    op.execute(
+        'UPDATE user SET level = CASE '
+        'WHEN experience >= 4500 THEN 10 WHEN experience >= 3600 THEN 9 '
+        'WHEN experience >= 2800 THEN 8 WHEN experience >= 2100 THEN 7 '
+        'WHEN experience >= 1500 THEN 6 WHEN experience >= 1000 THEN 5 '
+        'WHEN experience >= 600 THEN 4 WHEN experience >= 300 THEN 3 '
+        'WHEN experience >= 100 THEN 2 ELSE 1 END'
+    )
+    op.drop_table('xp_compaction')
+    op.drop_index('ix_xp_ledger_user_id_id', table_name='xp_ledger')
+    op.drop_table('xp_ledger')
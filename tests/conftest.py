@@ -0,0 +1,61 @@
+import pytest
+from config import Config
+from app import create_app, db
+
+
+class TestConfig(Config):
+    TESTING = True
+    WTF_CSRF_ENABLED = False
+    LLM_PROVIDER = 'fake'
+    FAKE_LLM_LATENCY = 'fixed'
+    FAKE_LLM_LATENCY_MS = 0
+    FAKE_LLM_ERROR_RATE = 0.0
+    AI_CACHE_SHARED = False
+    INSIGHT_REFRESHER_ENABLED = False
+    XP_COMPACTOR_ENABLED = False
+    ACHIEVEMENT_SWEEP_ENABLED = False
+
+
+@pytest.fixture
+def app(tmp_path):
+    config = type('Config', (TestConfig,), {'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + str(tmp_path / 'test.db')})
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def make_user(app):
+    from app.models.models import User
+
+    def make_user(name='user', interests='technology', **columns):
+        user = User(name=name, email=f'{name}@example.com', interests=interests, **columns)
+        user.set_password('password')
+        db.session.add(user)
+        db.session.commit()
+        return user
+
+    return make_user
+
+
+class FakeClock:
+    """Stand-in for the time module whose monotonic() only moves when told to"""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def monotonic(self):
+        return self.now
+
+    def perf_counter(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
@@ -0,0 +1,102 @@
+import pytest
+from app.utils import ai_chat
+from app.utils.ai_chat import CareerAI
+from app.utils.llm_providers import FakeProvider, LLMError
+
+
+@pytest.fixture
+def provider(app, monkeypatch):
+    """The fake provider, counting the prompts it is sent"""
+    provider = FakeProvider(latency='fixed', latency_ms=0)
+    provider.prompts = []
+    generate = provider.generate
+
+    def counting_generate(prompt, generation_config=None):
+        provider.prompts.append(prompt)
+        return generate(prompt, generation_config)
+
+    provider.generate = counting_generate
+    monkeypatch.setattr(ai_chat, '_provider', provider)
+    return provider
+
+
+@pytest.fixture
+def student(make_user):
+    user = make_user('student', interests='technology, design')
+    # The system prompt reads profile fields the User model does not store
+    user.age = 17
+    user.goals = 'Become a UX designer'
+    return user
+
+
+def ask(user, message):
+    return CareerAI(user).generate_response(message, include_activities=False)
+
+
+def test_fake_provider_is_deterministic():
+    first = FakeProvider(latency='fixed', latency_ms=0)
+    second = FakeProvider(latency='fixed', latency_ms=0, seed=7)
+    assert first.generate('User: what is UX design?') == second.generate('User: what is UX design?')
+    assert 'UX design' in first.reply_for('User: what is UX design?')
+
+
+def test_fake_provider_error_rate():
+    with pytest.raises(LLMError):
+        FakeProvider(latency='fixed', latency_ms=0, error_rate=1.0).generate('hello')
+
+
+def test_fake_provider_streams_the_reply_in_chunks():
+    provider = FakeProvider(latency='fixed', latency_ms=0, chunk_size=10)
+    chunks = list(provider.stream('User: tell me about nursing'))
+    assert ''.join(chunks) == provider.reply_for('User: tell me about nursing')
+    assert all(len(chunk) <= 10 for chunk in chunks)
+
+
+def test_reply_comes_from_the_configured_provider(provider, student):
+    reply = ask(student, 'What does a UX designer do?')
+    assert len(provider.prompts) == 1
+    assert reply == provider.reply_for(provider.prompts[0])
+
+
+def test_repeated_question_is_answered_from_the_cache(provider, student):
+    first = ask(student, 'What does a UX designer do?')
+    second = ask(student, 'what does a  UX designer do?')
+    assert second == first
+    assert len(provider.prompts) == 1
+
+
+def test_follow_up_bypasses_the_cache(provider, student):
+    ask(student, 'What does a UX designer do?')
+    ask(student, 'why?')
+    ask(student, 'why?')
+    assert len(provider.prompts) == 3
+
+
+def test_cached_replies_are_not_shared_across_profiles(provider, student, make_user):
+    other = make_user('other', interests='healthcare')
+    other.age = 17
+    other.goals = 'Become a nurse'
+    ask(student, 'What does a UX designer do?')
+    ask(other, 'What does a UX designer do?')
+    assert len(provider.prompts) == 2
+
+
+def test_model_failure_falls_back(provider, student, monkeypatch):
+    def failing(prompt, generation_config=None):
+        raise LLMError('down')
+
+    monkeypatch.setattr(provider, 'generate', failing)
+    reply = ask(student, 'What does a UX designer do?')
+    assert reply.startswith(CareerAI.UNAVAILABLE_RESPONSE)
+
+
+
+def test_metrics_report_ai_counters(app, provider, student):
+    ask(student, 'What does a UX designer do?')
+    ask(student, 'What does a UX designer do?')
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(student.id)
+    metrics = client.get('/metrics').get_json()
+    assert metrics['ai_response_cache']['hits'] >= 1
+    assert metrics['ai_breaker']['state'] == 'closed'
@@ -0,0 +1,114 @@
+from types import SimpleNamespace
+import pytest
+from app.utils import cache
+from app.utils.cache import LRUCache, ResponseCache
+
+
+@pytest.fixture
+def clock(clock, monkeypatch):
+    monkeypatch.setattr(cache, 'time', clock)
+    return clock
+
+
+def test_evicts_least_recently_used():
+    removed = []
+    lru = LRUCache(max_entries=2, on_remove=removed.append)
+    lru.set('a', 1)
+    lru.set('b', 2)
+    assert lru.get('a') == 1
+    lru.set('c', 3)
+    assert 'b' not in lru
+    assert lru.get('a') == 1 and lru.get('c') == 3
+    assert removed == ['b']
+    assert lru.stats()['evictions'] == 1
+
+
+def test_ttl_expires_entries(clock):
+    lru = LRUCache(ttl=10)
+    lru.set('a', 1)
+    clock.advance(9)
+    assert lru.get('a') == 1
+    clock.advance(1)
+    assert lru.get('a') is None
+    assert lru.stats()['expirations'] == 1
+
+
+def test_per_entry_ttl_overrides_default(clock):
+    lru = LRUCache(ttl=10)
+    lru.set('short', 1, ttl=2)
+    lru.set('long', 2)
+    clock.advance(5)
+    assert lru.get('short') is None
+    assert lru.get('long') == 2
+
+
+def test_sliding_ttl_restarts_on_hit(clock):
+    lru = LRUCache(ttl=10, sliding=True)
+    lru.set('a', 1)
+    for _ in range(3):
+        clock.advance(8)
+        assert lru.get('a') == 1
+    clock.advance(10)
+    assert lru.get('a') is None
+
+
+def test_max_bytes_evicts_until_under_budget():
+    lru = LRUCache(max_bytes=10, sizeof=len)
+    lru.set('a', 'xxxx')
+    lru.set('b', 'xxxx')
+    lru.set('c', 'xxxx')
+    assert 'a' not in lru
+    assert lru.bytes == 8
+
+
+def test_max_bytes_keeps_a_single_oversized_entry():
+    lru = LRUCache(max_bytes=4, sizeof=len)
+    lru.set('a', 'x' * 10)
+    assert lru.get('a') == 'x' * 10
+
+
+def test_replacing_an_entry_updates_its_size():
+    lru = LRUCache(max_bytes=100, sizeof=len)
+    lru.set('a', 'x' * 10)
+    lru.set('a', 'x' * 3)
+    assert lru.bytes == 3
+
+
+def test_on_remove_sees_deletes_expiries_and_clears(clock):
+    removed = []
+    lru = LRUCache(ttl=5, on_remove=removed.append)
+    lru.set('a', 1)
+    lru.set('b', 2)
+    lru.set('c', 3, ttl=60)
+    assert lru.delete('a')
+    assert not lru.delete('a')
+    clock.advance(10)
+    lru.get('b')
+    lru.clear()
+    assert removed == ['a', 'b', 'c']
+    assert len(lru) == 0 and lru.bytes == 0
+
+
+def profile(**fields):
+    values = dict(interests='Technology, Design', level=2, age=17, goals='Become an engineer')
+    values.update(fields)
+    return SimpleNamespace(**values)
+
+
+def test_profile_fingerprint_ignores_formatting():
+    assert ResponseCache.profile_fingerprint(profile()) == ResponseCache.profile_fingerprint(
+        profile(interests='design,technology', goals='  become an   ENGINEER ')
+    )
+
+
+@pytest.mark.parametrize('field, value', [
+    ('interests', 'art'), ('level', 3), ('age', 18), ('goals', 'Run a bakery')
+])
+def test_profile_fingerprint_covers_prompt_fields(field, value):
+    assert ResponseCache.profile_fingerprint(profile()) != ResponseCache.profile_fingerprint(profile(**{field: value}))
+
+
+def test_make_key_normalizes_the_prompt():
+    responses = ResponseCache()
+    assert responses.make_key('What  is UX?', profile()) == responses.make_key('what is ux?', profile())
+    assert responses.make_key('what is ux?', profile()) != responses.make_key('what is ux?', profile(level=5))
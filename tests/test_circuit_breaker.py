@@ -0,0 +1,155 @@
+import threading
+import pytest
+from app.utils import circuit_breaker
+from app.utils.circuit_breaker import CircuitBreaker, CircuitOpen, DeadlineExceeded
+from app.utils.rate_limit import RateLimited
+
+
+@pytest.fixture
+def breaker():
+    breaker = CircuitBreaker('test', ignore=(RateLimited,))
+    breaker.failure_threshold = 2
+    breaker.reset_timeout = 30
+    return breaker
+
+
+@pytest.fixture
+def clock(clock, monkeypatch):
+    monkeypatch.setattr(circuit_breaker, 'time', clock)
+    return clock
+
+
+def fail():
+    raise ValueError('vendor error')
+
+
+def trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(ValueError):
+            breaker.call(fail)
+
+
+def test_opens_after_consecutive_failures(breaker):
+    assert breaker.call(lambda: 'ok') == 'ok'
+    trip(breaker)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.call(lambda: 'ok')
+    assert breaker.stats()['rejected_open'] == 1
+
+
+def test_success_resets_the_failure_count(breaker):
+    with pytest.raises(ValueError):
+        breaker.call(fail)
+    breaker.call(lambda: 'ok')
+    with pytest.raises(ValueError):
+        breaker.call(fail)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_trial_success_closes(breaker, clock):
+    trip(breaker)
+    clock.advance(30)
+    assert breaker.call(lambda: 'ok') == 'ok'
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert [t['to'] for t in breaker.transitions] == ['open', 'half_open', 'closed']
+
+
+def test_half_open_trial_failure_reopens(breaker, clock):
+    trip(breaker)
+    clock.advance(30)
+    with pytest.raises(ValueError):
+        breaker.call(fail)
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.advance(29)
+    with pytest.raises(CircuitOpen):
+        breaker.call(lambda: 'ok')
+
+
+def test_half_open_admits_one_trial_at_a_time(breaker, clock):
+    trip(breaker)
+    clock.advance(30)
+    breaker.allow()
+    with pytest.raises(CircuitOpen):
+        breaker.allow()
+    breaker.record_success(0)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_slow_calls_count_as_failures(breaker):
+    breaker.slow_call_threshold = 5
+    breaker.allow()
+    breaker.record_success(6)
+    breaker.allow()
+    breaker.record_success(6)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.stats()['slow_calls'] == 2
+
+
+def test_ignored_exceptions_do_not_count(breaker):
+    def limited():
+        raise RateLimited('busy')
+
+    for _ in range(3):
+        with pytest.raises(RateLimited):
+            breaker.call(limited)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.stats()['failures'] == 0
+
+
+def test_call_deadline(breaker):
+    release = threading.Event()
+    with pytest.raises(DeadlineExceeded):
+        breaker.call(lambda: release.wait(5), timeout=0.05)
+    release.set()
+    assert breaker.stats()['deadline_exceeded'] == 1
+    assert breaker.consecutive_failures == 1
+
+
+def test_stream_yields_every_chunk(breaker):
+    assert list(breaker.stream(lambda: iter(['a', 'b', 'c']))) == ['a', 'b', 'c']
+    assert breaker.stats()['calls'] == 1 and breaker.consecutive_failures == 0
+
+
+def test_stream_first_chunk_deadline(breaker):
+    release = threading.Event()
+
+    def stalled():
+        release.wait(5)
+        yield 'late'
+
+    with pytest.raises(DeadlineExceeded, match='first chunk'):
+        list(breaker.stream(stalled, first_chunk_timeout=0.05, timeout=5))
+    release.set()
+    assert breaker.stats()['deadline_exceeded'] == 1
+
+
+def test_stream_total_deadline(breaker):
+    release = threading.Event()
+
+    def stalls_midway():
+        yield 'first'
+        release.wait(5)
+        yield 'late'
+
+    chunks = []
+    with pytest.raises(DeadlineExceeded, match='stream'):
+        for chunk in breaker.stream(stalls_midway, first_chunk_timeout=1, timeout=0.1):
+            chunks.append(chunk)
+    release.set()
+    assert chunks == ['first']
+
+
+def test_abandoned_stream_releases_the_call(breaker):
+    stream = breaker.stream(lambda: iter(['a', 'b']))
+    assert next(stream) == 'a'
+    stream.close()
+    assert breaker.stats()['calls'] == 0
+    assert breaker.consecutive_failures == 0
+
+
+def test_fallbacks_feed_the_fallback_rate(breaker):
+    breaker.call(lambda: 'ok')
+    breaker.record_fallback('cached')
+    assert breaker.stats()['fallbacks'] == {'cached': 1}
+    assert breaker.stats()['fallback_rate'] == 1.0
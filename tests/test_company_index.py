@@ -0,0 +1,94 @@
+import math
+import pytest
+from app import db
+from app.models.models import Company
+from app.utils.company_index import CompanyIndex, company_index
+
+DOCUMENTS = [
+    (1, 'We build machine learning tools for hospitals. Healthcare', 'startup'),
+    (2, 'Design studio for mobile apps and games. Design', 'startup'),
+    (3, 'Cloud software and data engineering at scale. Technology', 'enterprise'),
+    (4, 'Game design and interactive storytelling. Entertainment', 'medium'),
+    (5, 'Renewable energy engineering projects. Energy', 'enterprise'),
+    (6, 'Nurses, doctors and healthcare data. Healthcare', 'medium'),
+]
+
+
+def reference_scores(index, documents, words, k1=1.2, b=0.75):
+    """Textbook BM25 over the tokenized documents"""
+    docs = {company_id: index.tokens(text) for company_id, text, _ in documents}
+    avgdl = sum(len(tokens) for tokens in docs.values()) / len(docs)
+    scores = {}
+    for company_id, tokens in docs.items():
+        score = 0.0
+        for word in words:
+            df = sum(1 for other in docs.values() if word in other)
+            count = tokens.count(word)
+            if df and count:
+                idf = math.log1p((len(docs) - df + 0.5) / (df + 0.5))
+                score += idf * count * (k1 + 1) / (count + k1 * (1 - b + b * len(tokens) / avgdl))
+        scores[company_id] = score
+    return scores
+
+
+@pytest.fixture
+def index():
+    index = CompanyIndex()
+    index.load_documents(DOCUMENTS)
+    return index
+
+
+@pytest.mark.parametrize('interests', ['healthcare', 'design, technology', 'data, engineering', 'astronomy'])
+def test_scores_match_textbook_bm25(index, interests):
+    expected = reference_scores(index, DOCUMENTS, index.query_tokens(interests))
+    scores = index.scores(interests)
+    for slot, company_id in enumerate(index.company_ids.tolist()):
+        assert scores[slot] == pytest.approx(expected[company_id], rel=1e-5)
+
+
+def test_search_ranks_by_score(index):
+    assert index.search('healthcare', refresh=False, limit=2) == [6, 1]
+    assert index.search('design', refresh=False, limit=2) == [2, 4]
+
+
+def test_search_filters_by_size(index):
+    assert index.search('healthcare', size='startup', refresh=False) == [1, 2]
+    assert index.search('healthcare', size='unknown', refresh=False) == []
+
+
+def test_unmatched_companies_fill_by_lowest_id(index):
+    assert index.search('astronomy', refresh=False, limit=3) == [1, 2, 3]
+    assert index.search('energy', refresh=False, limit=3) == [5, 1, 2]
+
+
+def test_query_tokens_use_interest_labels(index):
+    index.interest_labels = {'ai_ml': 'AI & Machine Learning'}
+    assert index.query_tokens('ai_ml, Design') == ['ai', 'ml', 'machine', 'learning', 'design']
+
+
+def test_updates_replace_and_remove_documents(index):
+    index.update_documents([(3, 'Healthcare data platform. Healthcare', 'enterprise')], removed=[6])
+    assert index.search('healthcare', refresh=False, limit=2) == [3, 1]
+    assert index.stats()['dead_rows'] == 2
+    assert 6 not in index.search('astronomy', refresh=False, limit=10)
+
+
+def test_committed_company_changes_reach_the_index(app):
+    db.session.add_all([
+        Company(name='Clinic', description='Healthcare clinics', industry='Healthcare', size='startup'),
+        Company(name='Studio', description='Game design', industry='Design', size='startup')
+    ])
+    db.session.commit()
+    company_index.rebuild()
+    clinic, studio = Company.query.order_by(Company.id).all()
+    assert company_index.search('design', size='startup', limit=1) == [studio.id]
+
+    studio.description = 'Hospital software'
+    studio.industry = 'Healthcare'
+    db.session.commit()
+    assert company_index.search('design', size='startup', limit=2) == [clinic.id, studio.id]
+    assert company_index.stats()['updates'] >= 1
+
+    db.session.delete(clinic)
+    db.session.commit()
+    assert company_index.search('healthcare', size='startup') == [studio.id]
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from app.models.models import Event
+from app.utils.event_cache import event_cache
+
+
+@pytest.fixture
+def events(app):
+    now = datetime.utcnow()
+    events = [
+        Event(title='Later', date=now + timedelta(days=2), max_participants=1),
+        Event(title='Soon', date=now + timedelta(hours=1)),
+        Event(title='Next week', date=now + timedelta(days=7))
+    ]
+    db.session.add_all(events)
+    db.session.commit()
+    return events
+
+
+def loader(events, calls):
+    def load():
+        calls.append(1)
+        return list(events)
+    return load
+
+
+def test_hits_return_the_cached_events_in_order(events):
+    calls = []
+    first = event_cache.get_or_load('bucket', loader(events, calls))
+    db.session.expunge_all()
+    second = event_cache.get_or_load('bucket', loader(events, calls))
+    assert [e.title for e in second] == [e.title for e in first] == ['Later', 'Soon', 'Next week']
+    assert len(calls) == 1
+
+
+def test_hits_drop_events_that_have_started(events):
+    event_cache.get_or_load('bucket', loader(events, []))
+    events[1].date = datetime.utcnow() - timedelta(minutes=1)
+    event_cache.buckets.set('bucket', [(e.id, e.date) for e in events])
+    assert [e.title for e in event_cache.get_or_load('bucket', loader(events, []))] == ['Later', 'Next week']
+
+
+def test_committed_event_changes_clear_the_cache(events):
+    event_cache.get_or_load('bucket', loader(events, []))
+    events[2].title = 'Renamed'
+    db.session.commit()
+    assert 'bucket' not in event_cache.buckets
+
+
+def test_filling_the_last_place_clears_the_cache(events, make_user):
+    event_cache.get_or_load('bucket', loader(events, []))
+    user = make_user()
+    user.registered_events.append(events[0])
+    db.session.commit()
+    assert 'bucket' not in event_cache.buckets
@@ -0,0 +1,74 @@
+import random
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from app import db
+from app.models.models import Event
+from app.utils.event_manager import EventManager
+from app.utils.interests import interest_mask
+
+
+def brute_force_top_k(scores, ids, k):
+    return sorted(range(len(scores)), key=lambda i: (-scores[i], ids[i]))[:k]
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_top_k_matches_a_full_sort(seed):
+    rng = random.Random(seed)
+    n = rng.randrange(1, 40)
+    scores = np.array([rng.randrange(4) for _ in range(n)], dtype=np.uint64)
+    ids = np.array(rng.sample(range(1, 500), n), dtype=np.int64)
+    k = rng.randrange(1, 8)
+    assert EventManager.top_k(scores, ids, k).tolist() == brute_force_top_k(scores.tolist(), ids.tolist(), k)
+
+
+def test_top_k_ties_go_to_the_lowest_ids():
+    scores = np.array([1, 2, 1, 1, 2], dtype=np.uint64)
+    ids = np.array([50, 40, 10, 30, 20], dtype=np.int64)
+    assert ids[EventManager.top_k(scores, ids, 3)].tolist() == [20, 40, 10]
+
+
+def test_interest_mask_ignores_case_spacing_and_unknown_values():
+    assert interest_mask(' Design ,healthcare, knitting') == interest_mask('healthcare,design')
+    assert interest_mask(None) == 0
+
+
+@pytest.fixture
+def event(app):
+    event = Event(title='Open day', date=datetime.utcnow() + timedelta(days=7), event_type='company_visit')
+    db.session.add(event)
+    db.session.commit()
+    return event
+
+
+def test_buddies_share_the_most_interests(event, make_user):
+    me = make_user('me', interests='design, healthcare, technology')
+    both = make_user('both', interests='healthcare, design')
+    one = make_user('one', interests='technology, finance')
+    none = make_user('none', interests='finance')
+    all_three = make_user('all', interests='technology, design, healthcare')
+    outsider = make_user('outsider', interests='design, healthcare, technology')
+    event.participants.extend([me, both, one, none, all_three])
+    db.session.commit()
+
+    buddies = EventManager.get_matching_buddies(me, event.id, limit=3)
+    assert [u.name for u in buddies] == ['all', 'both', 'one']
+    assert outsider not in EventManager.get_matching_buddies(me, event.id, limit=10)
+
+
+def test_buddy_ties_go_to_the_earliest_users(event, make_user):
+    me = make_user('me', interests='design')
+    others = [make_user(f'user{i}', interests='design' if i % 2 else 'finance') for i in range(6)]
+    event.participants.extend([me] + list(reversed(others)))
+    db.session.commit()
+
+    buddies = EventManager.get_matching_buddies(me, event.id, limit=4)
+    assert [u.name for u in buddies] == ['user1', 'user3', 'user5', 'user0']
+
+
+def test_no_buddies_without_other_participants(event, make_user):
+    me = make_user('me')
+    event.participants.append(me)
+    db.session.commit()
+    assert EventManager.get_matching_buddies(me, event.id) == []
+    assert EventManager.get_matching_buddies(me, event.id + 1) == []
@@ -0,0 +1,83 @@
+import random
+import pytest
+from app import db
+from app.utils.leaderboard import Leaderboard, RankedBoard, leaderboard
+
+
+def expected_order(scores):
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+def assert_matches(board, scores):
+    order = expected_order(scores)
+    assert len(board) == len(order)
+    assert board.page(0, len(order) + 5) == [
+        (rank, user_id, experience) for rank, (user_id, experience) in enumerate(order, 1)
+    ]
+    for rank, (user_id, _) in enumerate(order, 1):
+        assert board.rank(user_id) == rank
+
+
+def test_orders_by_experience_then_user_id():
+    board = RankedBoard()
+    board.load_entries([(3, 50), (1, 50), (2, 80), (4, None)])
+    assert board.page(0, 10) == [(1, 2, 80), (2, 1, 50), (3, 3, 50), (4, 4, 0)]
+    assert board.rank(3) == 3
+    assert board.rank(99) is None
+
+
+def test_pages_start_at_an_offset():
+    board = RankedBoard(load=2)
+    board.load_entries([(user_id, 100 - user_id) for user_id in range(1, 11)])
+    assert board.page(3, 3) == [(4, 4, 96), (5, 5, 95), (6, 6, 94)]
+    assert board.page(9, 5) == [(10, 10, 90)]
+    assert board.page(10, 5) == []
+
+
+def test_empty_board():
+    board = RankedBoard()
+    assert board.page(0, 10) == [] and len(board) == 0
+    board.set(1, 10)
+    board.discard(1)
+    assert board.page(0, 10) == [] and board.rank(1) is None
+
+
+@pytest.mark.parametrize('load', [1, 2, 5, 1000])
+def test_random_updates_match_a_sorted_list(load):
+    rng = random.Random(load)
+    board = RankedBoard(load=load)
+    scores = {user_id: rng.randrange(50) for user_id in range(1, 40)}
+    board.load_entries(scores.items())
+    assert_matches(board, scores)
+    for _ in range(300):
+        user_id = rng.randrange(1, 60)
+        if rng.random() < 0.2:
+            board.discard(user_id)
+            scores.pop(user_id, None)
+        else:
+            scores[user_id] = rng.randrange(50)
+            board.set(user_id, scores[user_id])
+    assert_matches(board, scores)
+    offset = rng.randrange(len(scores))
+    assert board.page(offset, 7) == board.page(0, len(scores))[offset:offset + 7]
+
+
+def test_split_interests():
+    assert Leaderboard.split_interests(' Tech, design,tech ,, ') == ('tech', 'design')
+    assert Leaderboard.split_interests(None) == ()
+
+
+def test_boards_follow_committed_experience(make_user):
+    alice = make_user('alice', interests='tech, design')
+    bob = make_user('bob', interests='design')
+    leaderboard.rebuild()
+    bob.add_experience(30)
+    db.session.commit()
+    alice.add_experience(20)
+    alice.interests = 'tech'
+    db.session.commit()
+
+    assert [row['user_id'] for row in leaderboard.top()['entries']] == [bob.id, alice.id]
+    assert leaderboard.rank(alice.id, 'tech') == 1
+    assert leaderboard.rank(alice.id, 'design') is None
+    assert leaderboard.top(interest='Design')['total'] == 1
@@ -0,0 +1,79 @@
+import threading
+from types import SimpleNamespace
+import pytest
+from app.utils import rate_limit
+from app.utils.rate_limit import LLMLimiter, RateLimited, TokenBucket
+
+
+@pytest.fixture
+def clock(clock, monkeypatch):
+    monkeypatch.setattr(rate_limit, 'time', clock)
+    return clock
+
+
+def test_token_bucket_refills_over_time(clock):
+    bucket = TokenBucket(capacity=2, refill_per_second=0.5)
+    assert bucket.try_consume() == (True, 0)
+    assert bucket.try_consume() == (True, 0)
+    allowed, retry_after = bucket.try_consume()
+    assert not allowed and retry_after == pytest.approx(2)
+    clock.advance(2)
+    assert bucket.try_consume()[0]
+
+
+def test_token_bucket_never_exceeds_capacity(clock):
+    bucket = TokenBucket(capacity=2, refill_per_second=1)
+    clock.advance(60)
+    assert bucket.try_consume(2)[0]
+    assert not bucket.try_consume()[0]
+
+
+def limiter(limits):
+    limiter = LLMLimiter()
+    limiter.user_limits = limits
+    return limiter
+
+
+@pytest.mark.parametrize('level, burst', [(1, 2), (2, 2), (3, 4), (9, 4)])
+def test_bucket_size_follows_level_tier(clock, level, burst):
+    limits = limiter({1: (2, 60), 3: (4, 60)})
+    user = SimpleNamespace(id=1, level=level)
+    for _ in range(burst):
+        limits.check_user(user)
+    with pytest.raises(RateLimited) as raised:
+        limits.check_user(user)
+    assert raised.value.retry_after == 1
+    assert limits.stats()['rejected_user'] == 1
+
+
+def test_users_have_separate_buckets(clock):
+    limits = limiter({1: (1, 60)})
+    limits.check_user(SimpleNamespace(id=1, level=1))
+    limits.check_user(SimpleNamespace(id=2, level=1))
+    with pytest.raises(RateLimited):
+        limits.check_user(SimpleNamespace(id=1, level=1))
+
+
+def test_level_up_resizes_the_bucket(clock):
+    limits = limiter({1: (1, 60), 3: (3, 60)})
+    user = SimpleNamespace(id=1, level=1)
+    limits.check_user(user)
+    user.level = 3
+    for _ in range(3):
+        limits.check_user(user)
+
+
+def test_slot_rejects_when_all_slots_stay_busy():
+    limits = LLMLimiter()
+    limits.max_in_flight = 1
+    limits.queue_deadline = 0.01
+    limits._semaphore = threading.BoundedSemaphore(1)
+    with limits.slot():
+        assert limits.stats()['in_flight'] == 1
+        with pytest.raises(RateLimited):
+            with limits.slot():
+                pass
+    assert limits.stats()['in_flight'] == 0
+    assert limits.stats()['rejected_capacity'] == 1
+    with limits.slot():
+        pass
@@ -0,0 +1,97 @@
+import threading
+import time
+import pytest
+from app.utils.singleflight import SingleFlight, SingleFlightTimeout
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'answer'
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do('key', slow)))
+    leader.start()
+    started.wait(5)
+    waiters = [threading.Thread(target=lambda: results.append(flight.do('key', slow))) for _ in range(4)]
+    for waiter in waiters:
+        waiter.start()
+    while flight._calls['key'].waiters < 4:
+        time.sleep(0.001)
+    release.set()
+    for thread in [leader] + waiters:
+        thread.join(5)
+
+    assert results == ['answer'] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {'in_flight': 0, 'executions': 1, 'coalesced': 4, 'timeouts': 0, 'errors': 0}
+
+
+def test_waiters_receive_the_leaders_exception():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise ValueError('vendor down')
+
+    errors = []
+
+    def run():
+        try:
+            flight.do('key', failing)
+        except ValueError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=run)
+    leader.start()
+    started.wait(5)
+    waiter = threading.Thread(target=run)
+    waiter.start()
+    while flight._calls['key'].waiters < 1:
+        time.sleep(0.001)
+    release.set()
+    leader.join(5)
+    waiter.join(5)
+
+    assert len(errors) == 2 and errors[0] is errors[1]
+    assert flight.stats()['errors'] == 1
+
+
+def test_waiter_times_out_while_leader_finishes():
+    flight = SingleFlight(timeout=0.05)
+    started = threading.Event()
+    release = threading.Event()
+    results = []
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return 'late'
+
+    leader = threading.Thread(target=lambda: results.append(flight.do('key', slow)))
+    leader.start()
+    started.wait(5)
+    with pytest.raises(SingleFlightTimeout):
+        flight.do('key', slow)
+    release.set()
+    leader.join(5)
+
+    assert results == ['late']
+    assert flight.stats()['timeouts'] == 1
+
+
+def test_sequential_calls_run_again():
+    flight = SingleFlight()
+    assert flight.do('key', lambda: 1) == 1
+    assert flight.do('key', lambda: 2) == 2
+    assert flight.stats()['executions'] == 2
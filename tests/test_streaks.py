@@ -0,0 +1,72 @@
+import random
+from datetime import date, timedelta
+import pytest
+from sqlalchemy import update
+from app import db
+from app.models.models import User
+from app.utils.progress_tracker import ProgressTracker
+
+TODAY = date(2026, 3, 10)
+
+
+def days_ago(*offsets):
+    return [TODAY - timedelta(days=offset) for offset in offsets]
+
+
+@pytest.fixture
+def user(make_user):
+    return make_user()
+
+
+def record(user, chat_dates, current=None, longest=None, last=None):
+    """Apply streak_values for chats on chat_dates to a user with the given stored streak"""
+    db.session.execute(update(User).where(User.id == user.id).values(
+        current_streak=current, longest_streak=longest, last_chat_date=last
+    ))
+    db.session.execute(update(User).where(User.id == user.id).values(**ProgressTracker.streak_values(chat_dates)))
+    db.session.commit()
+    db.session.refresh(user)
+    return user.current_streak, user.longest_streak, user.last_chat_date
+
+
+def test_first_chat(user):
+    assert record(user, days_ago(0)) == (1, 1, TODAY)
+
+
+def test_same_day_chat_keeps_the_streak(user):
+    assert record(user, days_ago(0), current=3, longest=5, last=TODAY) == (3, 5, TODAY)
+
+
+def test_next_day_chat_extends_the_streak(user):
+    assert record(user, days_ago(0), current=3, longest=3, last=TODAY - timedelta(days=1)) == (4, 4, TODAY)
+
+
+def test_gap_restarts_the_streak(user):
+    assert record(user, days_ago(0), current=6, longest=6, last=TODAY - timedelta(days=2)) == (1, 6, TODAY)
+
+
+def test_multi_day_batch_continues_the_stored_streak(user):
+    assert record(user, days_ago(2, 1, 0, 0), current=4, longest=4, last=TODAY - timedelta(days=3)) == (7, 7, TODAY)
+
+
+def test_batch_with_a_gap_counts_only_the_last_run(user):
+    # The first run extends the stored streak to 3 before the gap
+    assert record(user, days_ago(5, 1, 0), current=2, longest=2, last=TODAY - timedelta(days=6)) == (2, 3, TODAY)
+
+
+def test_batch_overlapping_the_stored_streak(user):
+    assert record(user, days_ago(2, 1, 0), current=2, longest=2, last=TODAY - timedelta(days=1)) == (3, 3, TODAY)
+
+
+def test_late_batch_does_not_move_the_streak_back(user):
+    assert record(user, days_ago(9, 8), current=2, longest=2, last=TODAY) == (2, 2, TODAY)
+
+
+def test_matches_a_rebuild_from_history(user):
+    rng = random.Random(7)
+    for _ in range(25):
+        history = sorted(TODAY - timedelta(days=rng.randrange(30)) for _ in range(rng.randrange(1, 12)))
+        split = rng.randrange(len(history))
+        stored = ProgressTracker.streaks_from_dates(history[:split])
+        expected = ProgressTracker.streaks_from_dates(history)
+        assert record(user, history[split:], *stored) == expected
@@ -0,0 +1,114 @@
+import pytest
+from sqlalchemy import event, update
+from app import db
+from app.models.models import User, XpCompaction, XpLedger
+from app.utils.xp_ledger import ExperienceLedger
+
+
+@pytest.fixture(autouse=True)
+def watermark(app):
+    # Seeded by the xp_ledger migration
+    db.session.add(XpCompaction(id=1, compacted_through=0))
+    db.session.commit()
+
+
+@pytest.fixture
+def statements(app):
+    executed = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    yield executed
+    event.remove(db.engine, 'before_cursor_execute', count)
+
+
+def stored(user_id):
+    return db.session.connection().execute(
+        db.select(User.experience, User.level).where(User.id == user_id)
+    ).one()
+
+
+def test_add_shows_the_new_balance_without_touching_the_row(make_user):
+    user = make_user()
+    assert user.add_experience(150, 'grant') == 2
+    db.session.commit()
+    assert (user.experience, user.level) == (150, 2)
+    assert tuple(stored(user.id)) == (0, 1)
+    assert ExperienceLedger.balances([user.id]) == {user.id: 150}
+
+
+def test_loaded_users_include_pending_entries(make_user):
+    user = make_user()
+    user_id = user.id
+    ExperienceLedger.record([{'user_id': user_id, 'delta': 40, 'reason': 'chat'}])
+    db.session.commit()
+    db.session.expunge_all()
+    assert db.session.get(User, user_id).experience == 40
+
+
+def test_refreshing_only_the_level_recomputes_it(make_user):
+    user = make_user()
+    user.add_experience(150, 'grant')
+    db.session.commit()
+    db.session.expire(user, ['level'])
+    assert (user.experience, user.level) == (150, 2)
+
+
+def test_orm_updates_are_not_overlaid(make_user):
+    user = make_user()
+    user.add_experience(10, 'grant')
+    db.session.commit()
+    db.session.execute(update(User).where(User.id == user.id).values(chat_count=3))
+    assert user.chat_count == 3 and user.experience == 10
+
+
+def test_user_queries_overlay_in_one_statement(make_user, statements):
+    ids = [make_user(f'user{i}').id for i in range(10)]
+    ExperienceLedger.record([{'user_id': user_id, 'delta': user_id, 'reason': 'chat'} for user_id in ids])
+    db.session.commit()
+    db.session.expunge_all()
+
+    statements.clear()
+    loaded = User.query.order_by(User.id).all()
+    assert [u.experience for u in loaded] == ids
+    assert len(statements) == 2
+
+
+def test_compact_folds_entries_and_moves_the_watermark(make_user):
+    alice, bob = make_user('alice'), make_user('bob')
+    ExperienceLedger.record([
+        {'user_id': alice.id, 'delta': 100, 'reason': 'chat'},
+        {'user_id': bob.id, 'delta': 30, 'reason': 'chat'},
+        {'user_id': alice.id, 'delta': 60, 'reason': 'event'}
+    ])
+    db.session.commit()
+
+    assert ExperienceLedger.compact(batch_size=2, min_age=0) == 3
+    assert tuple(stored(alice.id)) == (160, 2)
+    assert tuple(stored(bob.id)) == (30, 1)
+    assert ExperienceLedger.watermark() == db.session.scalar(db.select(db.func.max(XpLedger.id)))
+    assert ExperienceLedger.balances([alice.id, bob.id]) == {alice.id: 160, bob.id: 30}
+    assert ExperienceLedger.compact(min_age=0) == 0
+
+
+def test_compact_leaves_recent_entries(make_user):
+    user = make_user()
+    user.add_experience(50, 'grant')
+    db.session.commit()
+    assert ExperienceLedger.compact(min_age=60) == 0
+    assert ExperienceLedger.balances([user.id]) == {user.id: 50}
+
+
+def test_rebuild_repairs_drifted_balances(make_user):
+    user = make_user()
+    user.add_experience(120, 'grant')
+    db.session.commit()
+    ExperienceLedger.compact(min_age=0)
+    db.session.execute(update(User.__table__).where(User.__table__.c.id == user.id).values(experience=5, level=1))
+    db.session.commit()
+
+    assert ExperienceLedger.rebuild() == 1
+    assert tuple(stored(user.id)) == (120, 2)
+    assert ExperienceLedger.rebuild() == 0